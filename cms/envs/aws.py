@@ -237,6 +237,10 @@ if AWS_SECRET_ACCESS_KEY == "":
 DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+STATIC_CONTENT_DISK_CACHE_ROOT = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_ROOT', STATIC_CONTENT_DISK_CACHE_ROOT)
+STATIC_CONTENT_DISK_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_SIZE', STATIC_CONTENT_DISK_CACHE_MAX_SIZE
+)
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
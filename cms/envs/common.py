@@ -273,6 +273,12 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Directory to cache assets which are too large for memcached in, so they don't have to be
+# streamed from the contentstore on every request. None disables the cache.
+STATIC_CONTENT_DISK_CACHE_ROOT = None
+# Size in bytes past which the least recently used assets are evicted from that directory
+STATIC_CONTENT_DISK_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
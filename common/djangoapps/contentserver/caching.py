@@ -0,0 +1,214 @@
+"""
+An on-disk cache of static assets, so that assets too large to keep in memcached don't
+have to be streamed out of GridFS on every request.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# Prefix of the files which are being written into the cache, and so can't be served yet
+TEMP_FILE_PREFIX = 'tmp'
+
+# Fraction of max_size that the cache is trimmed down to when it goes over max_size, so
+# that the next few additions don't have to scan it again
+EVICTION_LOW_WATER_MARK = 0.9
+
+# The AssetDiskCache of each (root, max_size), so their size estimates last between requests
+_disk_caches = {}
+_disk_caches_lock = threading.Lock()
+
+
+class AssetDiskCache(object):
+    """
+    A cache of asset contents in files under `root`, keyed by asset location and
+    last_modified_at (so new versions of an asset never get served stale data). When the
+    total size of the cached files goes over `max_size` bytes, the least recently used files
+    are evicted until it is back under EVICTION_LOW_WATER_MARK of `max_size`.
+
+    The cache can be shared by all of the processes on a machine. Each process keeps an
+    estimate of the total size, from the last time it scanned the cache plus the files it
+    has added since, and only scans the cache again when the estimate goes over `max_size`.
+    """
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+        self._size = None
+        self._size_lock = threading.Lock()
+
+    def _path(self, content):
+        """
+        The path of the file that the given content is cached in.
+        """
+        key = hashlib.sha1(u'{}|{}'.format(
+            content.location, content.last_modified_at.isoformat()
+        ).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, content):
+        """
+        Returns a StaticContentStream which streams the data of `content` from the cache, or
+        None if it isn't cached.
+        """
+        path = self._path(content)
+        try:
+            # mark the file as recently used
+            os.utime(path, None)
+            stream = open(path, 'rb')
+        except (IOError, OSError):
+            return None
+
+        return StaticContentStream(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked
+        )
+
+    def stream_and_add(self, content):
+        """
+        Yields the data of `content` from its own stream, copying it into the cache as it goes.
+
+        The copy is only added to the cache once all of the data has been streamed, so that a
+        response which isn't read to the end doesn't leave a partial file behind. Errors in
+        writing the copy are logged, and the data is still streamed.
+        """
+        path = self._path(content)
+        temp_file = self._create_temp_file(content, path)
+        streamed = False
+        try:
+            for chunk in content.stream_data():
+                if temp_file is not None:
+                    temp_file = self._write(content, temp_file, chunk)
+                yield chunk
+            streamed = True
+        finally:
+            if temp_file is not None:
+                if streamed:
+                    self._add(content, temp_file, path)
+                else:
+                    self._discard(temp_file)
+
+    @staticmethod
+    def _create_temp_file(content, path):
+        """
+        Returns a temporary file in the directory of `path`, to copy the data of `content` into,
+        or None if it couldn't be created. The file is renamed to `path` once it is complete, so
+        that other processes never see a partially written file.
+        """
+        directory = os.path.dirname(path)
+        try:
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    # another process may have just made it
+                    if not os.path.isdir(directory):
+                        raise
+            return tempfile.NamedTemporaryFile(prefix=TEMP_FILE_PREFIX, dir=directory, delete=False)
+        except (IOError, OSError):
+            log.exception(u"Unable to add asset to the disk cache: %s", content.location)
+            return None
+
+    def _write(self, content, temp_file, chunk):
+        """
+        Writes `chunk` to `temp_file`. Returns `temp_file`, or None if the write failed, in
+        which case the file is discarded.
+        """
+        try:
+            temp_file.write(chunk)
+            return temp_file
+        except (IOError, OSError):
+            log.exception(u"Unable to add asset to the disk cache: %s", content.location)
+            self._discard(temp_file)
+            return None
+
+    @staticmethod
+    def _discard(temp_file):
+        """
+        Closes and deletes a temporary file which won't be added to the cache.
+        """
+        try:
+            temp_file.close()
+        except (IOError, OSError):
+            pass
+        try:
+            os.remove(temp_file.name)
+        except OSError:
+            pass
+
+    def _add(self, content, temp_file, path):
+        """
+        Moves the complete copy of `content` in `temp_file` into place at `path`, evicting
+        files if the cache goes over max_size.
+        """
+        try:
+            temp_file.close()
+            os.rename(temp_file.name, path)
+        except (IOError, OSError):
+            log.exception(u"Unable to add asset to the disk cache: %s", content.location)
+            self._discard(temp_file)
+            return
+
+        with self._size_lock:
+            if self._size is not None:
+                self._size += content.length
+            if self._size is None or self._size > self.max_size:
+                self._size = self._evict()
+
+    def _evict(self):
+        """
+        If the cache is over max_size, delete the least recently used files until it is under
+        EVICTION_LOW_WATER_MARK of max_size. Returns the total size of the files left.
+        """
+        cached_files = []
+        total_size = 0
+        for directory, __, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.startswith(TEMP_FILE_PREFIX):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                cached_files.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return total_size
+
+        cached_files.sort()
+        target_size = self.max_size * EVICTION_LOW_WATER_MARK
+        for __, size, path in cached_files:
+            if total_size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # already evicted by another process
+                pass
+            total_size -= size
+        return total_size
+
+
+def get_asset_disk_cache():
+    """
+    Returns the AssetDiskCache configured by STATIC_CONTENT_DISK_CACHE_ROOT, or None
+    if there isn't one.
+    """
+    root = getattr(settings, 'STATIC_CONTENT_DISK_CACHE_ROOT', None)
+    if not root:
+        return None
+    max_size = settings.STATIC_CONTENT_DISK_CACHE_MAX_SIZE
+    with _disk_caches_lock:
+        if (root, max_size) not in _disk_caches:
+            _disk_caches[root, max_size] = AssetDiskCache(root, max_size)
+        return _disk_caches[root, max_size]
@@ -2,6 +2,7 @@
 Middleware to serve assets.
 """
 
+import hashlib
 import logging
 
 from django.http import (
@@ -10,13 +11,15 @@ from django.http import (
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
 from xmodule.exceptions import NotFoundError
 
+from contentserver.caching import get_asset_disk_cache
+
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
@@ -78,13 +81,33 @@ class StaticContentServer(object):
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
 
+            etag = get_etag(content)
+
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # etags or timestamps, if they are the same then just return a 304 (Not Modified)
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag in [tag.strip() for tag in request.META['HTTP_IF_NONE_MATCH'].split(',')]:
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
+            # content too large for memcached is streamed from a local disk cache, if there is one,
+            # rather than out of the DB
+            disk_cache = get_asset_disk_cache()
+            add_to_disk_cache = False
+            if disk_cache is not None and isinstance(content, StaticContentStream) and content.length is not None:
+                cached_content = disk_cache.get(content)
+                if cached_content is not None:
+                    content.close()
+                    content = cached_content
+                else:
+                    # stream it out of the DB this time, and add it to the disk cache on the way
+                    add_to_disk_cache = True
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
@@ -93,10 +116,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -134,18 +153,33 @@ class StaticContentServer(object):
                             return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
             # If Range header is absent or syntactically invalid return a full content response.
+            # Assets missing from the disk cache are only added by full responses, while ranges
+            # of them are streamed straight out of the DB.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if add_to_disk_cache:
+                    response = HttpResponse(disk_cache.stream_and_add(content))
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
             response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
+            response['ETag'] = etag
 
             return response
 
 
+def get_etag(content):
+    """
+    Returns the ETag for the given content, which changes whenever a new version of it is uploaded.
+    """
+    return '"{}"'.format(hashlib.md5(u'{}|{}'.format(
+        content.location, content.last_modified_at.isoformat()
+    ).encode('utf-8')).hexdigest())
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
@@ -4,19 +4,27 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
+import tempfile
 import unittest
+from datetime import datetime
+from StringIO import StringIO
 from uuid import uuid4
+from mock import Mock, patch
 
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
 
+from xmodule.contentstore.content import StaticContentStream
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.xml_importer import import_from_xml
 
+from contentserver.caching import AssetDiskCache, get_asset_disk_cache
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -109,6 +117,49 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_locked)
         self.assertEqual(resp.status_code, 200)
 
+    def test_etag(self):
+        """
+        Test that assets are served with an ETag, and that a matching If-None-Match
+        outputs 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp['ETag']
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other", {}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    @patch('contentserver.middleware.set_cached_content', Mock())
+    @patch('contentserver.middleware.get_cached_content', Mock(return_value=None))
+    @patch.object(StaticContentStream, 'copy_to_in_mem', lambda content: content)
+    def test_disk_cache(self):
+        """
+        Test that assets too large for memcached are streamed from the contentstore until a
+        full response adds them to the disk cache, and then from the disk cache.
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        content = self.contentstore.find(self.unlocked_asset)
+        with override_settings(STATIC_CONTENT_DISK_CACHE_ROOT=root):
+            # ranges of assets which aren't cached yet don't add them to the cache
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1')
+            self.assertEqual(resp.status_code, 206)
+            self.assertIsNone(get_asset_disk_cache().get(content))
+
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(len(resp.content), self.length_unlocked)
+            cached = get_asset_disk_cache().get(content)
+            self.assertEqual(''.join(cached.stream_data()), resp.content)
+
+            resp_range = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1')
+            self.assertEqual(resp_range.status_code, 206)
+            self.assertEqual(resp_range.content, resp.content[:2])
+
     def test_range_request_full_file(self):
         """
         Test that a range request from byte 0 to last,
@@ -192,6 +243,87 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         self.assertEqual(resp.status_code, 416)
 
 
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the on-disk asset cache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+
+    def make_content(self, name, data, last_modified_at=datetime(2014, 1, 1)):
+        """
+        Returns a StaticContentStream of `data` for the asset with `name`.
+        """
+        return StaticContentStream(
+            self.course_key.make_asset_key('asset', name), name, 'text/plain', StringIO(data),
+            last_modified_at=last_modified_at, length=len(data)
+        )
+
+    def add(self, cache, name, data, last_modified_at=datetime(2014, 1, 1)):
+        """
+        Streams `data` for the asset with `name` through `cache`, adding it to the cache.
+        """
+        self.assertEqual(''.join(cache.stream_and_add(self.make_content(name, data, last_modified_at))), data)
+
+    def cached_files(self):
+        """
+        Returns the names of the files in the cache.
+        """
+        return [filename for __, __, filenames in os.walk(self.root) for filename in filenames]
+
+    def test_read_through(self):
+        cache = AssetDiskCache(self.root, 1000)
+        self.assertIsNone(cache.get(self.make_content('a.txt', 'abcdef')))
+        self.add(cache, 'a.txt', 'abcdef')
+
+        # the second time, the data comes from the disk
+        cached = cache.get(self.make_content('a.txt', 'ignored'))
+        self.assertEqual(''.join(cached.stream_data()), 'abcdef')
+        self.assertEqual(''.join(cached.stream_data_in_range(1, 3)), 'bcd')
+
+        # a new version of the asset isn't served stale data
+        self.assertIsNone(cache.get(self.make_content('a.txt', 'new', last_modified_at=datetime(2014, 1, 2))))
+
+    def test_partially_streamed_not_added(self):
+        cache = AssetDiskCache(self.root, 1000)
+        content = self.make_content('a.txt', 'abcdef')
+        stream = cache.stream_and_add(content)
+        next(stream)
+        stream.close()
+        self.assertIsNone(cache.get(content))
+        self.assertEqual(self.cached_files(), [])
+
+    def test_eviction(self):
+        cache = AssetDiskCache(self.root, 10)
+        self.add(cache, 'a.txt', 'aaaa')
+        self.add(cache, 'b.txt', 'bbbb')
+        os.utime(cache._path(self.make_content('a.txt', '')), (0, 0))  # pylint: disable=protected-access
+        self.add(cache, 'c.txt', 'cccc')
+
+        self.assertIsNone(cache.get(self.make_content('a.txt', '')))
+        self.assertIsNotNone(cache.get(self.make_content('b.txt', '')))
+        self.assertIsNotNone(cache.get(self.make_content('c.txt', '')))
+
+    def test_scans_only_when_full(self):
+        cache = AssetDiskCache(self.root, 100)
+        with patch('contentserver.caching.os.walk', wraps=os.walk) as mock_walk:
+            for index in range(10):
+                self.add(cache, '{}.txt'.format(index), '0123456789')
+            self.assertEqual(mock_walk.call_count, 1)
+
+            # going over max_size evicts down to the low water mark
+            self.add(cache, '10.txt', '0123456789')
+            self.assertEqual(mock_walk.call_count, 2)
+            self.assertEqual(len(self.cached_files()), 9)
+
+            # so the next addition doesn't scan the cache again
+            self.add(cache, '11.txt', '0123456789')
+            self.assertEqual(mock_walk.call_count, 2)
+
+
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
     """
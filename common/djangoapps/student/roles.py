@@ -11,25 +11,31 @@ from student.models import CourseAccessRole
 from xmodule_django.models import CourseKeyField
 
 
+def forget_cached_roles(user):
+    """
+    Drop the RoleCache of `user`, and the access decisions made with it (see
+    courseware.access), after their roles have changed.
+    """
+    for attr in ('_roles', '_access_decisions'):
+        if hasattr(user, attr):
+            delattr(user, attr)
+
+
 class RoleCache(object):
     """
-    A cache of the CourseAccessRoles held by a particular user
+    A cache of the CourseAccessRoles held by a particular user, loaded in one query
     """
     def __init__(self, user):
         self._roles = set(
-            CourseAccessRole.objects.filter(user=user).all()
+            (access_role.role, access_role.course_id, access_role.org)
+            for access_role in CourseAccessRole.objects.filter(user=user)
         )
 
     def has_role(self, role, course_id, org):
         """
         Return whether this RoleCache contains a role with the specified role, course_id, and org
         """
-        return any(
-            access_role.role == role and
-            access_role.course_id == course_id and
-            access_role.org == org
-            for access_role in self._roles
-        )
+        return (role, course_id, org) in self._roles
 
 
 class AccessRole(object):
@@ -79,12 +85,14 @@ class GlobalStaff(AccessRole):
             if (user.is_authenticated() and user.is_active):
                 user.is_staff = True
                 user.save()
+                forget_cached_roles(user)
 
     def remove_users(self, *users):
         for user in users:
             # don't check is_authenticated nor is_active on purpose
             user.is_staff = False
             user.save()
+            forget_cached_roles(user)
 
     def users_with_role(self):
         raise Exception("This operation is un-indexed, and shouldn't be used")
@@ -133,8 +141,7 @@ class RoleBase(AccessRole):
             if user.is_authenticated and user.is_active and not self.has_user(user):
                 entry = CourseAccessRole(user=user, role=self._role_name, course_id=self.course_key, org=self.org)
                 entry.save()
-                if hasattr(user, '_roles'):
-                    del user._roles
+                forget_cached_roles(user)
 
     def remove_users(self, *users):
         """
@@ -145,8 +152,7 @@ class RoleBase(AccessRole):
         )
         entries.delete()
         for user in users:
-            if hasattr(user, '_roles'):
-                del user._roles
+            forget_cached_roles(user)
 
     def users_with_role(self):
         """
@@ -274,8 +280,7 @@ class UserBasedRole(object):
             for course_key in course_keys:
                 entry = CourseAccessRole(user=self.user, role=self.role, course_id=course_key, org=course_key.org)
                 entry.save()
-            if hasattr(self.user, '_roles'):
-                del self.user._roles
+            forget_cached_roles(self.user)
         else:
             raise ValueError("user is not active. Cannot grant access to courses")
 
@@ -285,8 +290,7 @@ class UserBasedRole(object):
         """
         entries = CourseAccessRole.objects.filter(user=self.user, role=self.role, course_id__in=course_keys)
         entries.delete()
-        if hasattr(self.user, '_roles'):
-            del self.user._roles
+        forget_cached_roles(self.user)
 
     def courses_with_role(self):
         """
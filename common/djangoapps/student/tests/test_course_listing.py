@@ -2,6 +2,7 @@
 Unit tests for getting the list of courses for a user through iterating all courses and
 by reversing group name formats.
 """
+import pymongo
 from mock import patch, Mock
 
 from student.tests.factories import UserFactory
@@ -74,6 +75,28 @@ class TestCourseListing(ModuleStoreTestCase):
         courses_list = list(get_course_enrollment_pairs(self.student, None, []))
         self.assertEqual(len(courses_list), 0)
 
+    def _count_course_listing_finds(self):
+        """
+        Return the number of courses listed for the student, and the number of mongo finds it took
+        """
+        with patch('pymongo.message.query', wraps=pymongo.message.query) as mock_query:
+            courses_list = list(get_course_enrollment_pairs(self.student, None, []))
+        return len(courses_list), mock_query.call_count
+
+    def test_course_listing_finds_do_not_grow(self):
+        """
+        Test that listing more courses doesn't take more mongo finds
+        """
+        self._create_course_with_access_groups(SlashSeparatedCourseKey('Org1', 'Course1', 'Run1'))
+        num_courses, one_course_finds = self._count_course_listing_finds()
+        self.assertEqual(num_courses, 1)
+
+        for run in ('Run2', 'Run3', 'Run4'):
+            self._create_course_with_access_groups(SlashSeparatedCourseKey('Org1', 'Course1', run))
+        num_courses, many_course_finds = self._count_course_listing_finds()
+        self.assertEqual(num_courses, 4)
+        self.assertEqual(many_course_finds, one_course_finds)
+
     def test_errored_course_regular_access(self):
         """
         Test the course list for regular staff when get_course returns an ErrorDescriptor
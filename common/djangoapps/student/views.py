@@ -58,7 +58,7 @@ from student.models import (
 from student.forms import PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification, MidcourseReverificationWindow
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import CertificateStatuses, certificate_status_for_student, certificate_statuses_for_student
 from dark_lang.models import DarkLangConfig
 
 from xmodule.modulestore.django import modulestore
@@ -181,10 +181,12 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course):
+def cert_info(user, course, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
-    student and course.  Returns a dictionary with keys:
+    student and course, from `cert_status` (as returned by
+    certificate_status_for_student) if it has already been looked up.
+    Returns a dictionary with keys:
 
     'status': one of 'generating', 'ready', 'notpassing', 'processing', 'restricted'
     'show_download_url': bool
@@ -197,7 +199,9 @@ def cert_info(user, course):
     if not course.may_certify():
         return {}
 
-    return _cert_info(user, course, certificate_status_for_student(user, course.id))
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course.id)
+    return _cert_info(user, course, cert_status)
 
 
 def reverification_info(course_enrollment_pairs, user, statuses):
@@ -244,10 +248,13 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
         ReverifyInfo: (course_id, course_name, course_number, date, status)
         OR, None: None if there is no re-verification info for this enrollment
     """
-    window = MidcourseReverificationWindow.get_window(course.id, datetime.datetime.now(UTC))
+    # If the user is not verified, we don't get reverification info
+    if enrollment.mode != "verified":
+        return None
 
-    # If there's no window OR the user is not verified, we don't get reverification info
-    if (not window) or (enrollment.mode != "verified"):
+    # Nor if there's no window
+    window = MidcourseReverificationWindow.get_window(course.id, datetime.datetime.now(UTC))
+    if not window:
         return None
     return ReverifyInfo(
         course.id, course.display_name, course.number,
@@ -262,26 +269,26 @@ def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
     Get the relevant set of (Course, CourseEnrollment) pairs to be displayed on
     a student's dashboard.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        store = modulestore()
-        with store.bulk_operations(enrollment.course_id):
-            course = store.get_course(enrollment.course_id)
-            if course and not isinstance(course, ErrorDescriptor):
-
-                # if we are in a Microsite, then filter out anything that is not
-                # attributed (by ORG) to that Microsite
-                if course_org_filter and course_org_filter != course.location.org:
-                    continue
-                # Conversely, if we are not in a Microsite, then let's filter out any enrollments
-                # with courses attributed (by ORG) to Microsites
-                elif course.location.org in org_filter_out_set:
-                    continue
-
-                yield (course, enrollment)
-            else:
-                log.error("User {0} enrolled in {2} course {1}".format(
-                    user.username, enrollment.course_id, "broken" if course else "non-existent"
-                ))
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    courses = modulestore().get_courses_by_keys([enrollment.course_id for enrollment in enrollments])
+    for enrollment in enrollments:
+        course = courses.get(enrollment.course_id)
+        if course and not isinstance(course, ErrorDescriptor):
+
+            # if we are in a Microsite, then filter out anything that is not
+            # attributed (by ORG) to that Microsite
+            if course_org_filter and course_org_filter != course.location.org:
+                continue
+            # Conversely, if we are not in a Microsite, then let's filter out any enrollments
+            # with courses attributed (by ORG) to Microsites
+            elif course.location.org in org_filter_out_set:
+                continue
+
+            yield (course, enrollment)
+        else:
+            log.error("User {0} enrolled in {2} course {1}".format(
+                user.username, enrollment.course_id, "broken" if course else "non-existent"
+            ))
 
 
 def _cert_info(user, course, cert_status):
@@ -577,8 +584,12 @@ def dashboard(request):
     else:
         verify_status_by_course = {}
 
+    # Look up the certificates of all of the courses at once
+    certificate_statuses = certificate_statuses_for_student(
+        user, [course.id for course, _enrollment in course_enrollment_pairs if course.may_certify()]
+    )
     cert_statuses = {
-        course.id: cert_info(request.user, course)
+        course.id: cert_info(request.user, course, certificate_statuses.get(course.id))
         for course, _enrollment in course_enrollment_pairs
     }
 
@@ -602,8 +613,14 @@ def dashboard(request):
     show_refund_option_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
                                        if _enrollment.refundable())
 
+    redeemed_registration_codes = defaultdict(list)
+    for registration_code in CourseRegistrationCode.objects.filter(
+            course_id__in=enrolled_course_ids, registrationcoderedemption__redeemed_by=request.user
+    ).select_related('invoice'):
+        redeemed_registration_codes[registration_code.course_id].append(registration_code)
+
     block_courses = frozenset(course.id for course, enrollment in course_enrollment_pairs
-                              if is_course_blocked(request, CourseRegistrationCode.objects.filter(course_id=course.id, registrationcoderedemption__redeemed_by=request.user), course.id))
+                              if is_course_blocked(request, redeemed_registration_codes[course.id], course.id))
 
     enrolled_courses_either_paid = frozenset(course.id for course, _enrollment in course_enrollment_pairs
                                              if _enrollment.is_paid_course())
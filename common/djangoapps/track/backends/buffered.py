@@ -0,0 +1,173 @@
+"""
+Event tracker backend that hands events off to a background thread, which
+sends them to another backend in batches, so that requests don't wait on
+the tracking store.
+
+Example configuration::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'max_queue_size': 10000,
+              'flush_size': 100,
+              'flush_interval': 1.0,
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+from importlib import import_module
+from Queue import Queue, Empty, Full
+from time import time
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# Put on the queue to tell the worker to send what it has and stop
+_STOP = object()
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend which queues events in process, and sends them to
+    the wrapped backend in batches from a background thread.
+    """
+
+    def __init__(self, backend, max_queue_size=10000, flush_size=100, flush_interval=1.0, block_timeout=0, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: dict with the 'ENGINE' and 'OPTIONS' of the backend to
+            send the events to
+          - `max_queue_size`: the most events to hold before dropping them
+          - `flush_size`: the most events to send in one batch
+          - `flush_interval`: the most seconds to hold an event before sending
+            it, when there aren't enough events for a full batch
+          - `block_timeout`: seconds to block a request while the queue is
+            full before dropping its event (0 drops events immediately)
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        module_name, __, class_name = backend['ENGINE'].rpartition('.')
+        self.backend = getattr(import_module(module_name), class_name)(**backend.get('OPTIONS', {}))
+
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.queue = Queue(maxsize=max_queue_size)
+
+        self._worker = None
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def send(self, event):
+        """Queue the event to be sent by the background thread."""
+        self._ensure_worker()
+        try:
+            if self.block_timeout:
+                self.queue.put(event, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(event)
+        except Full:
+            dog_stats_api.increment('track.buffered.dropped')
+            log.warning('Tracking event queue is full, dropping event')
+
+    def _ensure_worker(self):
+        """
+        Start the background thread, if it isn't running in this process
+        (threads don't survive forking, e.g. into server worker processes).
+        """
+        if self._worker_pid == os.getpid():
+            return
+
+        with self._worker_lock:
+            if self._worker_pid != os.getpid():
+                self._worker = threading.Thread(target=self._run, name='track-buffered-backend')
+                self._worker.daemon = True
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _run(self):
+        """Send batches of events until told to stop."""
+        stopping = False
+        while not stopping:
+            batch = []
+            event = self.queue.get()
+            deadline = time() + self.flush_interval
+            while True:
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+                remaining = deadline - time()
+                if len(batch) >= self.flush_size or remaining <= 0:
+                    break
+                try:
+                    event = self.queue.get(timeout=remaining)
+                except Empty:
+                    break
+
+            if batch:
+                self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        """Send a batch of events to the wrapped backend."""
+        dog_stats_api.histogram('track.buffered.batch_size', len(batch))
+        try:
+            if hasattr(self.backend, 'send_many'):
+                self.backend.send_many(batch)
+            else:
+                for event in batch:
+                    self.backend.send(event)
+        except Exception:  # pylint: disable=broad-except
+            dog_stats_api.increment('track.buffered.failed', len(batch))
+            log.exception('Error sending a batch of %d tracking events', len(batch))
+
+    def flush(self):
+        """Send all of the queued events from the calling thread."""
+        batch = []
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except Empty:
+                break
+            if event is not _STOP:
+                batch.append(event)
+            if len(batch) >= self.flush_size:
+                self._send_batch(batch)
+                batch = []
+        if batch:
+            self._send_batch(batch)
+
+    def close(self, timeout=5):
+        """
+        Stop the background thread once it has sent the queued events, and
+        send whatever it couldn't in time.
+        """
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except Full:
+                pass
+            else:
+                self._worker.join(timeout)
+        self._worker_pid = None
+        self.flush()
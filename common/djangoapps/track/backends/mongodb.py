@@ -95,3 +95,13 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_many(self, events):
+        """Insert a batch of events in to the Mongo collection"""
+        try:
+            # Keep inserting the rest of the batch if one of the events
+            # can't be inserted, rather than losing all of them.
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except PyMongoError:
+            msg = 'Error inserting to MongoDB event tracker backend'
+            log.exception(msg)
@@ -0,0 +1,50 @@
+from __future__ import absolute_import
+
+from mock import patch
+
+from django.test import TestCase
+
+from track.backends.buffered import BufferedBackend
+
+
+class TestBufferedBackend(TestCase):
+    def setUp(self):
+        self.backend = BufferedBackend(
+            backend={'ENGINE': 'mock.MagicMock'},
+            max_queue_size=3,
+            flush_size=2,
+        )
+        self.addCleanup(self.backend.close)
+
+    def sent_batches(self):
+        """The batches of events sent to the wrapped backend"""
+        return [args[0] for __, args, __ in self.backend.backend.send_many.mock_calls]
+
+    def test_events_sent_in_batches(self):
+        events = [{'test': 1}, {'test': 2}, {'test': 3}]
+
+        with patch.object(self.backend, '_ensure_worker'):
+            for event in events:
+                self.backend.send(event)
+        self.backend.flush()
+
+        self.assertEqual([events[:2], events[2:]], self.sent_batches())
+
+    def test_background_thread(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        for event in events:
+            self.backend.send(event)
+        self.backend.close()
+
+        self.assertEqual(events, sum(self.sent_batches(), []))
+
+    @patch('track.backends.buffered.dog_stats_api')
+    def test_full_queue_drops_events(self, mock_dog_stats_api):
+        with patch.object(self.backend, '_ensure_worker'):
+            for i in range(4):
+                self.backend.send({'test': i})
+        mock_dog_stats_api.increment.assert_called_once_with('track.buffered.dropped')
+
+        self.backend.flush()
+        self.assertEqual([{'test': 0}, {'test': 1}, {'test': 2}], sum(self.sent_batches(), []))
@@ -38,3 +38,11 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_mongo_backend_send_many(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_many(events)
+
+        # Check that the events were inserted together
+        self.backend.collection.insert.assert_called_once_with(events, manipulate=False, continue_on_error=True)
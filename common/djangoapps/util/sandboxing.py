@@ -1,9 +1,19 @@
+import hashlib
 import re
 from django.conf import settings
+from django.core.cache import cache
+
+from calc.lru import LRUCache
+from capa.safe_exec import HashedFile, SafeExecCache
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
+# The digests of the python_lib.zip files, keyed by the asset location and
+# last-modified time, so each version of a file is hashed only once.
+PYTHON_LIB_DIGEST_CACHE_SIZE = 1000
+_python_lib_digests = LRUCache(PYTHON_LIB_DIGEST_CACHE_SIZE)
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -31,10 +41,38 @@ def can_execute_unsafe_code(course_id):
 
 
 def get_python_lib_zip(contentstore, course_id):
-    """Return the bytes of the python_lib.zip file, if any."""
+    """
+    Return the bytes of the python_lib.zip file, if any, as a `HashedFile`
+    so that safe_exec needn't hash them for every cache key.
+    """
     asset_key = course_id.make_asset_key("asset", PYTHON_LIB_ZIP)
     zip_lib = contentstore().find(asset_key, throw_on_not_found=False)
-    if zip_lib is not None:
-        return zip_lib.data
-    else:
+    if zip_lib is None:
         return None
+
+    version = (zip_lib.location, zip_lib.last_modified_at)
+    digest = _python_lib_digests.get(version)
+    if digest is None:
+        digest = hashlib.md5(zip_lib.data).hexdigest()
+        # Without a last-modified time, a new version can't be told apart.
+        if zip_lib.last_modified_at is not None:
+            _python_lib_digests.set(version, digest)
+    return HashedFile(zip_lib.data, digest)
+
+
+_safe_exec_cache = None
+
+
+def get_safe_exec_cache():
+    """
+    Return the process-wide SafeExecCache, which keeps results in memory in
+    front of the default django cache.
+    """
+    global _safe_exec_cache  # pylint: disable=global-statement
+    if _safe_exec_cache is None:
+        _safe_exec_cache = SafeExecCache(
+            cache,
+            max_local_entries=settings.SAFE_EXEC_CACHE_MAX_LOCAL_ENTRIES,
+            max_result_size=settings.SAFE_EXEC_CACHE_MAX_RESULT_SIZE,
+        )
+    return _safe_exec_cache
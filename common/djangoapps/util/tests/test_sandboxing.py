@@ -2,8 +2,12 @@
 Tests for sandboxing.py in util app
 """
 
+import datetime
+
 from django.test import TestCase
-from util.sandboxing import can_execute_unsafe_code
+from mock import Mock, patch
+from util import sandboxing
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
 from django.test.utils import override_settings
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -33,3 +37,42 @@ class SandboxingTest(TestCase):
         """
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2013_Spring')))
+
+
+class PythonLibZipTest(TestCase):
+    """
+    Test fetching a course's python_lib.zip
+    """
+    def setUp(self):
+        super(PythonLibZipTest, self).setUp()
+        self.course_key = SlashSeparatedCourseKey('edX', 'full', '2012_Fall')
+        self.zip_lib = Mock(
+            location=self.course_key.make_asset_key("asset", sandboxing.PYTHON_LIB_ZIP),
+            data="zip bytes",
+            last_modified_at=datetime.datetime(2014, 1, 1),
+        )
+        contentstore = Mock()
+        contentstore.find.return_value = self.zip_lib
+        self.contentstore = lambda: contentstore
+        patcher = patch.object(sandboxing, '_python_lib_digests', sandboxing.LRUCache(10))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_python_lib(self):
+        self.contentstore().find.return_value = None
+        self.assertIsNone(get_python_lib_zip(self.contentstore, self.course_key))
+
+    def test_hashed_once_per_version(self):
+        with patch('util.sandboxing.hashlib') as mock_hashlib:
+            mock_hashlib.md5.return_value.hexdigest.return_value = "digest"
+            zip_lib = get_python_lib_zip(self.contentstore, self.course_key)
+            self.assertEqual(zip_lib, "zip bytes")
+            self.assertEqual(zip_lib.digest, "digest")
+
+            get_python_lib_zip(self.contentstore, self.course_key)
+            self.assertEqual(mock_hashlib.md5.call_count, 1)
+
+            # A new upload of the file is hashed again.
+            self.zip_lib.last_modified_at = datetime.datetime(2014, 1, 2)
+            get_python_lib_zip(self.contentstore, self.course_key)
+            self.assertEqual(mock_hashlib.md5.call_count, 2)
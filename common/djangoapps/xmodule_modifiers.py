@@ -173,6 +173,9 @@ def grade_histogram(module_id):
     from django.db import connection
     cursor = connection.cursor()
 
+    if settings.FEATURES.get('ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS'):
+        return _precomputed_grade_histogram(cursor, module_id)
+
     q = """SELECT courseware_studentmodule.grade,
                   COUNT(courseware_studentmodule.student_id)
     FROM courseware_studentmodule
@@ -188,6 +191,28 @@ def grade_histogram(module_id):
     return grades
 
 
+def _precomputed_grade_histogram(cursor, module_id):
+    """
+    `grade_histogram`, from the counts in courseware_gradedistribution rather
+    than by counting all of the module's StudentModules.
+    """
+    q = """SELECT courseware_gradedistribution.grade,
+                  SUM(courseware_gradedistribution.count)
+    FROM courseware_gradedistribution
+    WHERE courseware_gradedistribution.module_id=%s
+    AND courseware_gradedistribution.count > 0
+    GROUP BY courseware_gradedistribution.grade
+    ORDER BY courseware_gradedistribution.grade"""
+    cursor.execute(q, [module_id.to_deprecated_string()])
+
+    grades = list(cursor.fetchall())
+    # Ungraded StudentModules are counted under a null grade. Any of them
+    # means there's no histogram, as above.
+    if any(grade is None for grade, __ in grades):
+        return []
+    return grades
+
+
 def add_staff_markup(user, has_instructor_access, block, view, frag, context):  # pylint: disable=unused-argument
     """
     Updates the supplied module with a new get_html function that wraps
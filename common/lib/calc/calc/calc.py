@@ -7,9 +7,11 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+
 import numpy
 import scipy.constants
 import functions
+from lru import LRUCache
 
 from pyparsing import (
     Word, Literal, CaselessLiteral, ZeroOrMore, MatchFirst, Optional, Forward,
@@ -61,6 +63,19 @@ DEFAULT_VARIABLES = {
     'q': scipy.constants.e  # Fund. Charge: 1.602176565e-19 (Coulombs)
 }
 
+# Functions which can be applied to a whole array of samples at once, besides
+# numpy's ufuncs. (`arccot` branches on its input and `factorial` only takes
+# integers, so they aren't here.)
+VECTORIZED_FUNCTIONS = frozenset([
+    functions.sec, functions.csc, functions.cot,
+    functions.arcsec, functions.arccsc,
+    functions.sech, functions.csch, functions.coth,
+    functions.arcsech, functions.arccsch, functions.arccoth,
+])
+
+# How many parsed expressions to keep around for reuse.
+COMPILED_EXPRESSION_CACHE_SIZE = 1024
+
 # We eliminated the following extreme suffixes:
 #   P (1e15), E (1e18), Z (1e21), Y (1e24),
 #   f (1e-15), a (1e-18), z (1e-21), y (1e-24)
@@ -80,6 +95,9 @@ class UndefinedVariable(Exception):
     pass
 
 
+_compiled_expression_cache = LRUCache(COMPILED_EXPRESSION_CACHE_SIZE)
+
+
 def lower_dict(input_dict):
     """
     Convert all keys in a dictionary to lowercase; keep their original values.
@@ -200,6 +218,78 @@ def eval_product(parse_result):
     return prod
 
 
+# The following are versions of the evaluation actions above which work when
+# some of the numbers are numpy arrays of samples. In the parse results, the
+# operators and parentheses are strings and everything else is a value.
+
+def _is_operator(token):
+    """
+    Return whether the token from a parse result is an operator (or paren).
+    """
+    return isinstance(token, basestring)
+
+
+def eval_atom_vector(parse_result):
+    """
+    Like `eval_atom`, for numbers or arrays.
+    """
+    return next(k for k in parse_result if not _is_operator(k))
+
+
+def eval_power_vector(parse_result):
+    """
+    Like `eval_power`, for numbers or arrays.
+    """
+    parse_result = reversed([k for k in parse_result if not _is_operator(k)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_vector(parse_result):
+    """
+    Like `eval_parallel`, for numbers or arrays.
+
+    Samples with a zero among their inputs come out as NaN.
+    """
+    values = [k for k in parse_result if not _is_operator(k)]
+    if len(values) == 1:
+        return values[0]
+    has_zero = reduce(numpy.logical_or, [numpy.equal(k, 0) for k in values])
+    result = 1. / sum(1. / k for k in values)
+    return numpy.where(has_zero, float('nan'), result)
+
+
+def eval_sum_vector(parse_result):
+    """
+    Like `eval_sum`, for numbers or arrays.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if not _is_operator(token):
+            total = current_op(total, token)
+        elif token == '+':
+            current_op = operator.add
+        else:
+            current_op = operator.sub
+    return total
+
+
+def eval_product_vector(parse_result):
+    """
+    Like `eval_product`, for numbers or arrays.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if not _is_operator(token):
+            prod = current_op(prod, token)
+        elif token == '*':
+            current_op = operator.mul
+        else:
+            current_op = operator.truediv
+    return prod
+
+
 def add_defaults(variables, functions, case_sensitive):
     """
     Create dictionaries with both the default and user-defined variables.
@@ -216,22 +306,44 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
-def evaluator(variables, functions, math_expr, case_sensitive=False):
+def compile_expression(math_expr, case_sensitive=False):
     """
-    Evaluate an expression; that is, take a string of math and return a float.
+    Return a `ParseAugmenter` holding the parse of `math_expr`.
 
-    -Variables are passed as a dictionary from string to value. They must be
-     python numbers.
-    -Unary functions are passed as a dictionary from string to function.
+    Parsing is most of the cost of evaluating an expression, and the same
+    expressions get evaluated over and over again (once per sample, per
+    answer, per submission), so recently parsed expressions are kept in an LRU
+    cache. The returned object is shared; don't modify it.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    key = (math_expr, case_sensitive)
+    math_interpreter = _compiled_expression_cache.get(key)
+    if math_interpreter is not None:
+        return math_interpreter
 
-    # Parse the tree.
+    # An expression which fails to parse raises here, and doesn't get cached.
     math_interpreter = ParseAugmenter(math_expr, case_sensitive)
     math_interpreter.parse_algebra()
 
+    _compiled_expression_cache.set(key, math_interpreter)
+    return math_interpreter
+
+
+def _casifier(case_sensitive):
+    """
+    Return the function used to normalize the case of names.
+    """
+    if case_sensitive:
+        return lambda x: x
+    else:
+        return lambda x: x.lower()  # Lowercase for case insens.
+
+
+def _evaluate(math_interpreter, variables, functions):
+    """
+    Evaluate the parsed expression for one set of variables.
+    """
+    case_sensitive = math_interpreter.case_sensitive
+
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
@@ -239,10 +351,7 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     math_interpreter.check_variables(all_variables, all_functions)
 
     # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+    casify = _casifier(case_sensitive)
 
     evaluate_actions = {
         'number': eval_number,
@@ -258,6 +367,108 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+def evaluator(variables, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression; that is, take a string of math and return a float.
+
+    -Variables are passed as a dictionary from string to value. They must be
+     python numbers.
+    -Unary functions are passed as a dictionary from string to function.
+    """
+    # No need to go further.
+    if math_expr.strip() == "":
+        return float('nan')
+
+    return _evaluate(compile_expression(math_expr, case_sensitive), variables, functions)
+
+
+def _evaluate_vectorized(math_interpreter, variables_list, functions):
+    """
+    Evaluate the parsed expression for all of the sets of variables at once,
+    by substituting numpy arrays of the samples for the variables.
+
+    Return None if the expression can't be evaluated this way, or if any of
+    the samples doesn't come out as a finite number (the scalar evaluation
+    raises errors for e.g. division by zero, where numpy would give inf).
+    """
+    case_sensitive = math_interpreter.case_sensitive
+    casify = _casifier(case_sensitive)
+    all_variables, all_functions = add_defaults({}, functions, case_sensitive)
+
+    for name in math_interpreter.functions_used:
+        func = all_functions.get(casify(name))
+        if not (isinstance(func, numpy.ufunc) or func in VECTORIZED_FUNCTIONS):
+            return None
+
+    if not case_sensitive:
+        variables_list = [lower_dict(variables) for variables in variables_list]
+    for name in math_interpreter.variables_used:
+        name = casify(name)
+        if not any(name in variables for variables in variables_list):
+            if name in all_variables:
+                # A default, e.g. pi
+                continue
+            return None
+        try:
+            samples = [variables[name] for variables in variables_list]
+        except KeyError:
+            return None
+        # Leave ints (where e.g. ** differs) and odd values to the scalar path.
+        if not all(isinstance(value, (float, complex)) for value in samples):
+            return None
+        all_variables[name] = numpy.array(samples)
+
+    evaluate_actions = {
+        'number': eval_number,
+        'variable': lambda x: all_variables[casify(x[0])],
+        'function': lambda x: all_functions[casify(x[0])](x[1]),
+        'atom': eval_atom_vector,
+        'power': eval_power_vector,
+        'parallel': eval_parallel_vector,
+        'product': eval_product_vector,
+        'sum': eval_sum_vector
+    }
+
+    old_settings = numpy.seterr(all='ignore')
+    try:
+        results = numpy.asarray(math_interpreter.reduce_tree(evaluate_actions))
+    except Exception:  # pylint: disable=broad-except
+        return None
+    finally:
+        numpy.seterr(**old_settings)
+
+    if not numpy.all(numpy.isfinite(results)):
+        return None
+    if results.ndim == 0:
+        # The expression doesn't depend on any of the samples.
+        return [results.tolist()] * len(variables_list)
+    if results.shape != (len(variables_list),):
+        return None
+    return results.tolist()
+
+
+def evaluate_many(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each of a list of dictionaries of variables,
+    and return the list of results.
+
+    Equivalent to calling `evaluator` once for each of `variables_list`, but
+    the expression is only parsed once and, when the functions it uses allow,
+    is evaluated over all of the samples at once with numpy.
+    """
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    math_interpreter = compile_expression(math_expr, case_sensitive)
+
+    if len(variables_list) > 1:
+        results = _evaluate_vectorized(math_interpreter, variables_list, functions)
+        if results is not None:
+            return results
+
+    return [_evaluate(math_interpreter, variables, functions) for variables in variables_list]
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
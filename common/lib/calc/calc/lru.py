@@ -0,0 +1,72 @@
+"""
+A small thread-safe LRU cache.
+
+It lives here because calc is the lowest of the local libraries: capa and
+xmodule, whose caches use it too, both depend on calc.
+"""
+
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    """
+    An in-memory mapping which keeps only its `max_size` most recently used
+    entries. Safe to share between threads.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the value for `key`, marking it as recently used, or `default`
+        if it isn't cached.
+        """
+        with self._lock:
+            value = self._entries.pop(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._entries[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, evicting the least recently used entries if
+        the cache is full.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            self._evict()
+
+    def setdefault(self, key, default):
+        """
+        Return the value for `key`, marking it as recently used, first caching
+        `default` for it if it isn't cached.
+        """
+        with self._lock:
+            value = self._entries.pop(key, default)
+            self._entries[key] = value
+            self._evict()
+            return value
+
+    def clear(self):
+        """
+        Forget all of the entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        """
+        Drop the least recently used entries beyond `max_size`. The lock must be held.
+        """
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -559,3 +559,57 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class EvaluateManyTest(unittest.TestCase):
+    """
+    Test calc.evaluate_many and the cache of compiled expressions.
+    """
+    def setUp(self):
+        super(EvaluateManyTest, self).setUp()
+        self.samples = [{'x': 0.5, 'y': 2.0}, {'x': 1.5, 'y': -3.0}, {'x': 2.5, 'y': 7.25}]
+
+    def assert_same_as_evaluator(self, math_expr, functions=None, case_sensitive=False):
+        """
+        Check that evaluate_many gives what evaluator does for each sample.
+        """
+        functions = functions or {}
+        expected = [
+            calc.evaluator(variables, functions, math_expr, case_sensitive=case_sensitive)
+            for variables in self.samples
+        ]
+        actual = calc.evaluate_many(self.samples, functions, math_expr, case_sensitive=case_sensitive)
+        self.assertEqual(len(expected), len(actual))
+        for expected_value, actual_value in zip(expected, actual):
+            self.assertAlmostEqual(expected_value, actual_value)
+
+    def test_matches_evaluator(self):
+        self.assertEqual(calc.evaluate_many(self.samples, {}, '2*x'), [1.0, 3.0, 5.0])
+        self.assert_same_as_evaluator('x^2 + y/3 - 4')
+        self.assert_same_as_evaluator('sin(x) * cos(y) + sec(x)')
+        self.assert_same_as_evaluator('x || y || 3')
+        self.assert_same_as_evaluator('X + Y', case_sensitive=False)
+        self.assert_same_as_evaluator('pi * x + 5k')
+        self.assert_same_as_evaluator('7')
+
+    def test_unvectorizable(self):
+        # factorial and custom functions can't take arrays of samples
+        self.assert_same_as_evaluator('fact(3) * x')
+        self.assert_same_as_evaluator('f(x) + y', functions={'f': lambda x: 2 * x if x > 1 else x})
+
+    def test_errors_match_evaluator(self):
+        # Division by zero or powers of negatives raise, like they do for a single sample
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_many(self.samples + [{'x': 0.0, 'y': 1.0}], {}, 'y/x')
+        with self.assertRaises(ValueError):
+            calc.evaluate_many(self.samples, {}, 'y^0.5')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_many(self.samples, {}, 'x+z')
+        self.assertTrue(numpy.isnan(calc.evaluate_many(self.samples + [{'x': 0.0, 'y': 1.0}], {}, 'x||y')[-1]))
+
+    def test_compiled_expression_cache(self):
+        compiled = calc.compile_expression('x + y')
+        self.assertIs(compiled, calc.compile_expression('x + y'))
+        self.assertIsNot(compiled, calc.compile_expression('x + y', case_sensitive=True))
+        with self.assertRaises(ParseException):
+            calc.compile_expression('x +')
@@ -0,0 +1,44 @@
+"""
+Unit tests for lru.py
+"""
+
+import unittest
+
+from calc.lru import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+    """
+    Test the LRU cache.
+    """
+    def test_get_and_set(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 0), 0)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('a', 2)
+        self.assertEqual(cache.get('a'), 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_least_recently_used_evicted(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # reading 'a' makes 'b' the least recently used
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_setdefault(self):
+        cache = LRUCache(1)
+        value = cache.setdefault('a', [])
+        self.assertIs(cache.setdefault('a', []), value)
+        cache.setdefault('b', [])
+        self.assertIsNone(cache.get('a'))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
@@ -15,6 +15,7 @@ This is used by capa_module.
 
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
@@ -23,6 +24,7 @@ from lxml import etree
 from pytz import UTC
 from xml.sax.saxutils import unescape
 
+from calc.lru import LRUCache
 from capa.correctmap import CorrectMap
 import capa.inputtypes as inputtypes
 import capa.customrender as customrender
@@ -58,6 +60,36 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# The most problems to keep parsed XML trees for (see parse_problem_text)
+PARSED_PROBLEM_CACHE_SIZE = 256
+
+# sha1 of problem text -> (converted problem text, pristine parsed tree)
+_parsed_problem_cache = LRUCache(PARSED_PROBLEM_CACHE_SIZE)
+
+
+def parse_problem_text(problem_text):
+    """
+    Converts startouttext/endouttext in `problem_text` to <text></text>, and parses it.
+
+    Returns the converted text and its element tree. Parsing doesn't depend on the seed or
+    the student, so the parsed trees of recently used problems are cached, and callers get
+    a copy of the cached tree, which they are free to modify.
+    """
+    if isinstance(problem_text, unicode):
+        key = hashlib.sha1(problem_text.encode('utf-8')).hexdigest()
+    else:
+        key = hashlib.sha1(problem_text).hexdigest()
+
+    cached = _parsed_problem_cache.get(key)
+    if cached is None:
+        converted_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        converted_text = re.sub(r"endouttext\s*/", "/text", converted_text)
+        cached = (converted_text, etree.XML(converted_text))
+        _parsed_problem_cache.set(key, cached)
+
+    converted_text, tree = cached
+    return converted_text, deepcopy(tree)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -154,13 +186,9 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
+        # Convert startouttext and endouttext to proper <text></text>, and
         # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        self.problem_text, self.tree = parse_problem_text(problem_text)
 
         # handle any <include file="foo"> tags
         self._process_includes()
@@ -654,6 +682,12 @@ class LoncapaProblem(object):
                 extra_files.append(("python_lib.zip", zip_lib))
                 python_path.append("python_lib.zip")
 
+            # Most scripts don't use the student's id. Leave it out of their
+            # globals, so that their results can be cached for every student.
+            student_specific = 'anonymous_student_id' in all_code
+            if not student_specific:
+                del context['anonymous_student_id']
+
             try:
                 safe_exec(
                     all_code,
@@ -670,6 +704,9 @@ class LoncapaProblem(object):
                 msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
                 raise responsetypes.LoncapaProblemError(msg)
 
+            if not student_specific:
+                context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
         context['python_path'] = python_path
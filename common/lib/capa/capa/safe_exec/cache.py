@@ -0,0 +1,83 @@
+"""
+A cache of safe_exec results, for use as the `cache` argument to `safe_exec`.
+"""
+
+import json
+
+from calc.lru import LRUCache
+from dogapi import dog_stats_api
+
+
+class SafeExecCache(object):
+    """
+    A two-level cache of safe_exec results: a per-process LRU, in front of an
+    optional shared django-style cache (e.g. memcached).
+
+    Results are (exception message, globals dict) pairs of JSON-safe values.
+    They're stored serialized, so that results larger than `max_result_size`
+    bytes can be left out of the cache, and so each lookup returns a fresh copy
+    that the caller is free to modify.
+
+    Hits, misses and results too large to cache are counted in the
+    `capa.safe_exec.cache` metric.
+    """
+    DEFAULT_MAX_LOCAL_ENTRIES = 1000
+    DEFAULT_MAX_RESULT_SIZE = 512 * 1024
+
+    def __init__(
+        self,
+        shared_cache=None,
+        max_local_entries=DEFAULT_MAX_LOCAL_ENTRIES,
+        max_result_size=DEFAULT_MAX_RESULT_SIZE,
+    ):
+        self.shared_cache = shared_cache
+        self.max_result_size = max_result_size
+        self._local = LRUCache(max_local_entries)
+
+    @staticmethod
+    def _shared_key(key):
+        """
+        The key to store the result for `key` under in the shared cache.
+        """
+        # The results are stored serialized, unlike results cached by
+        # safe_exec directly, so they mustn't share keys.
+        return "safe_exec_cache." + key
+
+    @staticmethod
+    def _record(result):
+        """
+        Report a cache result ('local', 'shared', 'miss' or 'too_large').
+        """
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['result:{}'.format(result)])
+
+    def get(self, key):
+        """
+        Return the cached (exception message, globals dict) for `key`, or None
+        if it isn't cached.
+        """
+        serialized = self._local.get(key)
+        if serialized is not None:
+            self._record('local')
+        else:
+            if self.shared_cache is not None:
+                serialized = self.shared_cache.get(self._shared_key(key))
+            if serialized is None:
+                self._record('miss')
+                return None
+            self._record('shared')
+            self._local.set(key, serialized)
+        emsg, cleaned_results = json.loads(serialized)
+        return emsg, cleaned_results
+
+    def set(self, key, value):
+        """
+        Cache the (exception message, globals dict) `value` for `key`, unless
+        it's too large.
+        """
+        serialized = json.dumps(value)
+        if len(serialized) > self.max_result_size:
+            self._record('too_large')
+            return
+        self._local.set(key, serialized)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(key), serialized)
@@ -4,6 +4,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .worker_pool import WorkerPool
 from dogapi import dog_stats_api
 
 import hashlib
@@ -46,6 +47,50 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The pool of sandbox workers to run code in, if configure_worker_pool has been
+# called.  Otherwise each execution starts a new sandbox.
+WORKER_POOL = None
+
+# The assumed imports that workers import by default.  Each execution is forked
+# from a worker, so the memory of the worker's imports counts against the VMEM
+# limit of every execution, not just the ones that use numpy (see README.rst).
+# scipy and the modules that use it (calc, chemcalc and miller) take much more
+# memory still, and fewer problems use them.
+DEFAULT_PREIMPORTS = ["numpy", "math", "eia", "chem.chemtools", "verifiers.draganddrop"]
+
+
+class HashedFile(str):
+    """
+    The contents of an extra file, along with their md5 hexdigest computed
+    ahead of time, so that large files (e.g. a course's python_lib.zip) needn't
+    be hashed again for every cache key.
+    """
+    def __new__(cls, contents, digest):
+        hashed_file = super(HashedFile, cls).__new__(cls, contents)
+        hashed_file.digest = digest
+        return hashed_file
+
+
+def configure_worker_pool(size=4, max_executions=100, max_memory=None, preimports=None, child_profile=None):
+    """
+    Run sandboxed code in a pool of up to `size` long-lived sandbox processes,
+    which have the modules in `preimports` (by default, DEFAULT_PREIMPORTS)
+    already imported, and run each piece of code in the AppArmor profile
+    `child_profile`.
+
+    Each worker is replaced after `max_executions` executions, or once it, or
+    an execution it ran, has used more than `max_memory` bytes.  See
+    `worker_pool.WorkerPool`.
+    """
+    global WORKER_POOL  # pylint: disable=global-statement
+    WORKER_POOL = WorkerPool(
+        size=size,
+        max_executions=max_executions,
+        max_memory=max_memory,
+        preimports=DEFAULT_PREIMPORTS if preimports is None else preimports,
+        child_profile=child_profile,
+    )
+
 
 def update_hash(hasher, obj):
     """
@@ -95,11 +140,13 @@ def safe_exec(
     also be copied into the sandbox.
 
     `extra_files` is a list of (filename, contents) pairs.  These files are
-    created in the sandbox.
+    created in the sandbox.  The contents may be a `HashedFile`, whose digest
+    is used in the cache key instead of hashing the contents.
 
-    `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
-    to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    `cache` is an object with .get(key) and .set(key, value) methods, such as a
+    `SafeExecCache`.  It will be used to cache the execution, taking into account the
+    code, the values of the globals, the random seed, the python path, and the
+    contents of the extra files.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -113,6 +160,15 @@ def safe_exec(
         md5er = hashlib.md5()
         md5er.update(repr(code))
         update_hash(md5er, safe_globals)
+        # The extra files (e.g. a course's python_lib.zip) can change without
+        # the code changing, so their contents are part of the key.
+        update_hash(md5er, python_path or [])
+        for filename, contents in extra_files or []:
+            md5er.update(repr(filename))
+            if isinstance(contents, HashedFile):
+                md5er.update(contents.digest)
+            else:
+                md5er.update(contents)
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
         cached = cache.get(key)
         if cached is not None:
@@ -130,15 +186,18 @@ def safe_exec(
     # Decide which code executor to use.
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif WORKER_POOL is not None:
+        exec_fn = WORKER_POOL.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        with dog_stats_api.timer('capa.safe_exec.exec_time'):
+            exec_fn(
+                code_prolog + LAZY_IMPORTS + code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = e.message
     else:
@@ -0,0 +1,232 @@
+"""
+A long-lived sandboxed Python process, which runs code for a WorkerPool.
+
+This file isn't imported: its source is run by the sandboxed Python (as the
+sandbox user, under the sandbox's AppArmor profile), with the names of modules
+to import up front as its arguments, optionally preceded by
+`--child-profile=<name>`.  It reads one JSON request per line from stdin, and
+writes one JSON response per line to stdout.
+
+Each request is run in a child process forked from this one, so that the
+imports are already done, but nothing one piece of code does can affect the
+next.  The child gets the resource limits from the request (as codejail sets
+them), a fresh temporary directory holding the request's files, and no way to
+write to the responses.  It is killed if it runs longer than the REALTIME
+limit.
+
+The child runs as the same user as this process, so this process makes itself
+non-dumpable, which keeps the child from ptracing it or opening its files
+through /proc/<pid>/fd.  Only AppArmor can keep the child from signalling it:
+with a child profile, the child changes to that AppArmor profile, which should
+deny sending signals, before running any code (see README.rst).
+
+Requests are dicts with:
+
+  - `code`: the code to run
+  - `globals`: the JSON-safe globals to run it with
+  - `python_path`: directories or zip files (from `files`) to add to sys.path
+  - `files`: a list of (name, base64 contents) of files to create
+  - `limits`: the codejail limits
+
+Responses are dicts with either `globals`, the JSON-safe globals after running
+the code, or `error`, a description of the failure; and `maxrss`, the most
+memory (in bytes) this process or any of the children it has run code in has
+used.
+"""
+
+import base64
+import ctypes
+import ctypes.util
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# The types of globals to send back
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+# From <sys/prctl.h>
+PR_SET_DUMPABLE = 4
+
+CHILD_PROFILE_ARG = "--child-profile="
+
+
+def jsonable(value):
+    """
+    Return whether `value` can be sent back in the JSON response.
+    """
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def set_limits(limits):
+    """
+    Set the resource limits of this process, as codejail does for its sandboxes.
+    """
+    # No subprocesses
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+    cpu = limits.get("CPU")
+    if cpu:
+        # Give the process one more second of CPU time than the limit, so it
+        # gets SIGXCPU before it is killed with SIGKILL.
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+
+    vmem = limits.get("VMEM")
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+
+    fsize = limits.get("FSIZE")
+    if fsize:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+
+
+def make_undumpable():
+    """
+    Make this process (and the children it forks) non-dumpable, so that other
+    processes of the same user can't ptrace it or open its /proc/<pid>/fd files.
+    """
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0) != 0:
+        raise OSError(ctypes.get_errno(), "prctl(PR_SET_DUMPABLE) failed")
+
+
+def change_profile(profile):
+    """
+    Change this process to the AppArmor `profile`, for good.
+    """
+    with open("/proc/self/attr/current", "w") as attr:
+        attr.write("changeprofile {}".format(profile))
+
+
+def run_code(request, tmpdir, child_profile=None):
+    """
+    Run the code of `request` in this (child) process, and return the response.
+    """
+    if child_profile:
+        change_profile(child_profile)
+
+    # Write the files before the limits are set, as codejail does, so that
+    # FSIZE only limits what the code itself writes.
+    os.chdir(tmpdir)
+    for name, contents in request["files"]:
+        with open(name, "wb") as out:
+            out.write(base64.b64decode(contents))
+    sys.path.extend(request["python_path"])
+
+    set_limits(request["limits"])
+
+    # Keep the code from reading requests or writing over responses.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    g_dict = request["globals"]
+    exec request["code"] in g_dict  # pylint: disable=exec-used
+
+    return {
+        "globals": dict(
+            (k, v) for k, v in g_dict.iteritems() if jsonable(v) and k not in BAD_KEYS
+        ),
+    }
+
+
+def handle(request, child_profile=None):
+    """
+    Run `request` in a child process (changed to `child_profile`, if given), and
+    return its response.
+    """
+    tmpdir = tempfile.mkdtemp(prefix="codejail-")
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # The child: run the code, write the response, and exit without
+        # running any of the parent's cleanup.
+        os.close(read_fd)
+        child_pid = os.getpid()
+        try:
+            try:
+                response = run_code(request, tmpdir, child_profile)
+            except BaseException:  # pylint: disable=broad-except
+                response = {"error": traceback.format_exc()}
+            if os.getpid() != child_pid:
+                # The code managed to fork; only the child itself answers.
+                return
+            data = json.dumps(response)
+            while data:
+                data = data[os.write(write_fd, data):]
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+    os.close(write_fd)
+    try:
+        realtime = request["limits"].get("REALTIME")
+        deadline = time.time() + realtime if realtime else None
+        chunks = []
+        while True:
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            ready, __, __ = select.select([read_fd], [], [], timeout)
+            if not ready:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                return {"error": "Killed after running for more than {} seconds".format(realtime)}
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        __, status = os.waitpid(pid, 0)
+        if not chunks:
+            return {"error": "Exited with status {}".format(status)}
+        try:
+            return json.loads("".join(chunks))
+        except ValueError:
+            return {"error": "Invalid response from the code"}
+    finally:
+        os.close(read_fd)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def main(preimports, child_profile=None):
+    """
+    Import `preimports`, then answer requests (running their code in
+    `child_profile`, if given) until stdin is closed.
+    """
+    make_undumpable()
+
+    for modname in preimports:
+        try:
+            __import__(modname)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    responses = sys.stdout
+    for line in iter(sys.stdin.readline, ""):
+        response = handle(json.loads(line), child_profile)
+        # The code runs in children, so they're what uses more memory over time.
+        response["maxrss"] = max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        ) * 1024
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
+if __name__ == "__main__":
+    ARGS = sys.argv[1:]
+    if ARGS and ARGS[0].startswith(CHILD_PROFILE_ARG):
+        main(ARGS[1:], ARGS[0][len(CHILD_PROFILE_ARG):])
+    else:
+        main(ARGS)
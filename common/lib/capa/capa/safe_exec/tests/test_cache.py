@@ -0,0 +1,52 @@
+"""Test cache.py"""
+
+import unittest
+
+from capa.safe_exec import SafeExecCache
+from capa.tests import DictCache
+
+
+class TestSafeExecCache(unittest.TestCase):
+    """Test SafeExecCache."""
+
+    def test_miss(self):
+        self.assertIsNone(SafeExecCache().get("safe_exec.1.abc"))
+
+    def test_returns_copies(self):
+        cache = SafeExecCache()
+        cache.set("safe_exec.1.abc", (None, {'a': [1, 2]}))
+        emsg, results = cache.get("safe_exec.1.abc")
+        self.assertIsNone(emsg)
+        self.assertEqual(results, {'a': [1, 2]})
+
+        results['a'].append(3)
+        self.assertEqual(cache.get("safe_exec.1.abc"), (None, {'a': [1, 2]}))
+
+    def test_shared_cache(self):
+        shared_cache = DictCache()
+        SafeExecCache(shared_cache).set("safe_exec.1.abc", ("Oops", {}))
+
+        # Another process only sees the result through the shared cache
+        self.assertEqual(SafeExecCache(shared_cache).get("safe_exec.1.abc"), ("Oops", {}))
+
+    def test_local_lru(self):
+        cache = SafeExecCache(max_local_entries=2)
+        cache.set("a", (None, {}))
+        cache.set("b", (None, {}))
+        # Use "a" so that "b" is the least recently used
+        cache.get("a")
+        cache.set("c", (None, {}))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_max_result_size(self):
+        shared_cache = DictCache()
+        cache = SafeExecCache(shared_cache, max_result_size=100)
+        cache.set("small", (None, {'a': 1}))
+        cache.set("large", (None, {'a': "x" * 100}))
+
+        self.assertIsNotNone(cache.get("small"))
+        self.assertIsNone(cache.get("large"))
+        self.assertEqual(len(shared_cache.cache), 1)
@@ -9,7 +9,8 @@ import unittest
 
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, HashedFile
+from capa.tests import DictCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -90,23 +91,6 @@ class TestSafeOrNot(unittest.TestCase):
         self.assertEqual(g['files'], os.listdir('/'))
 
 
-class DictCache(object):
-    """A cache implementation over a simple dict, for testing."""
-
-    def __init__(self, d):
-        self.cache = d
-
-    def get(self, key):
-        # Actual cache implementations have limits on key length
-        assert len(key) <= 250
-        return self.cache.get(key)
-
-    def set(self, key, value):
-        # Actual cache implementations have limits on key length
-        assert len(key) <= 250
-        self.cache[key] = value
-
-
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
 
@@ -166,6 +150,21 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_cache_extra_files(self):
+        # The same code with different extra files is cached separately.
+        cache = {}
+        for contents in ["THE_CONST = 1\n", "THE_CONST = 2\n"]:
+            safe_exec("a = 1", {}, extra_files=[("constant.py", contents)], cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
+    def test_cache_hashed_extra_files(self):
+        # A HashedFile is keyed by its digest rather than its contents.
+        cache = {}
+        for contents in ["THE_CONST = 1\n", "THE_CONST = 2\n"]:
+            extra_files = [("constant.py", HashedFile(contents, "digest"))]
+            safe_exec("a = 1", {}, extra_files=extra_files, cache=DictCache(cache))
+        self.assertEqual(len(cache), 1)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -0,0 +1,113 @@
+"""Test worker_pool.py"""
+
+import os
+import sys
+import textwrap
+import unittest
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+from mock import patch
+
+from capa.safe_exec.worker_pool import WorkerPool
+
+LIMITS = {"CPU": 1, "REALTIME": 1, "VMEM": 0}
+
+
+@patch.dict(jail_code.LIMITS, LIMITS)
+class TestWorkerPool(unittest.TestCase):
+    """Test WorkerPool, with workers running this Python, unsandboxed."""
+
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        self.pool = WorkerPool(size=1, max_executions=3, command=[sys.executable, "-E", "-B"])
+
+    def tearDown(self):
+        for worker in self.pool._idle:  # pylint: disable=protected-access
+            worker.stop()
+        super(TestWorkerPool, self).tearDown()
+
+    def test_set_values(self):
+        g = {'b': 21}
+        self.pool.safe_exec("a = b * 2", g)
+        self.assertEqual(g, {'a': 42, 'b': 21})
+
+    def test_worker_reused(self):
+        g = {}
+        self.pool.safe_exec("import os\npid = os.getppid()", g)
+        first_pid = g['pid']
+        self.pool.safe_exec("import os\npid = os.getppid()", g)
+        self.assertEqual(first_pid, g['pid'])
+
+    def test_code_isolated(self):
+        # Each execution runs in a fresh child, so changes to modules don't persist
+        g = {}
+        self.pool.safe_exec("import json\njson.hacked = True", g)
+        self.pool.safe_exec("import json\nhacked = hasattr(json, 'hacked')", g)
+        self.assertFalse(g['hacked'])
+
+    def test_recycling(self):
+        g = {}
+        pids = set()
+        for __ in range(4):
+            self.pool.safe_exec("import os\npid = os.getppid()", g)
+            pids.add(g['pid'])
+        # The worker is replaced after three executions
+        self.assertEqual(len(pids), 2)
+
+    def test_recycling_after_memory_use(self):
+        # The code runs in the worker's children, so their memory is what counts.
+        self.pool.max_memory = 100 * 1024 * 1024
+        g = {}
+        self.pool.safe_exec("import os\npid = os.getppid()\nbig = ' ' * (200 * 1024 * 1024)\ndel big", g)
+        first_pid = g['pid']
+        self.pool.safe_exec("import os\npid = os.getppid()", g)
+        self.assertNotEqual(first_pid, g['pid'])
+
+    def test_raising_exceptions(self):
+        with self.assertRaisesRegexp(SafeExecException, "ZeroDivisionError"):
+            self.pool.safe_exec("1/0", {})
+        # The worker is still fine afterward
+        g = {}
+        self.pool.safe_exec("a = 17", g)
+        self.assertEqual(g['a'], 17)
+
+    def test_timeout(self):
+        with self.assertRaisesRegexp(SafeExecException, "Killed after"):
+            self.pool.safe_exec("import time\ntime.sleep(5)", {})
+
+    def test_worker_stopped_by_code(self):
+        # Code that stops its worker fails, rather than hanging, and the worker is replaced.
+        with self.assertRaisesRegexp(SafeExecException, "Timed out"):
+            self.pool.safe_exec("import os, signal\nos.kill(os.getppid(), signal.SIGSTOP)", {})
+        self.assertEqual(self.pool._idle, [])  # pylint: disable=protected-access
+        g = {}
+        self.pool.safe_exec("a = 17", g)
+        self.assertEqual(g['a'], 17)
+
+    @unittest.skipIf(os.getuid() == 0, "root can reach any process")
+    def test_worker_fds_unreachable(self):
+        g = {}
+        self.pool.safe_exec(textwrap.dedent("""
+            import os
+            try:
+                os.listdir("/proc/{}/fd".format(os.getppid()))
+                reached = True
+            except (IOError, OSError):
+                reached = False
+        """), g)
+        self.assertFalse(g['reached'])
+
+    def test_extra_files(self):
+        g = {}
+        self.pool.safe_exec("import helper\na = helper.X", g, extra_files=[("helper.py", "X = 42\n")])
+        self.assertEqual(g['a'], 42)
+
+    def test_extra_files_larger_than_fsize(self):
+        # FSIZE limits what the code writes, not the extra files.
+        g = {}
+        with patch.dict(jail_code.LIMITS, {"FSIZE": 10}):
+            self.pool.safe_exec(
+                "import helper\na = helper.X", g, extra_files=[("helper.py", "X = 42  # a long line\n")]
+            )
+        self.assertEqual(g['a'], 42)
@@ -0,0 +1,283 @@
+"""
+A pool of long-lived sandboxed Python processes to run code in.
+
+Starting a sandboxed Python for every execution, and importing numpy and the
+like in it, is most of the time it takes to run a typical problem's code.  The
+workers in a pool are started once, with those modules already imported, and
+fork a fresh child, with the codejail resource limits, for each execution (see
+sandbox_worker.py).  Workers are replaced after running `max_executions`
+pieces of code, or once they, or a child of theirs, have used more than
+`max_memory` bytes.
+"""
+
+import base64
+import json
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from codejail.safe_exec import json_safe, SafeExecException
+from dogapi import dog_stats_api
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# We'll need the code of sandbox_worker.py to run in the sandbox, so read it now.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+SANDBOX_WORKER_PY = open(sandbox_worker_py_file).read()
+
+# How long past the REALTIME limit to wait for a worker before giving up on it.
+# The worker kills its child at the limit, so this is only for hung workers.
+WORKER_GRACE_SECONDS = 5
+
+# How long to wait for a killed worker to exit.
+WORKER_STOP_SECONDS = 1
+
+# Pipe writes of up to this many bytes don't block once select says they won't.
+PIPE_BUF = 512
+
+
+class WorkerError(Exception):
+    """
+    A worker didn't answer a request.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    One long-lived sandboxed Python process running sandbox_worker.py.
+
+    The code the worker runs can stop it (e.g. with SIGSTOP) unless its child
+    profile denies it, so every wait for the worker is bounded.
+    """
+    def __init__(self, command, user=None, preimports=(), child_profile=None):
+        args = list(preimports)
+        if child_profile:
+            args.insert(0, sandbox_worker.CHILD_PROFILE_ARG + child_profile)
+        cmd = list(command) + ["-c", SANDBOX_WORKER_PY] + args
+        if user:
+            cmd = ["sudo", "-u", user] + cmd
+        with open(os.devnull, "w") as devnull:
+            self.proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull, close_fds=True,
+            )
+        self.executions = 0
+        self.memory = 0
+        self.stopped = False
+
+    def execute(self, request, timeout=None):
+        """
+        Send `request` to the worker, and return its response.
+
+        Raises WorkerError if the worker doesn't answer within `timeout` seconds.
+        """
+        self.executions += 1
+        deadline = None if timeout is None else time.time() + timeout
+        try:
+            self._write(json.dumps(request) + "\n", deadline)
+            line = self._read_line(deadline)
+        except (IOError, OSError) as exc:
+            raise WorkerError(str(exc))
+        if not line:
+            raise WorkerError("No response from sandbox worker")
+
+        response = json.loads(line)
+        self.memory = response.pop("maxrss", 0)
+        return response
+
+    @staticmethod
+    def _wait(rlist, wlist, deadline):
+        """
+        Wait until `rlist` or `wlist` is ready, or raise WorkerError at `deadline`.
+        """
+        timeout = None if deadline is None else max(deadline - time.time(), 0)
+        ready = select.select(rlist, wlist, [], timeout)
+        if not any(ready):
+            raise WorkerError("Timed out waiting for sandbox worker")
+
+    def _write(self, data, deadline):
+        """
+        Write `data` to the worker's stdin, giving up at `deadline`.
+        """
+        stdin = self.proc.stdin.fileno()
+        while data:
+            self._wait([], [stdin], deadline)
+            data = data[os.write(stdin, data[:PIPE_BUF]):]
+
+    def _read_line(self, deadline):
+        """
+        Read a line from the worker's stdout, giving up at `deadline`.  Returns
+        "" if the worker exits first.
+        """
+        stdout = self.proc.stdout.fileno()
+        chunks = []
+        while True:
+            self._wait([stdout], [], deadline)
+            chunk = os.read(stdout, 65536)
+            if not chunk:
+                return ""
+            chunks.append(chunk)
+            if chunk.endswith("\n"):
+                return "".join(chunks)
+
+    def alive(self):
+        """
+        Return whether the worker process is still running, and hasn't been stopped.
+        """
+        return not self.stopped and self.proc.poll() is None
+
+    def stop(self):
+        """
+        Kill the worker process, waiting up to WORKER_STOP_SECONDS for it to exit.
+        """
+        self.stopped = True
+        try:
+            self.proc.stdin.close()
+            if self.proc.poll() is None:
+                self.proc.kill()
+        except (IOError, OSError):
+            pass
+        deadline = time.time() + WORKER_STOP_SECONDS
+        while self.proc.poll() is None:
+            if time.time() > deadline:
+                log.warning("Sandbox worker %d didn't exit after being killed", self.proc.pid)
+                break
+            time.sleep(0.01)
+
+
+class WorkerPool(object):
+    """
+    A pool of up to `size` SandboxWorkers, with a `safe_exec` like codejail's.
+
+    The workers run the sandboxed Python configured in codejail (or `command`,
+    as `user`, if given), importing `preimports` when they start, and run each
+    piece of code in the AppArmor `child_profile`, if given.
+    """
+    def __init__(
+        self, size=4, max_executions=100, max_memory=None, preimports=(), command=None, user=None,
+        child_profile=None,
+    ):
+        self.size = size
+        self.max_executions = max_executions
+        self.max_memory = max_memory
+        self.preimports = list(preimports)
+        self.child_profile = child_profile
+        self.command = command
+        self.user = user
+
+        self._idle = []
+        self._num_workers = 0
+        self._pid = None
+        self._condition = threading.Condition()
+
+    def _command(self):
+        """
+        Return the command line and user to start workers with, or (None, None)
+        if there's no sandbox configured.
+        """
+        if self.command is not None:
+            return self.command, self.user
+        if not jail_code.is_configured("python"):
+            return None, None
+        config = jail_code.COMMANDS["python"]
+        return config["cmdline_start"], config["user"]
+
+    def _checkout(self, command, user):
+        """
+        Return an idle worker, starting a new one if the pool isn't full yet, or
+        waiting for one to be checked in if it is.
+        """
+        with self._condition:
+            if self._pid != os.getpid():
+                # Workers started before a fork belong to the parent process.
+                self._idle = []
+                self._num_workers = 0
+                self._pid = os.getpid()
+
+            while not self._idle and self._num_workers >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._num_workers += 1
+
+        try:
+            worker = SandboxWorker(command, user, self.preimports, self.child_profile)
+        except Exception:
+            self._checkin(None)
+            raise
+        dog_stats_api.increment('capa.safe_exec.worker_pool.started')
+        return worker
+
+    def _checkin(self, worker):
+        """
+        Return `worker` to the pool, or stop it if it's due to be replaced (a
+        `worker` of None gives back its place in the pool).
+        """
+        if worker is not None:
+            recycle = (
+                not worker.alive() or
+                worker.executions >= self.max_executions or
+                (self.max_memory and worker.memory > self.max_memory)
+            )
+            if recycle:
+                dog_stats_api.increment('capa.safe_exec.worker_pool.recycled')
+                worker.stop()
+                worker = None
+
+        with self._condition:
+            if worker is not None:
+                self._idle.append(worker)
+            else:
+                self._num_workers -= 1
+            self._condition.notify()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Run `code` in a worker, like `codejail.safe_exec.safe_exec`.
+
+        Falls back to codejail for code that needs files copied in from the
+        python_path, and when there's no sandbox configured.
+        """
+        command, user = self._command()
+        extra_files = extra_files or ()
+        python_path = python_path or ()
+        extra_names = set(name for name, __ in extra_files)
+        if command is None or any(os.path.basename(path) not in extra_names for path in python_path):
+            return codejail_safe_exec(
+                code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug,
+            )
+
+        request = {
+            "code": code,
+            "globals": json_safe(globals_dict),
+            "python_path": [os.path.basename(path) for path in python_path],
+            "files": [(name, base64.b64encode(contents)) for name, contents in extra_files],
+            "limits": dict(jail_code.LIMITS),
+        }
+        realtime = jail_code.LIMITS.get("REALTIME")
+        timeout = realtime + WORKER_GRACE_SECONDS if realtime else None
+
+        worker = self._checkout(command, user)
+        try:
+            response = worker.execute(request, timeout)
+        except WorkerError as exc:
+            log.warning("Sandbox worker failed running %s: %s", slug, exc)
+            dog_stats_api.increment('capa.safe_exec.worker_pool.failed')
+            worker.stop()
+            raise SafeExecException("Couldn't execute jailed code: {}".format(exc))
+        finally:
+            self._checkin(worker)
+
+        if "error" in response:
+            raise SafeExecException("Couldn't execute jailed code: {}".format(response["error"]))
+        globals_dict.update(response["globals"])
@@ -55,6 +55,24 @@ def test_capa_system():
     return the_system
 
 
+class DictCache(object):
+    """
+    A django-style cache (e.g. memcached) over a simple dict, for testing.
+    """
+    def __init__(self, d=None):
+        self.cache = d if d is not None else {}
+
+    def get(self, key, default=None):
+        # Actual cache implementations have limits on key length
+        assert len(key) <= 250
+        return self.cache.get(key, default)
+
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        # Actual cache implementations have limits on key length
+        assert len(key) <= 250
+        self.cache[key] = value
+
+
 def new_loncapa_problem(xml, capa_system=None, seed=723):
     """Construct a `LoncapaProblem` suitable for unit tests."""
     return LoncapaProblem(xml, id='1', seed=seed, capa_system=capa_system or test_capa_system())
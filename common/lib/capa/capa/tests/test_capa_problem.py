@@ -0,0 +1,78 @@
+"""
+Tests of capa_problem.py
+"""
+import unittest
+
+from lxml import etree
+from mock import patch
+
+from capa import capa_problem
+from capa.tests import new_loncapa_problem
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """
+    Tests of the cache of parsed problem XML.
+    """
+    xml = u"""
+        <problem>
+            <startouttext/>What is 1 + 1?<endouttext/>
+            <stringresponse answer="2">
+                <textline size="10"/>
+            </stringresponse>
+        </problem>
+    """
+
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()
+        capa_problem._parsed_problem_cache.clear()  # pylint: disable=protected-access
+
+    def test_problem_parsed_once(self):
+        with patch('capa.capa_problem.etree.XML', wraps=etree.XML) as parse:
+            first = new_loncapa_problem(self.xml, seed=1)
+            second = new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(parse.call_count, 1)
+
+        # each problem gets its own copy of the tree to modify
+        self.assertIsNot(first.tree, second.tree)
+        self.assertEqual(first.problem_text, second.problem_text)
+        self.assertIn('<text>What is 1 + 1?</text>', first.problem_text)
+
+    def test_cache_size(self):
+        with patch.object(capa_problem._parsed_problem_cache, 'max_size', 1):  # pylint: disable=protected-access
+            capa_problem.parse_problem_text(u'<problem>1</problem>')
+            capa_problem.parse_problem_text(u'<problem>2</problem>')
+        self.assertEqual(len(capa_problem._parsed_problem_cache), 1)  # pylint: disable=protected-access
+
+    def test_invalid_xml_not_cached(self):
+        with self.assertRaises(etree.XMLSyntaxError):
+            capa_problem.parse_problem_text(u'<problem>')
+        self.assertEqual(len(capa_problem._parsed_problem_cache), 0)  # pylint: disable=protected-access
+
+
+class ScriptContextTest(unittest.TestCase):
+    """
+    Tests of running problem scripts.
+    """
+    def test_student_id_not_in_script_globals(self):
+        # Scripts which don't use the student's id can be cached for every student
+        xml = u"""
+            <problem>
+                <script type="loncapa/python">a = 1</script>
+            </problem>
+        """
+        script_globals = []
+        with patch('capa.capa_problem.safe_exec') as mock_safe_exec:
+            mock_safe_exec.side_effect = lambda code, globals_dict, **kwargs: script_globals.extend(globals_dict)
+            problem = new_loncapa_problem(xml)
+        self.assertNotIn('anonymous_student_id', script_globals)
+        self.assertEqual(problem.context['anonymous_student_id'], 'student')
+
+    def test_student_id_in_script_globals(self):
+        xml = u"""
+            <problem>
+                <script type="loncapa/python">a = anonymous_student_id</script>
+            </problem>
+        """
+        problem = new_loncapa_problem(xml)
+        self.assertEqual(problem.context['a'], 'student')
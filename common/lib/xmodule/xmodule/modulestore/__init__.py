@@ -21,7 +21,7 @@ from abc import ABCMeta, abstractmethod
 from contracts import contract, new_contract
 from xblock.plugin import default_select
 
-from .exceptions import InvalidLocationError, InsufficientSpecificationError
+from .exceptions import InvalidLocationError, InsufficientSpecificationError, ItemNotFoundError
 from xmodule.errortracker import make_error_tracker
 from xmodule.assetstore import AssetMetadata
 from opaque_keys.edx.keys import CourseKey, UsageKey, AssetKey
@@ -907,6 +907,24 @@ class ModuleStoreReadBase(BulkOperationsMixin, ModuleStoreRead):
                 return course
         return None
 
+    def get_courses_by_keys(self, course_keys, depth=0, **kwargs):
+        """
+        Return a dict of the courses with the given keys (:class:`CourseKey`),
+        by key. The keys of courses that aren't found are left out.
+
+        Default impl--get_course for each key. Modulestores which can look
+        courses up in batches should override this.
+        """
+        courses = {}
+        for course_key in course_keys:
+            try:
+                course = self.get_course(course_key, depth=depth, **kwargs)
+            except ItemNotFoundError:
+                continue
+            if course is not None:
+                courses[course_key] = course
+        return courses
+
     def has_course(self, course_id, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
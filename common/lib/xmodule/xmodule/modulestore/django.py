@@ -19,6 +19,7 @@ import threading
 from xmodule.util.django import get_current_request_hostname
 import xmodule.modulestore  # pylint: disable=unused-import
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.contentstore.django import contentstore
 import xblock.reference.plugins
@@ -71,6 +72,12 @@ def create_modulestore_instance(engine, content_store, doc_store_config, options
     if issubclass(class_, MixedModuleStore):
         _options['create_modulestore_instance'] = create_modulestore_instance
 
+    if issubclass(class_, SplitMongoModuleStore):
+        try:
+            _options['structure_cache'] = get_cache('course_structure_cache')
+        except InvalidCacheBackendError:
+            pass
+
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
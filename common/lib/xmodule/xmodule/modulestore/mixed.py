@@ -310,6 +310,41 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except ItemNotFoundError:
             return None
 
+    @strip_key
+    def get_courses_by_keys(self, course_keys, depth=0, **kwargs):
+        """
+        Return a dict of the courses with the given keys, by key, looking up
+        the courses of each modulestore in one batch. The keys of courses that
+        don't exist are left out.
+
+        :param course_keys: CourseKeys
+        """
+        keys_by_store = {}
+        unmapped_keys = []
+        for course_key in course_keys:
+            assert(isinstance(course_key, CourseKey))
+            store = self.mappings.get(self._clean_course_id_for_mapping(course_key))
+            if store is None:
+                unmapped_keys.append(course_key)
+            else:
+                keys_by_store.setdefault(store, []).append(course_key)
+
+        # Look for the courses not yet mapped to a store in each store in turn,
+        # along with those that are, remembering where they were found, as
+        # _get_modulestore_for_courseid does
+        courses = {}
+        for store in self.modulestores:
+            store_keys = keys_by_store.get(store, []) + unmapped_keys
+            if not store_keys:
+                continue
+            found = store.get_courses_by_keys(store_keys, depth=depth, **kwargs)
+            for course_key in unmapped_keys:
+                if course_key in found:
+                    self.mappings[self._clean_course_id_for_mapping(course_key)] = store
+            courses.update(found)
+            unmapped_keys = [course_key for course_key in unmapped_keys if course_key not in found]
+        return courses
+
     @strip_key
     @contract(library_key='LibraryLocator')
     def get_library(self, library_key, depth=0, **kwargs):
@@ -15,7 +15,6 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
 from uuid import uuid4
 
@@ -574,34 +573,28 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             return location.replace(revision=MongoRevisionKey.draft)
         return location.replace(revision=MongoRevisionKey.published)
 
-    def _compute_metadata_inheritance_tree(self, course_id):
-        '''
-        TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
-        '''
-        # get all collections in the course, this query should not return any leaf nodes
-        # note this is a bit ugly as when we add new categories of containers, we have to add it here
-
-        course_id = self.fill_in_run(course_id)
-        query = SON([
-            ('_id.tag', 'i4x'),
-            ('_id.org', course_id.org),
-            ('_id.course', course_id.course),
-            ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
-        ])
-        # we just want the Location, children, and inheritable metadata
+    @staticmethod
+    def _metadata_inheritance_record_filter():
+        """
+        The fields to fetch from container records to compute the metadata inheritance tree:
+        just the Location, children, and inheritable metadata
+        """
         record_filter = {'_id': 1, 'definition.children': 1}
 
         # just get the inheritable metadata since that is all we need for the computation
         # this minimizes both data pushed over the wire
         for field_name in InheritanceMixin.fields:
             record_filter['metadata.{0}'.format(field_name)] = 1
+        return record_filter
 
-        # call out to the DB
-        resultset = self.collection.find(query, record_filter)
+    @staticmethod
+    def _collect_metadata_inheritance_records(course_id, resultset, results_by_url):
+        """
+        Add the container records in resultset to results_by_url, keyed by the published location url,
+        merging the children of the draft and published versions of each container.
 
-        # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
-        # is a dictionary relative to that course
-        results_by_url = {}
+        Returns the url of the course, if it was in resultset
+        """
         root = None
 
         # now go through the results and order them by the location url
@@ -621,66 +614,145 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 results_by_url[location_url] = result
             if location.category == 'course':
                 root = location_url
+        return root
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
+    @staticmethod
+    def _inherit_metadata_down(results_by_url, url, my_metadata, metadata_to_inherit):
+        """
+        Record in metadata_to_inherit the metadata which each descendant of url inherits, given
+        that my_metadata is the inheritable metadata in effect at url.
+
+        Descendants which don't set any inheritable metadata of their own share their parent's dict,
+        so the dicts in the tree must never be modified in place (replace them instead).
+        """
+        # go through all the children and recurse, but only if we have
+        # in the result set. Remember results will not contain leaf nodes
+        for child in results_by_url[url].get('definition', {}).get('children', []):
+            if child in results_by_url:
+                child_metadata = results_by_url[child].get('metadata', {})
+                if child_metadata:
+                    new_child_metadata = dict(my_metadata)
+                    new_child_metadata.update(child_metadata)
                 else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
+                    new_child_metadata = my_metadata
+                metadata_to_inherit[child] = new_child_metadata
+                MongoModuleStore._inherit_metadata_down(
+                    results_by_url, child, new_child_metadata, metadata_to_inherit
+                )
+            else:
+                # this is likely a leaf node, so let's record what metadata we need to inherit
+                metadata_to_inherit[child] = my_metadata
+
+    def _compute_metadata_inheritance_tree(self, course_id):
+        '''
+        TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
+        '''
+        # get all collections in the course, this query should not return any leaf nodes
+        # note this is a bit ugly as when we add new categories of containers, we have to add it here
 
+        course_id = self.fill_in_run(course_id)
+        query = SON([
+            ('_id.tag', 'i4x'),
+            ('_id.org', course_id.org),
+            ('_id.course', course_id.course),
+            ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
+        ])
+
+        # call out to the DB
+        resultset = self.collection.find(query, self._metadata_inheritance_record_filter())
+
+        # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
+        # is a dictionary relative to that course
+        results_by_url = {}
+        root = self._collect_metadata_inheritance_records(course_id, resultset, results_by_url)
+
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
         if root is not None:
-            _compute_inherited_metadata(root)
+            self._inherit_metadata_down(
+                results_by_url, root, results_by_url[root].get('metadata', {}), metadata_to_inherit
+            )
 
         return metadata_to_inherit
 
-    def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
-        '''
-        Compute the metadata inheritance for the course.
-        '''
-        tree = {}
+    def _update_metadata_inheritance_subtree(self, course_id, tree, location):
+        """
+        Patch tree in place so that it reflects the current inheritable metadata and children of
+        the container at location and all of the containers below it, without recomputing the
+        rest of the course.
 
+        Returns False if the subtree couldn't be placed in the course (e.g. it's an orphan), in
+        which case the whole tree needs to be recomputed.
+        """
         course_id = self.fill_in_run(course_id)
-        if not force_refresh:
-            # see if we are first in the request cache (if present)
-            if self.request_cache is not None and unicode(course_id) in self.request_cache.data.get('metadata_inheritance', {}):
-                return self.request_cache.data['metadata_inheritance'][unicode(course_id)]
+        location = as_published(location)
+        record_filter = self._metadata_inheritance_record_filter()
 
-            # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
-            else:
-                logging.warning(
-                    'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
-                    OK in localdev and testing environment. Not OK in production.'
-                )
+        # find the metadata in effect at the parent
+        parent = self._get_raw_parent_location(location, ModuleStoreEnum.RevisionOption.draft_preferred)
+        if parent is None:
+            return False
+        parent = as_published(parent)
+        if parent.category == 'course':
+            # the course isn't in the tree, so use its own metadata
+            course_record = self.collection.find_one({'_id': parent.to_deprecated_son()}, record_filter)
+            if course_record is None:
+                return False
+            parent_metadata = course_record.get('metadata', {})
+        elif unicode(parent) in tree:
+            parent_metadata = tree[unicode(parent)]
+        else:
+            return False
 
-        if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
-            tree = self._compute_metadata_inheritance_tree(course_id)
+        # load the containers in the subtree, one level at a time
+        results_by_url = {}
+        to_load = [location]
+        while to_load:
+            query = {'_id': {'$in': [
+                rev_func(container).to_deprecated_son()
+                for container in to_load
+                for rev_func in (as_published, as_draft)
+            ]}}
+            loaded_urls = set(results_by_url)
+            self._collect_metadata_inheritance_records(
+                course_id, self.collection.find(query, record_filter), results_by_url
+            )
+            to_load = []
+            for url in set(results_by_url) - loaded_urls:
+                for child in results_by_url[url].get('definition', {}).get('children', []):
+                    child_location = course_id.make_usage_key_from_deprecated_string(child)
+                    if child_location.category in BLOCK_TYPES_WITH_CHILDREN and child not in results_by_url:
+                        to_load.append(child_location)
+
+        url = unicode(location)
+        if url not in results_by_url:
+            return False
+
+        my_metadata = results_by_url[url].get('metadata', {})
+        if my_metadata:
+            my_metadata = dict(parent_metadata)
+            my_metadata.update(results_by_url[url]['metadata'])
+        else:
+            my_metadata = parent_metadata
+        tree[url] = my_metadata
+        self._inherit_metadata_down(results_by_url, url, my_metadata, tree)
+        return True
 
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+    def _cache_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Write the metadata inheritance tree for the course to the caching subsystem and
+        request cache, if available.
+        """
+        # now write out computed tree to caching subsystem (e.g. memcached), if available
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
 
-        # now populate a request_cache, if available. NOTE, we are outside of the
-        # scope of the above if: statement so that after a memcache hit, it'll get
-        # put into the request_cache
+        self._request_cache_metadata_inheritance_tree(course_id, tree)
+
+    def _request_cache_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Save the metadata inheritance tree for the course in the request cache, if available.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -688,20 +760,74 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
 
+    def _find_cached_metadata_inheritance_tree(self, course_id):
+        """
+        Return the metadata inheritance tree for the course from the request cache or caching
+        subsystem, or None if it isn't cached.
+        """
+        # see if we are first in the request cache (if present)
+        if self.request_cache is not None:
+            request_trees = self.request_cache.data.get('metadata_inheritance', {})
+            if unicode(course_id) in request_trees:
+                return request_trees[unicode(course_id)]
+
+        # then look in any caching subsystem (e.g. memcached)
+        if self.metadata_inheritance_cache_subsystem is not None:
+            tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+            if tree:
+                # NOTE, put it into the request_cache after a memcache hit
+                self._request_cache_metadata_inheritance_tree(course_id, tree)
+                return tree
+        else:
+            logging.warning(
+                'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
+                OK in localdev and testing environment. Not OK in production.'
+            )
+        return None
+
+    def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
+        '''
+        Compute the metadata inheritance for the course.
+        '''
+        course_id = self.fill_in_run(course_id)
+        tree = None
+        if not force_refresh:
+            tree = self._find_cached_metadata_inheritance_tree(course_id)
+
+        if tree is None:
+            # if not in subsystem, or we are on force refresh, then we have to compute
+            tree = self._compute_metadata_inheritance_tree(course_id)
+            self._cache_metadata_inheritance_tree(course_id, tree)
+
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, location=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the location of the only item which changed and the tree is already cached, just
+        the part of the tree below that item is recomputed and patched into the cached tree
+        (items without children don't affect the tree at all).
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
-            # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = None
+            if location is not None and location.category != 'course':
+                course_id = self.fill_in_run(course_id)
+                cached_metadata = self._find_cached_metadata_inheritance_tree(course_id)
+                if cached_metadata is not None and location.category in BLOCK_TYPES_WITH_CHILDREN:
+                    if self._update_metadata_inheritance_subtree(course_id, cached_metadata, location):
+                        self._cache_metadata_inheritance_tree(course_id, cached_metadata)
+                    else:
+                        cached_metadata = None
+
+            if cached_metadata is None:
+                # below is done for side effects when runtime is None
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -874,6 +1000,31 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         except ItemNotFoundError:
             return None
 
+    @autoretry_read()
+    def get_courses_by_keys(self, course_keys, depth=0, **kwargs):
+        """
+        Return a dict of the courses with the given keys, by key, finding all
+        of them in one query.
+        """
+        keys_by_id = {}
+        for course_key in course_keys:
+            if isinstance(course_key, LibraryLocator):
+                continue  # Libraries require split mongo
+            filled_key = self.fill_in_run(course_key)
+            keys_by_id[(filled_key.org, filled_key.course, filled_key.run)] = (course_key, filled_key)
+        if not keys_by_id:
+            return {}
+
+        course_ids = [
+            filled_key.make_usage_key('course', filled_key.run).to_deprecated_son()
+            for __, filled_key in keys_by_id.itervalues()
+        ]
+        courses = {}
+        for item in self.collection.find({'_id': {'$in': course_ids}}):
+            course_key, filled_key = keys_by_id[(item['_id']['org'], item['_id']['course'], item['_id']['name'])]
+            courses[course_key] = self._load_items(filled_key, [item], depth)[0]
+        return courses
+
     def has_course(self, course_key, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
@@ -1262,7 +1413,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, xblock.scope_ids.usage_id
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
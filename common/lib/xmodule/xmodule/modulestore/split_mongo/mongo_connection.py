@@ -2,6 +2,9 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import re
+import zlib
+import cPickle as pickle
+from calc.lru import LRUCache
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
@@ -14,6 +17,16 @@ from xmodule.modulestore.split_mongo import BlockKey
 import datetime
 import pytz
 
+try:
+    import dogstats_wrapper as dog_stats_api
+except ImportError:
+    dog_stats_api = None
+
+# How long (in seconds) to keep structures in the shared cache: the longest
+# relative timeout memcached accepts. (A timeout of None would mean the cache's
+# default timeout, not forever.)
+STRUCTURE_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
 
 def structure_from_mongo(structure):
     """
@@ -66,17 +79,85 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(object):
+    """
+    A read-through cache of course structures, keyed by the structure's ``_id``.
+
+    Structures are never modified once they've been written to the database, so
+    entries never need to be invalidated. Structures are cached after
+    ``structure_from_mongo`` has been applied, in a compact (pickled and
+    compressed) form. Each lookup unpacks a fresh copy, so callers are free to
+    modify what they get back.
+
+    Entries are kept in a small per-process LRU, in front of an optional shared
+    django-style cache (e.g. memcached).
+    """
+    DEFAULT_MAX_LOCAL_ENTRIES = 32
+
+    def __init__(self, shared_cache=None, max_local_entries=DEFAULT_MAX_LOCAL_ENTRIES):
+        self.shared_cache = shared_cache
+        self._local = LRUCache(max_local_entries)
+
+    @staticmethod
+    def _shared_key(structure_id):
+        """
+        The key to store the structure with ``structure_id`` under in the shared cache.
+        """
+        return u'split.structure.{}'.format(structure_id)
+
+    @staticmethod
+    def _record(result):
+        """
+        Report a cache lookup result ('local', 'shared' or 'miss').
+        """
+        if dog_stats_api:
+            dog_stats_api.increment('split.structure_cache', tags=[u'result:{}'.format(result)])
+
+    def get(self, structure_id):
+        """
+        Return the cached structure with ``structure_id``, or None if it isn't cached.
+        """
+        packed = self._local.get(structure_id)
+        if packed is not None:
+            self._record('local')
+        else:
+            if self.shared_cache is not None:
+                packed = self.shared_cache.get(self._shared_key(structure_id))
+            if packed is None:
+                self._record('miss')
+                return None
+            self._record('shared')
+            self._local.set(structure_id, packed)
+        return pickle.loads(zlib.decompress(packed))
+
+    def set(self, structure_id, structure):
+        """
+        Cache ``structure`` (which must already be converted by ``structure_from_mongo``).
+        """
+        packed = zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL))
+        self._local.set(structure_id, packed)
+        if self.shared_cache is not None:
+            # Structures never change, so they can be kept as long as the cache allows
+            self.shared_cache.set(self._shared_key(structure_id), packed, STRUCTURE_CACHE_TIMEOUT)
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        Arguments:
+            structure_cache (StructureCache): The cache to read structures through. If None,
+                structures are only cached in a per-process LRU.
         """
+        self.structure_cache = structure_cache if structure_cache is not None else StructureCache()
+
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -118,7 +199,11 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            structure = structure_from_mongo(self.structures.find_one({'_id': key}))
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
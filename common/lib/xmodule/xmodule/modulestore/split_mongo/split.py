@@ -54,6 +54,7 @@ import copy
 import threading
 import datetime
 import logging
+from calc.lru import LRUCache
 from contracts import contract, new_contract
 from importlib import import_module
 from mongodb_proxy import autoretry_read
@@ -75,7 +76,7 @@ from xmodule.modulestore import (
 
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, StructureCache, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -106,6 +107,9 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# Settings fields which get_items can look blocks up by without scanning the whole structure
+INDEXED_SETTINGS_FIELDS = ('discussion_id',)
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -596,24 +600,33 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
     # version) but those functions will have an optional arg for setting these.
     SEARCH_TARGET_DICT = ['wiki_slug']
 
+    # The number of structures to keep get_items indexes for
+    MAX_INDEXED_STRUCTURES = 64
+
     def __init__(self, contentstore, doc_store_config, fs_root, render_template,
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None,
-                 services=None, **kwargs):
+                 services=None, structure_cache=None, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache: an optional django-style cache shared between processes, which course
+            structures are read through (in addition to a per-process LRU).
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(structure_cache=StructureCache(structure_cache), **doc_store_config)
         self.db = self.db_connection.database
 
         # Code review question: How should I expire entries?
         # _add_cache could use a lru mechanism to control the cache size?
         self.thread_cache = threading.local()
 
+        # structure version guid -> {index name: {value: [BlockKey]}} for the most recently
+        # searched structures. Structures never change once saved, so these never go stale.
+        self._structure_indexes = LRUCache(self.MAX_INDEXED_STRUCTURES)
+
         if default_class is not None:
             module_path, __, class_name = default_class.rpartition('.')
             class_ = getattr(import_module(module_path), class_name)
@@ -739,6 +752,66 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         self.thread_cache.course_cache[course_version_guid] = system
         return system
 
+    def _get_structure_index(self, structure, index_name):
+        """
+        Return a map from values to the (ordered) list of keys of the blocks in ``structure``
+        which have that value. ``index_name`` is either 'block_type' or ('fields', field_name),
+        where field_name is one of INDEXED_SETTINGS_FIELDS. List values are indexed by each of
+        their elements.
+
+        Indexes are built on first use and cached by structure version.
+        """
+        version_guid = structure['_id']
+        indexes = self._structure_indexes.setdefault(version_guid, {})
+
+        index = indexes.get(index_name)
+        if index is None:
+            index = {}
+            for block_key, block in structure['blocks'].iteritems():
+                if index_name == 'block_type':
+                    values = [block_key.type]
+                else:
+                    __, field_name = index_name
+                    if field_name not in block.get('fields', {}):
+                        continue
+                    values = block['fields'][field_name]
+                    if not isinstance(values, list):
+                        values = [values]
+                for value in values:
+                    try:
+                        index.setdefault(value, []).append(block_key)
+                    except TypeError:
+                        # unhashable values can't equal the strings looked up in the index
+                        pass
+            indexes[index_name] = index
+        return index
+
+    def _indexed_block_keys(self, course, qualifiers, settings):
+        """
+        Return the keys of the blocks in the course which could match the given get_items
+        ``qualifiers`` and ``settings``, in structure order, using the structure indexes.
+        Returns None if none of the criteria can be looked up in an index, in which case
+        every block needs to be checked.
+        """
+        # Structures in an active bulk operation can be changed in place, so only index ones
+        # which were read from the db.
+        if self._get_bulk_ops_record(course.course_key).active:
+            return None
+
+        candidates = None
+        criteria = [('block_type', qualifiers.get('block_type'))]
+        criteria.extend(
+            (('fields', field_name), settings.get(field_name))
+            for field_name in INDEXED_SETTINGS_FIELDS
+        )
+        for index_name, value in criteria:
+            if not isinstance(value, basestring):
+                continue
+            matches = self._get_structure_index(course.structure, index_name).get(value, [])
+            if candidates is None or len(matches) < len(candidates):
+                candidates = matches
+        return candidates
+
     def _clear_cache(self, course_version_guid=None):
         """
         Should only be used by testing or something which implements transactional boundary semantics.
@@ -1039,8 +1112,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+        block_keys = self._indexed_block_keys(course, qualifiers, settings)
+        if block_keys is None:
+            block_keys = course.structure['blocks'].iterkeys()
+        for block_id in block_keys:
+            if _block_matches_all(course.structure['blocks'][block_id]):
                 items.append(block_id)
 
         if len(items) > 0:
@@ -838,6 +838,19 @@ class TestMixedModuleStore(CourseComparisonTest):
             published_courses = self.store.get_courses(remove_branch=True)
         self.assertEquals([c.id for c in draft_courses], [c.id for c in published_courses])
 
+    @ddt.data('draft', 'split')
+    def test_get_courses_by_keys(self, default_ms):
+        self.initdb(default_ms)
+        course_keys = [
+            self.course_locations[self.MONGO_COURSEID].course_key,
+            self.course_locations[self.XML_COURSEID1].course_key,
+            self.store.make_course_key('NoSuchOrg', 'NoSuchCourse', 'NoSuchRun'),
+        ]
+        courses = self.store.get_courses_by_keys(course_keys)
+        self.assertEqual(set(courses), set(course_keys[:2]))
+        for course_key, course in courses.iteritems():
+            self.assertEqual(course.id, course_key)
+
     def test_xml_get_courses(self):
         """
         Test that the xml modulestore only loaded the courses from the maps.
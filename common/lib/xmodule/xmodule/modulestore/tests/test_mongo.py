@@ -16,6 +16,7 @@ from uuid import uuid4
 from datetime import datetime
 from pytz import UTC
 import unittest
+from mock import Mock, patch
 from xblock.core import XBlock
 
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
@@ -624,6 +625,36 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         self.assertEqual(component.published_on, published_date)
         self.assertEqual(component.published_by, published_by)
 
+    def test_incremental_metadata_inheritance_tree(self):
+        """
+        Tests that editing a container patches the cached inheritance tree instead of recomputing it
+        """
+        course = self.draft_store.create_course('edX', 'inheritance', '2014_Fall', self.dummy_user)
+        self.addCleanup(self.draft_store.delete_course, course.id, self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter')
+        sequential = self.draft_store.create_child(self.dummy_user, chapter.location, 'sequential')
+        vertical = self.draft_store.create_child(self.dummy_user, sequential.location, 'vertical')
+        problem = self.draft_store.create_child(self.dummy_user, vertical.location, 'problem')
+
+        cache = {}
+        metadata_cache = Mock(get=lambda key, default: cache.get(key, default), set=cache.__setitem__)
+        with patch.object(self.draft_store, 'metadata_inheritance_cache_subsystem', metadata_cache):
+            self.draft_store._get_cached_metadata_inheritance_tree(course.id)  # pylint: disable=protected-access
+
+            sequential = self.draft_store.get_item(sequential.location)
+            sequential.visible_to_staff_only = True
+            with patch.object(self.draft_store, '_compute_metadata_inheritance_tree') as compute:
+                self.draft_store.update_item(sequential, self.dummy_user)
+                self.assertFalse(compute.called)
+
+            tree = cache[unicode(course.id)]
+            self.assertTrue(tree[unicode(vertical.location)]['visible_to_staff_only'])
+            self.assertTrue(tree[unicode(problem.location)]['visible_to_staff_only'])
+            self.assertEqual(
+                tree,
+                self.draft_store._compute_metadata_inheritance_tree(course.id)  # pylint: disable=protected-access
+            )
+
     def test_export_course_with_peer_component(self):
         """
         Test export course when link_to_location is given in peer grading interface settings.
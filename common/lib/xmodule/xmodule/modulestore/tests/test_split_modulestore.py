@@ -11,6 +11,7 @@ import uuid
 
 from contracts import contract
 from nose.plugins.attrib import attr
+from mock import patch
 
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
 from xmodule.course_module import CourseDescriptor
@@ -924,6 +925,23 @@ class SplitModuleItemTests(SplitModuleTest):
         )
         self.assertEqual(len(matches), 2)
 
+    def test_get_items_indexed(self):
+        '''
+        get_items by category uses a per-structure index, built once per structure version
+        '''
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        store = modulestore()
+        with patch.object(store, '_get_structure_index', wraps=store._get_structure_index) as get_index:
+            matches = store.get_items(locator, qualifiers={'category': 'chapter'})
+            self.assertEqual(len(matches), 3)
+            self.assertEqual(get_index.call_count, 1)
+        self.assertEqual(
+            set(match.location.block_id for match in matches),
+            set(match.location.block_id for match in store.get_items(locator) if match.category == 'chapter')
+        )
+        matches = store.get_items(locator, qualifiers={'category': 'chapter'}, settings={'discussion_id': 'garbage'})
+        self.assertEqual(len(matches), 0)
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
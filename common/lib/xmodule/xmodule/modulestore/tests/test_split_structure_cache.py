@@ -0,0 +1,73 @@
+"""
+Tests of the read-through structure cache used by split modulestore.
+"""
+import unittest
+from bson.objectid import ObjectId
+from mock import MagicMock
+
+from capa.tests import DictCache
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, StructureCache
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests of StructureCache.
+    """
+    def setUp(self):
+        super(TestStructureCache, self).setUp()
+        self.structure_id = ObjectId()
+        self.structure = {
+            '_id': self.structure_id,
+            'root': BlockKey('course', 'course'),
+            'blocks': {
+                BlockKey('course', 'course'): {'fields': {'children': [BlockKey('chapter', 'one')]}},
+                BlockKey('chapter', 'one'): {'fields': {}},
+            },
+        }
+
+    def test_miss(self):
+        self.assertIsNone(StructureCache().get(self.structure_id))
+
+    def test_returns_copies(self):
+        cache = StructureCache()
+        cache.set(self.structure_id, self.structure)
+        first = cache.get(self.structure_id)
+        self.assertEqual(self.structure, first)
+
+        first['blocks'].clear()
+        self.assertEqual(self.structure, cache.get(self.structure_id))
+
+    def test_shared_cache(self):
+        shared_cache = DictCache()
+        StructureCache(shared_cache).set(self.structure_id, self.structure)
+
+        # A cache in another process only sees the structure through the shared cache
+        self.assertEqual(self.structure, StructureCache(shared_cache).get(self.structure_id))
+
+    def test_local_lru(self):
+        cache = StructureCache(max_local_entries=2)
+        structure_ids = [ObjectId() for __ in range(3)]
+        cache.set(structure_ids[0], self.structure)
+        cache.set(structure_ids[1], self.structure)
+        # Touch the first structure so that the second is the least recently used
+        cache.get(structure_ids[0])
+        cache.set(structure_ids[2], self.structure)
+
+        self.assertIsNotNone(cache.get(structure_ids[0]))
+        self.assertIsNone(cache.get(structure_ids[1]))
+        self.assertIsNotNone(cache.get(structure_ids[2]))
+
+    def test_get_structure_reads_through(self):
+        conn = MagicMock(spec=MongoConnection)
+        conn.structure_cache = StructureCache()
+        conn.structures.find_one.return_value = {
+            '_id': self.structure_id,
+            'root': ['course', 'course'],
+            'blocks': [{'block_type': 'course', 'block_id': 'course', 'fields': {}}],
+        }
+
+        first = MongoConnection.get_structure(conn, self.structure_id)
+        second = MongoConnection.get_structure(conn, self.structure_id)
+        self.assertEqual(first, second)
+        self.assertEqual(1, conn.structures.find_one.call_count)
@@ -19,8 +19,9 @@ from django.db import models, transaction
 from html_to_text import html_to_text
 from mail_utils import wrap_message
 
+from xmodule.modulestore.django import modulestore
 from xmodule_django.models import CourseKeyField
-from util.keyword_substitution import substitute_keywords_with_data
+from util.keyword_substitution import substitute_keywords, substitute_keywords_with_data, KEYWORD_FUNCTION_MAP
 
 log = logging.getLogger(__name__)
 
@@ -228,6 +229,69 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile(self, plaintext, htmltext, course_id):
+        """
+        Prepare to render the plain text and HTML messages of one email for many recipients.
+
+        Returns a CompiledCourseEmailTemplate.
+        """
+        return CompiledCourseEmailTemplate(self, plaintext, htmltext, course_id)
+
+
+class CompiledCourseEmailTemplate(object):
+    """
+    A CourseEmailTemplate, ready to render the messages of one email for many recipients.
+
+    The work which is the same for every recipient is done once, up front: the templates are
+    split around the message body tag, and the message bodies are checked for %%-encoded
+    keywords.  Only when there are keywords to substitute does rendering look up the recipient,
+    and the course is only looked up once.
+    """
+    def __init__(self, template, plaintext, htmltext, course_id):
+        self.plain_template = self._split(template.plain_template)
+        self.html_template = self._split(template.html_template)
+        self.plaintext = plaintext
+        self.htmltext = htmltext
+        self.has_keywords = any(
+            keyword in plaintext or keyword in htmltext for keyword in KEYWORD_FUNCTION_MAP
+        )
+        self.course = modulestore().get_course(course_id, depth=0) if self.has_keywords else None
+
+    @staticmethod
+    def _split(format_string):
+        """
+        Split a template into the format strings before and after the message body tag
+        (the latter is None if there is no message body tag).
+        """
+        head, tag, tail = format_string.partition(COURSE_EMAIL_MESSAGE_BODY_TAG)
+        return head, (tail if tag else None)
+
+    @staticmethod
+    def _render(template, message_body, context):
+        """
+        Like CourseEmailTemplate._render, for a split template and a substituted message body.
+        """
+        head, tail = template
+        if tail is None:
+            result = head.format(**context)
+        else:
+            result = head.format(**context) + message_body + tail.format(**context)
+        return wrap_message(result)
+
+    def render(self, context):
+        """
+        Returns the plain text and HTML messages for the recipient described by `context`.
+        """
+        plaintext, htmltext = self.plaintext, self.htmltext
+        if self.has_keywords and 'user_id' in context:
+            user = User.objects.get(id=context['user_id'])
+            plaintext = substitute_keywords(plaintext, user, self.course)
+            htmltext = substitute_keywords(htmltext, user, self.course)
+        return (
+            self._render(self.plain_template, plaintext, context),
+            self._render(self.html_template, htmltext, context),
+        )
+
 
 class CourseAuthorization(models.Model):
     """
@@ -41,6 +41,7 @@ from student.roles import CourseStaffRole, CourseInstructorRole
 from instructor_task.models import InstructorTask
 from instructor_task.subtasks import (
     SubtaskStatus,
+    filter_queryset_for_range,
     queue_subtasks_for_query,
     check_subtask_is_valid,
     update_subtask_status,
@@ -91,7 +92,7 @@ BULK_EMAIL_FAILURE_ERRORS = (
 )
 
 
-def _get_recipient_queryset(user_id, to_option, course_id, course_location):
+def _get_recipient_queryset(user_id, to_option, course_id):
     """
     Returns a query set of email recipients corresponding to the requested to_option category.
 
@@ -213,14 +214,14 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
     to_option = email_obj.to_option
     global_email_context = _get_course_email_context(course)
 
-    def _create_send_email_subtask(to_list, initial_subtask_status):
-        """Creates a subtask to send email to a given recipient list."""
+    def _create_send_email_subtask(recipient_range, initial_subtask_status):
+        """Creates a subtask to send email to a given range of recipients."""
         subtask_id = initial_subtask_status.task_id
         new_subtask = send_course_email.subtask(
             (
                 entry_id,
                 email_id,
-                to_list,
+                recipient_range,
                 global_email_context,
                 initial_subtask_status.to_dict(),
             ),
@@ -229,7 +230,7 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
         )
         return new_subtask
 
-    recipient_qset = _get_recipient_queryset(user_id, to_option, course_id, course.location)
+    recipient_qset = _get_recipient_queryset(user_id, to_option, course_id)
     recipient_fields = ['profile__name', 'email']
 
     log.info(u"Task %s: Preparing to queue subtasks for sending emails for course %s, email %s, to_option %s",
@@ -242,6 +243,7 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
         recipient_qset,
         recipient_fields,
         settings.BULK_EMAIL_EMAILS_PER_TASK,
+        item_ranges=True,
     )
 
     # We want to return progress here, as this is what will be stored in the
@@ -264,6 +266,9 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
         - 'profile__name': full name of User.
         - 'email': email address of User.
         - 'pk': primary key of User model.
+        Subtasks are first queued with a range of recipients instead (a dict with 'after_pk'
+        and 'last_pk' keys), which is looked up when the subtask runs.  Retries are queued
+        with the list of recipients remaining to be emailed.
       * `global_email_context`: dict containing values that are unique for this email but the same
         for all recipients of this email.  This dict is to be used to fill in slots in email
         template.  It does not include 'name' and 'email', which will be provided by the to_list.
@@ -289,9 +294,15 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
     """
     subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
     current_task_id = subtask_status.task_id
-    num_to_send = len(to_list)
-    log.info(u"Preparing to send email %s to %d recipients as subtask %s for instructor task %d: context = %s, status=%s",
-             email_id, num_to_send, current_task_id, entry_id, global_email_context, subtask_status)
+    if isinstance(to_list, dict):
+        # The number of recipients in a range isn't known until the range has been looked up.
+        num_to_send = 0
+        recipients_msg = u"recipients in range {}".format(to_list)
+    else:
+        num_to_send = len(to_list)
+        recipients_msg = u"{} recipients".format(num_to_send)
+    log.info(u"Preparing to send email %s to %s as subtask %s for instructor task %d: context = %s, status=%s",
+             email_id, recipients_msg, current_task_id, entry_id, global_email_context, subtask_status)
 
     # Check that the requested subtask is actually known to the current InstructorTask entry.
     # If this fails, it throws an exception, which should fail this subtask immediately.
@@ -322,6 +333,8 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
         # We got here for really unexpected reasons.  Since we don't know how far
         # the task got in emailing, we count all recipients as having failed.
         # It at least keeps the counts consistent.
+        if isinstance(to_list, dict):
+            num_to_send = _count_recipients_in_range(email_id, to_list)
         subtask_status.increment(failed=num_to_send, state=FAILURE)
         update_subtask_status(entry_id, current_task_id, subtask_status)
         raise
@@ -367,6 +380,43 @@ def _filter_optouts_from_recipients(to_list, course_id):
     return to_list, num_optout
 
 
+def _get_recipients_in_range(course_email, recipient_range):
+    """
+    Looks up the recipients of `course_email` in `recipient_range`, excluding
+    student opt-outs in the query itself.
+
+    Returns the recipient list, as well as the number of optouts excluded from it.
+    """
+    course_id = course_email.course_id
+    recipient_qset = filter_queryset_for_range(
+        _get_recipient_queryset(course_email.sender_id, course_email.to_option, course_id),
+        recipient_range,
+    )
+    to_list = list(
+        recipient_qset.exclude(optout__course_id=course_id).values('profile__name', 'email', 'pk')
+    )
+    num_optout = recipient_qset.filter(optout__course_id=course_id).count()
+    return to_list, num_optout
+
+
+def _count_recipients_in_range(email_id, recipient_range):
+    """
+    Returns the number of recipients of the CourseEmail with `email_id` in `recipient_range`,
+    excluding student opt-outs, or 0 if they can't be counted.
+    """
+    try:
+        course_email = CourseEmail.objects.get(id=email_id)
+        course_id = course_email.course_id
+        recipient_qset = filter_queryset_for_range(
+            _get_recipient_queryset(course_email.sender_id, course_email.to_option, course_id),
+            recipient_range,
+        )
+        return recipient_qset.exclude(optout__course_id=course_id).count()
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to count the recipients of email %s in range %s", email_id, recipient_range)
+        return 0
+
+
 def _get_source_address(course_id, course_title):
     """
     Calculates an email address to be used as the 'from-address' for sent emails.
@@ -432,7 +482,11 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     # attempt.  Anyone on the to_list on a retry has already passed the filter
     # that existed at that time, and we don't need to keep checking for changes
     # in the Optout list.
-    if subtask_status.get_retry_count() == 0:
+    if isinstance(to_list, dict):
+        # Look up the range of recipients, which also excludes optouts.
+        to_list, num_optout = _get_recipients_in_range(course_email, to_list)
+        subtask_status.increment(skipped=num_optout)
+    elif subtask_status.get_retry_count() == 0:
         to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email.course_id)
         subtask_status.increment(skipped=num_optout)
 
@@ -449,80 +503,89 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         connection = get_connection()
         connection.open()
 
+        # Prepare the templates once, rather than for each recipient:
+        compiled_template = course_email_template.compile(
+            course_email.text_message, course_email.html_message, course_email.course_id
+        )
+
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # If this task has been retried for rate-limiting reasons, start out sending slowly.
+        send_rate = _SendRate(throttled=subtask_status.retried_nomax > 0)
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
+            # Create emails for the batch of recipients at the end of the list.  Recipients
+            # are popped off of the to_list only once they have been processed.  That way,
+            # the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+            recipients = to_list[:-settings.BULK_EMAIL_SEND_BATCH_SIZE - 1:-1]
+            batch = _MessageBatch()
+            for recipient in recipients:
+                email_context['email'] = recipient['email']
+                email_context['name'] = recipient['profile__name']
+                email_context['user_id'] = recipient['pk']
+
+                # Construct message content using templates and context:
+                plaintext_msg, html_msg = compiled_template.render(email_context)
+
+                email_msg = EmailMultiAlternatives(
+                    subject,
+                    plaintext_msg,
+                    from_addr,
+                    [recipient['email']],
+                    connection=connection
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
+                batch.append(email_msg)
+
+            send_rate.wait()
 
             try:
-                log.debug('Email with id %s to be sent to %s', email_id, email)
-
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
-                    # This will fall through and not retry the message.
-                    log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
-
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
+                log.debug('Email with id %s to be sent to %d recipients', email_id, len(batch))
+
+                dog_stats_api.histogram('course_email.batch_size', len(batch), tags=[_statsd_tag(course_title)])
+                with dog_stats_api.timer('course_email.batch_send.time.overall', tags=[_statsd_tag(course_title)]):
+                    connection.send_messages(batch)
+
+            except SINGLE_EMAIL_FAILURE_ERRORS + INFINITE_RETRY_ERRORS as exc:
+                # The emails before the one that failed were sent.
+                num_sent = batch.num_sent_before_error()
+                _record_sent_emails(email_id, recipients[:num_sent], subtask_status, course_title)
+                del to_list[len(to_list) - num_sent:]
+                email = recipients[num_sent]['email']
+
+                if _is_throttling_error(exc):
+                    # Slow down and send the rest again.  If that doesn't help, this will cause the
+                    # outer handler to catch the exception and retry the entire task.
+                    if not send_rate.throttled():
+                        raise exc
+                    dog_stats_api.increment('course_email.throttled', tags=[_statsd_tag(course_title)])
+                    log.info('Task %s: email with id %s throttled, sending more slowly: %s', task_id, email_id, exc)
+                    subtask_status.increment(retried_nomax=1)
+                    continue
+
                 # This will fall through and not retry the message.
-                log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
+                log.warning('Task %s: email with id %s not delivered to %s due to error %s',
+                            task_id, email_id, email, getattr(exc, 'smtp_error', exc))
                 dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                 subtask_status.increment(failed=1)
+                to_list.pop()
+
+            except Exception:
+                # Pop off the emails that were sent before letting the outer handlers deal with the error.
+                num_sent = batch.num_sent_before_error()
+                _record_sent_emails(email_id, recipients[:num_sent], subtask_status, course_title)
+                del to_list[len(to_list) - num_sent:]
+                raise
 
             else:
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
-                else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            to_list.pop()
+                send_rate.sent()
+                _record_sent_emails(email_id, recipients, subtask_status, course_title)
+                del to_list[len(to_list) - len(recipients):]
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -581,6 +644,97 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         connection.close()
 
 
+class _MessageBatch(list):
+    """
+    A list of the messages to send in one call to a mail connection's `send_messages`.
+
+    Connections send the messages in order, so counting how many messages they have
+    started on tells which message an error comes from.
+    """
+    def __init__(self, *args, **kwargs):
+        super(_MessageBatch, self).__init__(*args, **kwargs)
+        self.num_started = 0
+
+    def __iter__(self):
+        for message in super(_MessageBatch, self).__iter__():
+            self.num_started += 1
+            yield message
+
+    def num_sent_before_error(self):
+        """
+        Returns the number of messages sent before the one that caused an error.
+        """
+        return max(self.num_started - 1, 0)
+
+
+class _SendRate(object):
+    """
+    Adaptive delay between the batches of emails that a subtask sends.
+
+    Throttling errors (SMTP 4xx responses and SES rate limit errors) double the delay,
+    starting from BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS, up to BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS.
+    Each batch that is sent halves it again, down to no delay at all, so that a subtask
+    sends about as fast as the mail server will accept.
+    """
+    def __init__(self, throttled=False):
+        self.min_delay = settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS
+        self.max_delay = settings.BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS
+        self.delay = self.min_delay if throttled else 0
+        self.num_backoffs = 0
+
+    def wait(self):
+        """
+        Sleep before sending the next batch, if we have been throttled.
+        """
+        if self.delay > 0:
+            sleep(self.delay)
+
+    def throttled(self):
+        """
+        Slow down after a throttling error.
+
+        Returns False if we have already slowed down BULK_EMAIL_MAX_THROTTLE_BACKOFFS times in
+        a row without sending anything, and the subtask should be retried instead.
+        """
+        if self.num_backoffs >= settings.BULK_EMAIL_MAX_THROTTLE_BACKOFFS:
+            return False
+        self.num_backoffs += 1
+        self.delay = min(max(self.delay * 2, self.min_delay), self.max_delay)
+        return True
+
+    def sent(self):
+        """
+        Speed up after a batch is sent.
+        """
+        self.num_backoffs = 0
+        self.delay = self.delay / 2 if self.delay > self.min_delay else 0
+
+
+def _is_throttling_error(exc):
+    """
+    Returns whether `exc` means that email is being sent too quickly.
+    """
+    if isinstance(exc, SMTPDataError):
+        # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
+        return exc.smtp_code >= 400 and exc.smtp_code < 500
+    return isinstance(exc, INFINITE_RETRY_ERRORS)
+
+
+def _record_sent_emails(email_id, recipients, subtask_status, course_title):
+    """
+    Counts and logs the emails sent to `recipients`.
+    """
+    if not recipients:
+        return
+    dog_stats_api.increment('course_email.sent', len(recipients), tags=[_statsd_tag(course_title)])
+    for recipient in recipients:
+        if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+            log.info('Email with id %s sent to %s', email_id, recipient['email'])
+        else:
+            log.debug('Email with id %s sent to %s', email_id, recipient['email'])
+    subtask_status.increment(succeeded=len(recipients))
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -279,6 +279,28 @@ class TestEmailErrors(ModuleStoreTestCase):
         with self.assertRaisesRegexp(DuplicateTaskException, 'already being executed'):
             send_course_email(entry_id, bogus_email_id, to_list, global_email_context, subtask_status.to_dict())
 
+    @patch('bulk_email.tasks._send_course_email')
+    def test_send_email_range_fails_unexpectedly(self, mock_send):
+        # All of the recipients in a range are counted as failed.
+        for __ in range(3):
+            CourseEnrollmentFactory.create(user=UserFactory.create(), course_id=self.course.id)
+        email = CourseEmail(course_id=self.course.id, to_option=SEND_TO_ALL, sender=self.instructor)
+        email.save()
+        email_id = email.id  # pylint: disable=no-member
+        entry = InstructorTask.create(self.course.id, "task_type", "task_key", "task_input", self.instructor)
+        entry_id = entry.id  # pylint: disable=no-member
+        subtask_id = "subtask-id-value"
+        initialize_subtask_info(entry, "emailed", 3, [subtask_id])
+        subtask_status = SubtaskStatus.create(subtask_id)
+        to_list = {'after_pk': None, 'last_pk': None}
+        global_email_context = {'course_title': 'dummy course'}
+        mock_send.side_effect = EmailTestException
+        with self.assertRaises(EmailTestException):
+            send_course_email(entry_id, email_id, to_list, global_email_context, subtask_status.to_dict())
+        entry = InstructorTask.objects.get(id=entry_id)
+        status = json.loads(entry.subtasks)['status'][subtask_id]
+        self.assertEquals(status['failed'], 3)
+
     def test_send_email_retried_subtask(self):
         # test at a lower level, to ensure that the course gets checked down below too.
         entry = InstructorTask.create(self.course.id, "task_type", "task_key", "task_input", self.instructor)
@@ -70,6 +70,7 @@ class CourseEmailTemplateTest(TestCase):
     def setUp(self):
         # load initial content (since we don't run migrations as part of tests):
         call_command("loaddata", "course_email_template.json")
+        self.course_id = SlashSeparatedCourseKey('edX', 'test_course', '2014_T1')
 
     def _get_sample_plain_context(self):
         """Provide sample context sufficient for rendering plaintext template"""
@@ -130,6 +131,33 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def test_compiled_render(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        compiled = template.compile("My new plain text.", "My new html text.", self.course_id)
+        self.assertEquals(
+            compiled.render(context),
+            (
+                template.render_plaintext("My new plain text.", context),
+                template.render_htmltext("My new html text.", context),
+            )
+        )
+
+    @patch('bulk_email.models.modulestore')
+    @patch.dict('bulk_email.models.KEYWORD_FUNCTION_MAP', {'%%USER_NAME%%': lambda user, course: user.username})
+    def test_compiled_render_keywords(self, mock_modulestore):
+        user = UserFactory.create()
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        context['user_id'] = user.id
+        compiled = template.compile("Dear %%USER_NAME%%", "<p>Dear %%USER_NAME%%</p>", self.course_id)
+        plaintext, htmltext = compiled.render(context)
+        self.assertIn(u"Dear {}".format(user.username), plaintext)
+        self.assertIn(u"<p>Dear {}</p>".format(user.username), htmltext)
+        # The course is only looked up once, when the template is compiled
+        compiled.render(context)
+        self.assertEquals(mock_modulestore.return_value.get_course.call_count, 1)
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
@@ -27,6 +27,7 @@ from celery.states import SUCCESS, FAILURE
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from bulk_email.models import CourseEmail, Optout, SEND_TO_ALL
 
@@ -273,6 +274,59 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
         # Test that celery handles permanent SMTPDataErrors by failing and not retrying.
         self._test_email_address_failures(SESDomainEndsWithDotError(554, "Email address ends with a dot"))
 
+    def _send_messages_failing_at(self, failures):
+        """
+        Returns a side effect for send_messages that goes through the messages in order,
+        raising the exception in `failures` (a dict from the index of the message attempted
+        to the exception) when it reaches that message.  Each exception is raised once.
+        """
+        attempts = [0]
+
+        def send_messages(messages):
+            """Attempt to send each message in turn."""
+            for __ in messages:
+                exception = failures.pop(attempts[0], None)
+                attempts[0] += 1
+                if exception is not None:
+                    raise exception
+        return send_messages
+
+    @override_settings(BULK_EMAIL_SEND_BATCH_SIZE=3)
+    def test_successful_in_batches(self):
+        num_emails = 8
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+            self.assertEquals(get_conn.return_value.send_messages.call_count, 3)
+
+    @override_settings(BULK_EMAIL_SEND_BATCH_SIZE=3)
+    def test_email_address_failure_in_batch(self):
+        num_emails = 8
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            # The middle email of the second batch fails; the rest are sent once each.
+            get_conn.return_value.send_messages.side_effect = self._send_messages_failing_at(
+                {4: SESAddressBlacklistedError(554, "Email address is blacklisted")}
+            )
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails - 1, failed=1)
+            self.assertEquals(get_conn.return_value.send_messages.call_count, 3)
+
+    @override_settings(BULK_EMAIL_SEND_BATCH_SIZE=3)
+    def test_throttling_in_batch(self):
+        num_emails = 8
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            # The middle email of the second batch is throttled, and is sent again with the rest.
+            get_conn.return_value.send_messages.side_effect = self._send_messages_failing_at(
+                {4: SMTPDataError(455, "Throttling: Sending rate exceeded")}
+            )
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails, retried_nomax=1)
+            self.assertEquals(get_conn.return_value.send_messages.call_count, 4)
+
     def _test_retry_after_limited_retry_error(self, exception):
         """Test that celery handles connection failures by retrying."""
         # If we want the batch to succeed, we need to send fewer emails
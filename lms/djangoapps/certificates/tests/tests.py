@@ -8,7 +8,10 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 from student.tests.factories import UserFactory
-from certificates.models import CertificateStatuses, GeneratedCertificate, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, GeneratedCertificate, certificate_status_for_student, certificate_statuses_for_student
+)
+from certificates.tests.factories import GeneratedCertificateFactory
 
 
 class CertificatesModelTest(ModuleStoreTestCase):
@@ -23,3 +26,18 @@ class CertificatesModelTest(ModuleStoreTestCase):
         certificate_status = certificate_status_for_student(student, course.id)
         self.assertEqual(certificate_status['status'], CertificateStatuses.unavailable)
         self.assertEqual(certificate_status['mode'], GeneratedCertificate.MODES.honor)
+
+    def test_certificate_statuses_for_student(self):
+        student = UserFactory()
+        graded_course = CourseFactory.create(org='edx', number='graded', display_name='Graded Course')
+        ungraded_course = CourseFactory.create(org='edx', number='ungraded', display_name='Ungraded Course')
+        GeneratedCertificateFactory.create(
+            user=student, course_id=graded_course.id, status=CertificateStatuses.notpassing, grade='0.2'
+        )
+
+        course_ids = [graded_course.id, ungraded_course.id]
+        with self.assertNumQueries(1):
+            statuses = certificate_statuses_for_student(student, course_ids)
+        self.assertEqual(statuses, {
+            course_id: certificate_status_for_student(student, course_id) for course_id in course_ids
+        })
@@ -5,7 +5,8 @@ from util.json_request import JsonResponse
 import json
 
 from courseware import models
-from django.db.models import Count
+from django.conf import settings
+from django.db.models import Count, Sum
 from django.utils.translation import ugettext as _
 
 from xmodule.modulestore.django import modulestore
@@ -32,12 +33,21 @@ def get_problem_grade_distribution(course_id):
         attempting the problem
     """
 
-    # Aggregate query on studentmodule table for grade data for all problems in course
-    db_query = models.StudentModule.objects.filter(
-        course_id__exact=course_id,
-        grade__isnull=False,
-        module_type__exact="problem",
-    ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
+    if settings.FEATURES.get('ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS'):
+        # Read the counts kept up to date in the gradedistribution table
+        db_query = models.GradeDistribution.objects.filter(
+            course_id__exact=course_id,
+            grade__isnull=False,
+            module_type__exact="problem",
+            count__gt=0,
+        ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Sum('count'))
+    else:
+        # Aggregate query on studentmodule table for grade data for all problems in course
+        db_query = models.StudentModule.objects.filter(
+            course_id__exact=course_id,
+            grade__isnull=False,
+            module_type__exact="problem",
+        ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
 
     prob_grade_distrib = {}
     total_student_count = {}
@@ -11,6 +11,7 @@ from mock import patch
 
 from capa.tests.response_xml_factory import StringResponseXMLFactory
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
+from courseware.models import GradeDistribution
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory, AdminFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -104,6 +105,13 @@ class TestGetProblemGradeDistribution(ModuleStoreTestCase):
         for val in total_student_count.values():
             self.assertEquals(USER_COUNT, val)
 
+    def test_get_precomputed_problem_grade_distribution(self):
+
+        expected = get_problem_grade_distribution(self.course.id)
+        GradeDistribution.rebuild(self.course.id)
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS': True}):
+            self.assertEquals(expected, get_problem_grade_distribution(self.course.id))
+
     def test_get_sequential_open_distibution(self):
 
         sequential_open_distrib = get_sequential_open_distrib(self.course.id)
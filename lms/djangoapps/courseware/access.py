@@ -5,6 +5,8 @@ import logging
 from datetime import datetime, timedelta
 import pytz
 
+import dogstats_wrapper as dog_stats_api
+
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 
@@ -27,6 +29,10 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed
 from opaque_keys.edx.keys import CourseKey, UsageKey
 DEBUG_ACCESS = False
 
+# has_access is called thousands of times a page, so only report a sample of
+# the decision cache hits and misses
+ACCESS_CACHE_METRICS_SAMPLE_RATE = 0.01
+
 log = logging.getLogger(__name__)
 
 
@@ -64,11 +70,36 @@ def has_access(user, action, obj, course_key=None):
 
     Returns a bool.  It is up to the caller to actually deny access in a way
     that makes sense in context.
+
+    If FEATURES['ENABLE_ACCESS_DECISION_CACHE'] is set, decisions are cached on
+    the user object (see `_access_decisions`).
     """
     # Just in case user is passed in as None, make them anonymous
     if not user:
         user = AnonymousUser()
 
+    if settings.FEATURES.get('ENABLE_ACCESS_DECISION_CACHE'):
+        decision_key = _access_decision_key(user, action, obj, course_key)
+        if decision_key is not None:
+            decisions = _access_decisions(user)
+            if decision_key in decisions:
+                dog_stats_api.increment(
+                    'courseware.access.cache', tags=['result:hit'], sample_rate=ACCESS_CACHE_METRICS_SAMPLE_RATE
+                )
+            else:
+                dog_stats_api.increment(
+                    'courseware.access.cache', tags=['result:miss'], sample_rate=ACCESS_CACHE_METRICS_SAMPLE_RATE
+                )
+                decisions[decision_key] = _has_access(user, action, obj, course_key)
+            return decisions[decision_key]
+
+    return _has_access(user, action, obj, course_key)
+
+
+def _has_access(user, action, obj, course_key):
+    """
+    Decide `has_access`, without the decision cache.
+    """
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
     if isinstance(obj, CourseDescriptor):
@@ -99,6 +130,41 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+def _access_decisions(user):
+    """
+    Return the dict of the has_access decisions cached for `user`.
+
+    Like the user's RoleCache (see student.roles), the decisions are kept on
+    the user object, so they last as long as the request that loaded the user,
+    and are dropped along with the RoleCache when the user's roles change.
+    """
+    # pylint: disable=protected-access
+    if not hasattr(user, '_access_decisions'):
+        user._access_decisions = {}
+    return user._access_decisions
+
+
+def _access_decision_key(user, action, obj, course_key):
+    """
+    Return the key to cache the decision of `has_access(user, action, obj,
+    course_key)` under, or None if it shouldn't be cached.
+    """
+    if isinstance(obj, XModule):
+        # Decided (and cached) for its descriptor
+        return None
+    if isinstance(obj, CourseDescriptor):
+        obj_key = ('course', obj.id)
+    elif isinstance(obj, ErrorDescriptor):
+        obj_key = ('error', obj.scope_ids.usage_id)
+    elif isinstance(obj, XBlock):
+        obj_key = ('block', obj.scope_ids.usage_id)
+    elif isinstance(obj, (CourseKey, UsageKey, basestring)):
+        obj_key = (type(obj).__name__, obj)
+    else:
+        return None
+    return (action, obj_key, course_key, is_masquerading_as_student(user))
+
+
 # ================ Implementation helpers ================================
 def _has_access_course_desc(user, action, course):
     """
@@ -0,0 +1,169 @@
+"""
+An index of the chapters and sections of a course, from which the courseware
+table of contents is built for each user without instantiating any of the
+course's modules.
+
+The index depends only on the course content, so it's cached under the version
+of that content (see `courses.get_course_version`). Everything that depends on
+the user (access to each chapter and section, and extended due dates) is
+applied when the table of contents is built.
+"""
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import UTC
+
+from courseware.access import has_access
+from courseware.masquerade import is_masquerading_as_student
+from courseware.models import StudentModule
+from student.roles import CourseBetaTesterRole
+from xmodule.error_module import ErrorDescriptor
+from xmodule.fields import Date
+
+DATE_FIELD = Date()
+
+
+def _outline_entry(descriptor):
+    """
+    The index entry of a chapter or section: what the table of contents shows,
+    and what it takes to decide who may see it.
+    """
+    return {
+        'location': descriptor.location,
+        'url_name': descriptor.url_name,
+        'display_name': descriptor.display_name_with_default,
+        'hide_from_toc': descriptor.hide_from_toc,
+        'start': None if 'detached' in descriptor._class_tags else descriptor.start,  # pylint: disable=protected-access
+        'days_early_for_beta': descriptor.days_early_for_beta,
+        'staff_only': descriptor.visible_to_staff_only or isinstance(descriptor, ErrorDescriptor),
+    }
+
+
+def build_course_outline(course):
+    """
+    Return the outline index of `course`: a list of its chapters, each with a
+    list of its sections.
+    """
+    outline = []
+    for chapter in course.get_display_items():
+        chapter_entry = _outline_entry(chapter)
+        chapter_entry['sections'] = sections = []
+        for section in chapter.get_display_items():
+            section_entry = _outline_entry(section)
+            section_entry.update({
+                'format': section.format if section.format is not None else '',
+                'due': section.due,
+                'graded': section.graded,
+            })
+            sections.append(section_entry)
+        outline.append(chapter_entry)
+    return outline
+
+
+def get_course_outline(course):
+    """
+    Return the outline index of `course`, from the cache if it has been built
+    for the current version of the course content.
+    """
+    # Imported here, as courseware.courses imports module_render, which uses this module.
+    from courseware.courses import get_course_version
+
+    version = get_course_version(course)
+    if version is None:
+        return build_course_outline(course)
+
+    key = u'course_outline.{}.{}'.format(course.id, version)
+    outline = cache.get(key)
+    if outline is None:
+        outline = build_course_outline(course)
+        cache.set(key, outline, settings.COURSE_OUTLINE_CACHE_TIMEOUT)
+    return outline
+
+
+def _can_load(entry, is_staff, is_beta_tester, now):
+    """
+    Whether a user may see the chapter or section of the outline `entry`, by
+    the same rules as `has_access(user, 'load', descriptor)`.
+    """
+    if is_staff:
+        return True
+    if entry['staff_only']:
+        return False
+    if entry['start'] is None:
+        return True
+    effective_start = entry['start']
+    if is_beta_tester and entry['days_early_for_beta'] is not None:
+        effective_start -= timedelta(entry['days_early_for_beta'])
+    return now > effective_start
+
+
+def _extended_due_dates(user, course_key, locations):
+    """
+    Return a dict of the due dates at `locations` that have been extended for
+    `user`, by location.
+    """
+    if not locations or not user.is_authenticated():
+        return {}
+
+    extended = {}
+    student_modules = StudentModule.objects.filter(
+        student=user, course_id=course_key, module_state_key__in=locations
+    ).values_list('module_state_key', 'state')
+    for location, state in student_modules:
+        extended_due = json.loads(state or '{}').get('extended_due')
+        if extended_due:
+            extended[location.map_into_course(course_key)] = DATE_FIELD.from_json(extended_due)
+    return extended
+
+
+def toc_from_course_outline(user, course, active_chapter, active_section):
+    """
+    Build the table of contents of `course` for `user`, in the format of
+    `module_render.toc_for_course`, from the course outline index.
+    """
+    is_staff = has_access(user, 'staff', course, course.id)
+    is_beta_tester = CourseBetaTesterRole(course.id).has_user(user)
+    if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user):
+        now = datetime.max.replace(tzinfo=UTC())
+    else:
+        now = datetime.now(UTC())
+
+    chapters = []
+    for chapter in get_course_outline(course):
+        if chapter['hide_from_toc'] or not _can_load(chapter, is_staff, is_beta_tester, now):
+            continue
+        sections = [
+            section for section in chapter['sections']
+            if not section['hide_from_toc'] and _can_load(section, is_staff, is_beta_tester, now)
+        ]
+        chapters.append((chapter, sections))
+
+    extended_due_dates = _extended_due_dates(user, course.id, [
+        section['location'] for __, sections in chapters for section in sections if section['due']
+    ])
+
+    toc = []
+    for chapter, sections in chapters:
+        toc_sections = []
+        for section in sections:
+            due = section['due']
+            extended_due = extended_due_dates.get(section['location'])
+            if due and extended_due and extended_due > due:
+                due = extended_due
+            toc_sections.append({
+                'display_name': section['display_name'],
+                'url_name': section['url_name'],
+                'format': section['format'],
+                'due': due,
+                'active': chapter['url_name'] == active_chapter and section['url_name'] == active_section,
+                'graded': section['graded'],
+            })
+        toc.append({
+            'display_name': chapter['display_name'],
+            'url_name': chapter['url_name'],
+            'sections': toc_sections,
+            'active': chapter['url_name'] == active_chapter,
+        })
+    return toc
@@ -58,6 +58,24 @@ def get_course(course_id, depth=0):
     return course
 
 
+def get_course_version(course):
+    """
+    Return a string identifying the current version of the content of
+    `course`, or None if the modulestore holding the course doesn't record when
+    its content was edited (e.g. XML courses).
+
+    Anything computed only from the course content can be stored under this
+    version without any further invalidation.
+    """
+    get_subtree_edited_on = getattr(course.runtime, 'get_subtree_edited_on', None)
+    if get_subtree_edited_on is None:
+        return None
+    edited_on = get_subtree_edited_on(course)
+    if edited_on is None:
+        return None
+    return edited_on.isoformat()
+
+
 # TODO please rename this function to get_course_by_key at next opportunity!
 def get_course_by_id(course_key, depth=0):
     """
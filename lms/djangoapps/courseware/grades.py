@@ -1,32 +1,218 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+import hashlib
 import json
 import random
 import logging
 
 from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.utils import timezone
 from django.test.client import RequestFactory
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, chunks
 from student.models import anonymous_id_for_user
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .models import PersistentCourseGrade, StudentModule
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import UsageKey
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students graded together by iterate_grades_for. The StudentModule
+# rows for every student in a chunk are loaded up front in bulk queries.
+GRADING_STUDENT_CHUNK_SIZE = 100
+
+
+class StudentModuleScoreCache(object):
+    """
+    The StudentModule rows of a group of students for the scorable blocks of a
+    course, loaded in bulk.
+
+    When grading a single student, `_grade` asks the database whether each
+    graded section has been touched, and `get_score` then loads the
+    StudentModule of every scored block one query at a time. When grading many
+    students this cache replaces all of those queries with a few bulk queries
+    per chunk of students.
+    """
+    def __init__(self, course_key, students, usage_keys, chunk_size=500):
+        """
+        course_key: the course in the context of which StudentModules are loaded
+        students: the Users for whom StudentModules are loaded
+        usage_keys: the usage keys of the blocks that can affect grading
+        chunk_size: the maximum number of usage keys per query
+        """
+        self.course_key = course_key
+        self._modules = defaultdict(dict)
+
+        student_ids = [student.id for student in students]
+        if not student_ids:
+            return
+
+        for usage_key_chunk in chunks(set(usage_keys), chunk_size):
+            # The state blob is not needed for grading and can be large, so
+            # don't load it.
+            queryset = StudentModule.objects.filter(
+                course_id=course_key,
+                student_id__in=student_ids,
+                module_state_key__in=usage_key_chunk,
+            ).defer('state')
+            for student_module in queryset:
+                usage_key = student_module.module_state_key.map_into_course(course_key)
+                self._modules[student_module.student_id][usage_key] = student_module
+
+    def modules_for(self, student):
+        """
+        Return a dict of usage key -> StudentModule for the given student.
+        Blocks the student has never interacted with are not in the dict.
+        """
+        return self._modules.get(student.id, {})
+
+
+def _release_date(descriptor):
+    """
+    Returns the date from which `descriptor` is visible to (beta) students,
+    which changes what they can score, or None if it has no start date.
+    """
+    if descriptor.start is None:
+        return None
+    days_early_for_beta = getattr(descriptor, 'days_early_for_beta', None)
+    if days_early_for_beta:
+        return descriptor.start - timedelta(days=days_early_for_beta)
+    return descriptor.start
+
+
+class GradingContext(object):
+    """
+    A compact form of `CourseDescriptor.grading_context`, holding usage keys
+    instead of descriptors.
+
+    Building `CourseDescriptor.grading_context` walks and instantiates the
+    whole descriptor tree of the course. The compact form only depends on the
+    course content, so it is cached under the course version and shared by
+    all processes. Section descriptors are then only loaded for the sections
+    that actually need grading.
+    """
+    CACHE_KEY_FORMAT = u"courseware.grading_context.v2.{}.{}"
+
+    def __init__(self, course):
+        self.course = course
+        self._section_descriptors = None
+
+        course_version = courses.get_course_version(course)
+        cache_key = self.CACHE_KEY_FORMAT.format(course.id, course_version)
+        context = cache.get(cache_key) if course_version is not None else None
+        if context is None:
+            context = self._compact_grading_context(course)
+            if course_version is not None:
+                cache.set(cache_key, context)
+
+        self.graded_sections = {}
+        for section_format, sections in context['graded_sections'].iteritems():
+            self.graded_sections[section_format] = [
+                {
+                    'section_key': self._usage_key(section['section_key']),
+                    'display_name': section['display_name'],
+                    'scorable_keys': [self._usage_key(key) for key in section['scorable_keys']],
+                    'always_recalculate': section['always_recalculate'],
+                }
+                for section in sections
+            ]
+        self.release_dates = context['release_dates']
+
+    @staticmethod
+    def _compact_grading_context(course):
+        """
+        Returns the picklable, compact form of the grading context of `course`.
+        """
+        graded_sections = {}
+        release_dates = set()
+        for section_format, sections in course.grading_context['graded_sections'].iteritems():
+            for section in sections:
+                for descriptor in [section['section_descriptor']] + section['xmoduledescriptors']:
+                    release_dates.add(_release_date(descriptor))
+            graded_sections[section_format] = [
+                {
+                    'section_key': unicode(section['section_descriptor'].location),
+                    'display_name': section['section_descriptor'].display_name_with_default,
+                    'scorable_keys': [unicode(descriptor.location) for descriptor in section['xmoduledescriptors']],
+                    'always_recalculate': any(
+                        descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+                    ),
+                }
+                for section in sections
+            ]
+        release_dates.discard(None)
+        return {'graded_sections': graded_sections, 'release_dates': sorted(release_dates)}
+
+    def _usage_key(self, serialized_key):
+        """
+        Parses a usage key stored in the compact grading context.
+        """
+        return UsageKey.from_string(serialized_key).map_into_course(self.course.id)
+
+    def next_release_date(self, after):
+        """
+        Returns the first release date of graded content later than `after`,
+        or None if there is none.
+        """
+        for release_date in self.release_dates:
+            if release_date > after:
+                return release_date
+        return None
+
+    @property
+    def always_recalculate(self):
+        """
+        Whether any graded module in the course must always be rescored.
+        """
+        return any(
+            section['always_recalculate']
+            for sections in self.graded_sections.itervalues()
+            for section in sections
+        )
+
+    @property
+    def scorable_usage_keys(self):
+        """
+        The usage keys of every module that can affect a student's grade.
+        """
+        return [
+            usage_key
+            for sections in self.graded_sections.itervalues()
+            for section in sections
+            for usage_key in section['scorable_keys']
+        ]
+
+    def section_descriptor(self, section_key):
+        """
+        Returns the descriptor of the graded section with the given usage key.
+
+        Only the chapters and sections of the course are loaded to find it, not
+        their descendants.
+        """
+        if self._section_descriptors is None:
+            self._section_descriptors = {
+                section.location: section
+                for chapter in self.course.get_children()
+                for section in chapter.get_children()
+            }
+        return self._section_descriptors[section_key]
+
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):
     """
@@ -142,16 +328,127 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, student_modules=None, grading_context=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
+
+    If the ENABLE_PERSISTENT_GRADES feature is on, the grade summary is read
+    from (and after computation, written to) the PersistentCourseGrade table.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        if grading_context is None:
+            grading_context = GradingContext(course)
+
+        course_version = _persistent_grade_version(course, keep_raw_scores, grading_context)
+        if course_version is None:
+            return _grade(student, request, course, keep_raw_scores, student_modules, grading_context)
+
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+        )
+        persistent_grade = _get_persistent_grade(student, course)
+        gradeset = _read_persistent_grade(persistent_grade, course_version, submissions_scores)
+        if gradeset is None:
+            gradeset = _grade(student, request, course, keep_raw_scores, student_modules, grading_context)
+            valid_until = grading_context.next_release_date(timezone.now())
+            _write_persistent_grade(persistent_grade, course_version, submissions_scores, gradeset, valid_until)
+        return gradeset
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _persistent_grade_version(course, keep_raw_scores, grading_context):
+    """
+    Returns the course version under which grades for `course` are persisted,
+    or None if grades for this course must always be computed from scratch.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES') or settings.GENERATE_PROFILE_SCORES:
+        return None
+    # Raw scores are only requested for reports and debugging, so they aren't stored.
+    if keep_raw_scores:
+        return None
+    # Scores of these modules change independently of StudentModule, so stored
+    # grades could never be trusted.
+    if grading_context.always_recalculate:
+        return None
+    return courses.get_course_version(course)
+
+
+def _submissions_fingerprint(submissions_scores):
+    """
+    Returns a short string which changes whenever the given scores from the
+    submissions API change. The submissions API doesn't notify the LMS of new
+    scores, so this is stored alongside a persisted grade to detect them.
+    """
+    return hashlib.md5(json.dumps(sorted(submissions_scores.items()))).hexdigest()
+
+
+def _get_persistent_grade(student, course):
+    """
+    Returns the PersistentCourseGrade row of `student` in `course`, creating
+    an empty one if there is none.
+
+    The transaction is committed first, so that the row and the scores the
+    grade is then computed from are read from a fresh snapshot, and a new row
+    is committed straight away, so that invalidations made while the grade is
+    computed find it and bump its generation.
+    """
+    transaction.commit()
+    persistent_grade, created = PersistentCourseGrade.objects.get_or_create(
+        user=student, course_id=course.id, defaults={'course_version': '', 'gradeset': ''}
+    )
+    if created:
+        transaction.commit()
+    return persistent_grade
+
+
+def _read_persistent_grade(persistent_grade, course_version, submissions_scores):
+    """
+    Returns the grade summary stored in `persistent_grade`, or None if it
+    isn't valid.
+    """
+    if not persistent_grade.gradeset or persistent_grade.course_version != course_version:
+        return None
+    if persistent_grade.valid_until is not None and persistent_grade.valid_until <= timezone.now():
+        return None
+
+    stored = json.loads(persistent_grade.gradeset)
+    if stored['submissions'] != _submissions_fingerprint(submissions_scores):
+        return None
+
+    gradeset = stored['gradeset']
+    # JSON turned the Score namedtuples into lists
+    gradeset['totaled_scores'] = {
+        section_format: [Score(*score) for score in scores]
+        for section_format, scores in gradeset['totaled_scores'].iteritems()
+    }
+    return gradeset
+
+
+def _write_persistent_grade(persistent_grade, course_version, submissions_scores, gradeset, valid_until):
+    """
+    Stores a grade summary computed from the generation of `persistent_grade`
+    it was read at, unless the row was invalidated since.
+    """
+    stored = json.dumps({
+        'gradeset': gradeset,
+        'submissions': _submissions_fingerprint(submissions_scores),
+    })
+    updated = PersistentCourseGrade.objects.filter(
+        id=persistent_grade.id, generation=persistent_grade.generation
+    ).update(
+        course_version=course_version,
+        gradeset=stored,
+        valid_until=valid_until,
+        modified=timezone.now(),
+    )
+    if not updated:
+        log.info(
+            "Grade for user %s in course %s was invalidated while it was computed, so it wasn't persisted",
+            persistent_grade.user_id, persistent_grade.course_id
+        )
+
+
+def _grade(student, request, course, keep_raw_scores, student_modules=None, grading_context=None):
     """
     Unwrapped version of "grade"
 
@@ -169,10 +466,17 @@ def _grade(student, request, course, keep_raw_scores):
       make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - student_modules : an optional dict of usage key -> StudentModule holding
+      every StudentModule of this student for the course's graded blocks (see
+      StudentModuleScoreCache). If given, no StudentModule queries are made to
+      find out which sections and problems have been attempted.
+    - grading_context : an optional GradingContext for the course, which is
+      otherwise built (or read from the cache) on every call.
 
     More information on the format is in the docstring for CourseGrader.
     """
-    grading_context = course.grading_context
+    if grading_context is None:
+        grading_context = GradingContext(course)
     raw_scores = []
 
     # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
@@ -185,41 +489,41 @@ def _grade(student, request, course, keep_raw_scores):
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
-    for section_format, sections in grading_context['graded_sections'].iteritems():
+    for section_format, sections in grading_context.graded_sections.iteritems():
         format_scores = []
         for section in sections:
-            section_descriptor = section['section_descriptor']
-            section_name = section_descriptor.display_name_with_default
+            section_name = section['display_name']
 
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
-                descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
-            )
+            should_grade_section = section['always_recalculate']
 
             # If there are no problems that always have to be regraded, check to
             # see if any of our locations are in the scores from the submissions
             # API. If scores exist, we have to calculate grades for this section.
             if not should_grade_section:
                 should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
-                    for descriptor in section['xmoduledescriptors']
+                    usage_key.to_deprecated_string() in submissions_scores
+                    for usage_key in section['scorable_keys']
                 )
 
-            if not should_grade_section:
+            if not should_grade_section and student_modules is not None:
+                should_grade_section = any(
+                    usage_key in student_modules for usage_key in section['scorable_keys']
+                )
+            elif not should_grade_section:
                 with manual_transaction():
                     should_grade_section = StudentModule.objects.filter(
                         student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
+                        module_state_key__in=section['scorable_keys']
                     ).exists()
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
             if should_grade_section:
                 scores = []
+                section_descriptor = grading_context.section_descriptor(section['section_key'])
 
                 def create_module(descriptor):
                     '''creates an XModule instance given a descriptor'''
@@ -232,7 +536,8 @@ def _grade(student, request, course, keep_raw_scores):
                 for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
 
                     (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+                        student_modules=student_modules
                     )
                     if correct is None and total is None:
                         continue
@@ -262,7 +567,7 @@ def _grade(student, request, course, keep_raw_scores):
             else:
                 log.info(
                     "Unable to grade a section with a total possible score of zero. " +
-                    str(section_descriptor.location)
+                    str(section['section_key'])
                 )
 
         totaled_scores[section_format] = format_scores
@@ -407,7 +712,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_modules=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -421,6 +726,8 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_modules: An optional dict of usage keys to this user's StudentModules.
+           If given, it is used instead of querying for the StudentModule.
     """
     scores_cache = scores_cache or {}
 
@@ -447,14 +754,17 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_modules is not None:
+        student_module = student_modules.get(problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
@@ -500,7 +810,19 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+def _chunk_students(students, chunk_size):
+    """
+    Yields lists of at most `chunk_size` students from the iterable `students`
+    """
+    students = iter(students)
+    while True:
+        student_chunk = list(islice(students, chunk_size))
+        if not student_chunk:
+            return
+        yield student_chunk
+
+
+def iterate_grades_for(course_id, students, chunk_size=GRADING_STUDENT_CHUNK_SIZE):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -508,6 +830,9 @@ def iterate_grades_for(course_id, students):
     If an error occurred, gradeset will be an empty dict and err_msg will be an
     exception message. If there was no error, err_msg is an empty string.
 
+    Students are graded in chunks of `chunk_size`. The StudentModules of every
+    student in a chunk are loaded together in bulk before any of them is graded.
+
     The gradeset is a dictionary with the following fields:
 
     - grade : A final letter grade.
@@ -519,31 +844,41 @@ def iterate_grades_for(course_id, students):
     - raw_scores: contains scores for every graded module
     """
     course = courses.get_course_by_id(course_id)
+    grading_context = GradingContext(course)
+    graded_usage_keys = grading_context.scorable_usage_keys
 
     # We make a fake request because grading code expects to be able to look at
     # the request. We have to attach the correct user to the request before
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course_id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    for student_chunk in _chunk_students(students, chunk_size):
+        with dog_stats_api.timer('lms.grades.iterate_grades_for.prefetch', tags=[u'action:{}'.format(course_id)]):
+            score_cache = StudentModuleScoreCache(course.id, student_chunk, graded_usage_keys)
+
+        for student in student_chunk:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade(
+                        student, request, course,
+                        student_modules=score_cache.modules_for(student),
+                        grading_context=grading_context,
+                    )
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course_id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
@@ -0,0 +1,102 @@
+"""
+A Django command that runs the scripts of a course's problems, so that their
+results are in the sandboxed execution cache before learners load them.
+
+Problems which are never rerandomized always use the same seed, so their
+scripts are run once. Randomized problems use one of many seeds, so their
+scripts are run for the first --seeds of them, by default all of the seeds
+which per-student randomization can choose.
+"""
+
+from optparse import make_option
+from textwrap import dedent
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from edxmako.shortcuts import render_to_string
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
+from xmodule.capa_base import NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore, ModuleI18nService
+
+
+class Command(BaseCommand):
+    """
+    Run the scripts of all of the problems in a course, caching their results.
+    """
+    args = "<course_id>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--seeds',
+                    action='store',
+                    type='int',
+                    default=NUM_RANDOMIZATION_BINS,
+                    help='How many seeds to run randomized problems for (default {})'.format(
+                        NUM_RANDOMIZATION_BINS
+                    )),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("course_id not specified")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id")
+
+        store = modulestore()
+        if store.get_course(course_key) is None:
+            raise CommandError("Invalid course_id")
+
+        unsafely = can_execute_unsafe_code(course_key)
+        zip_lib = get_python_lib_zip(contentstore, course_key)
+
+        num_problems = num_errors = 0
+        for descriptor in store.get_items(course_key, qualifiers={'category': 'problem'}):
+            if descriptor.rerandomize == RANDOMIZATION.NEVER:
+                seeds = [1]
+            else:
+                seeds = range(options['seeds'])
+
+            for seed in seeds:
+                try:
+                    self.run_problem_scripts(descriptor, seed, unsafely, zip_lib)
+                except Exception as exc:  # pylint: disable=broad-except
+                    num_errors += 1
+                    self.stderr.write(u"{} (seed {}): {}\n".format(descriptor.location, seed, exc))
+            num_problems += 1
+
+        self.stdout.write(u"Ran the scripts of {} problems ({} errors)\n".format(num_problems, num_errors))
+
+    def run_problem_scripts(self, descriptor, seed, unsafely, zip_lib):
+        """
+        Load the problem for `descriptor` with `seed`, which runs its scripts.
+        """
+        capa_system = LoncapaSystem(
+            ajax_url='',
+            anonymous_student_id=None,
+            cache=get_safe_exec_cache(),
+            can_execute_unsafe_code=lambda: unsafely,
+            get_python_lib_zip=lambda: zip_lib,
+            DEBUG=False,
+            filestore=descriptor.runtime.resources_fs,
+            i18n=ModuleI18nService(),
+            node_path=settings.NODE_PATH,
+            render_template=render_to_string,
+            seed=seed,
+            STATIC_URL=settings.STATIC_URL,
+            xqueue=None,
+            matlab_api_key=descriptor.matlab_api_key,
+        )
+        LoncapaProblem(
+            problem_text=descriptor.data,
+            id=descriptor.location.html_id(),
+            capa_system=capa_system,
+            seed=seed,
+        )
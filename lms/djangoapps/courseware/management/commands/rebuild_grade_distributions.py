@@ -0,0 +1,49 @@
+"""
+A Django command that recounts the grade distributions of courses from their
+StudentModules.
+
+The distributions are kept up to date as scores change, so this is only needed
+to fill them in for existing courses, or to repair them. Scores that change in
+a course while it is being rebuilt may be counted twice or not at all, so run
+it when the course is quiet.
+"""
+
+from optparse import make_option
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseware.models import GradeDistribution
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the grade distributions of the given courses.
+    """
+    args = "<course_id course_id ...>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--all',
+                    action='store_true',
+                    dest='all',
+                    default=False,
+                    help='Rebuild the grade distributions of all courses'),
+    )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            course_keys = [course.id for course in modulestore().get_courses()]
+        elif args:
+            try:
+                course_keys = [CourseKey.from_string(arg) for arg in args]
+            except InvalidKeyError:
+                raise CommandError("Invalid course_id")
+        else:
+            raise CommandError("course_id not specified")
+
+        for course_key in course_keys:
+            num_rows = GradeDistribution.rebuild(course_key)
+            self.stdout.write(u"Rebuilt {} grade distributions for {}\n".format(num_rows, course_key))
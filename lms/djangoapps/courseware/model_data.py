@@ -3,8 +3,9 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+from collections import namedtuple
 from itertools import chain
+from time import time
 from .models import (
     StudentModule,
     XModuleUserStateSummaryField,
@@ -18,6 +19,8 @@ from opaque_keys.edx.asides import AsideUsageKeyV1
 
 from django.db import DatabaseError
 
+import dogstats_wrapper as dog_stats_api
+
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
 from xblock.fields import Scope, UserScope
@@ -34,6 +37,11 @@ class InvalidWriteError(Exception):
     """
 
 
+# The data to prefetch for a single scope: the names of the fields in that scope,
+# and the usage ids and block types of only those blocks that have such fields.
+ScopePrefetch = namedtuple('ScopePrefetch', ['field_names', 'usage_ids', 'block_types'])
+
+
 def chunks(items, chunk_size):
     """
     Yields the values from items in chunks of size chunk_size
@@ -47,7 +55,7 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None, student_modules=None):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -60,10 +68,13 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
         asides: The list of aside types to load, or None to prefetch no asides.
+        student_modules: The user's StudentModules for the descriptors, if they have already
+            been loaded (e.g. for many users at once), or None to query for them.
         '''
         self.cache = {}
         self.descriptors = descriptors
         self.select_for_update = select_for_update
+        self._num_queries = 0
 
         if asides is None:
             self.asides = []
@@ -74,15 +85,32 @@ class FieldDataCache(object):
         self.course_id = course_id
         self.user = user
 
+        # Number of queries made, and rows and seconds spent, loading each scope
+        self.query_stats = {}
+
         if user.is_authenticated():
-            for scope, fields in self._fields_to_cache().items():
-                for field_object in self._retrieve_fields(scope, fields):
+            for scope, prefetch in self._query_plan().items():
+                start_time = time()
+                num_queries_before = self._num_queries
+                num_rows = 0
+                if scope == Scope.user_state and student_modules is not None:
+                    field_objects = student_modules
+                else:
+                    field_objects = self._retrieve_fields(scope, prefetch)
+                for field_object in field_objects:
                     self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+                    num_rows += 1
+                self.query_stats[scope] = {
+                    'queries': self._num_queries - num_queries_before,
+                    'rows': num_rows,
+                    'seconds': time() - start_time,
+                }
+            self._record_query_stats()
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
-                                         select_for_update=False, asides=None):
+                                         select_for_update=False, asides=None, student_modules=None):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -92,6 +120,7 @@ class FieldDataCache(object):
         descriptor_filter is a function that accepts a descriptor and return wether the StudentModule
             should be cached
         select_for_update: Flag indicating whether the rows should be locked until end of transaction
+        student_modules: The user's StudentModules, if they have already been loaded
         """
 
         def get_child_descriptors(descriptor, depth, descriptor_filter):
@@ -120,13 +149,16 @@ class FieldDataCache(object):
         with modulestore().bulk_operations(descriptor.location.course_key):
             descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
-        return FieldDataCache(descriptors, course_id, user, select_for_update, asides=asides)
+        return FieldDataCache(
+            descriptors, course_id, user, select_for_update, asides=asides, student_modules=student_modules
+        )
 
     def _query(self, model_class, **kwargs):
         """
         Queries model_class with **kwargs, optionally adding select_for_update if
         self.select_for_update is set
         """
+        self._num_queries += 1
         query = model_class.objects
         if self.select_for_update:
             query = query.select_for_update()
@@ -147,44 +179,48 @@ class FieldDataCache(object):
         )
         return res
 
-    @property
-    def _all_usage_ids(self):
+    def _query_plan(self):
         """
-        Return a set of all usage_ids for the descriptors that this FieldDataCache is caching
-        against, and well as all asides for those descriptors.
-        """
-        usage_ids = set()
-        for descriptor in self.descriptors:
-            usage_ids.add(descriptor.scope_ids.usage_id)
-
-            for aside_type in self.asides:
-                usage_ids.add(AsideUsageKeyV1(descriptor.scope_ids.usage_id, aside_type))
+        Returns a map from each scope that has fields to cache to the
+        ScopePrefetch describing what to load for it.
 
-        return usage_ids
-
-    @property
-    def _all_block_types(self):
-        """
-        Return a set of all block_types that are cached by this FieldDataCache.
+        Each scope is only queried for the blocks that actually have fields in
+        that scope, so that e.g. the few blocks with user_state_summary fields
+        don't cause every usage id of a large subtree to be sent to the database
+        again for that scope.
         """
-        block_types = set()
+        plan = {}
         for descriptor in self.descriptors:
-            block_types.add(BlockTypeKeyV1(descriptor.entry_point, descriptor.scope_ids.block_type))
-
-        for aside_type in self.asides:
-            block_types.add(BlockTypeKeyV1(XBlockAside.entry_point, aside_type))
+            usage_id = descriptor.scope_ids.usage_id
+            block_type = BlockTypeKeyV1(descriptor.entry_point, descriptor.scope_ids.block_type)
+            for field in descriptor.fields.values():
+                if field.scope not in plan:
+                    plan[field.scope] = ScopePrefetch(set(), set(), set())
+                prefetch = plan[field.scope]
+                prefetch.field_names.add(field.name)
+                prefetch.usage_ids.add(usage_id)
+                prefetch.block_types.add(block_type)
+
+        # The fields of asides aren't known up front, so their data is loaded
+        # for every scope that is loaded at all.
+        for prefetch in plan.values():
+            for aside_type in self.asides:
+                prefetch.block_types.add(BlockTypeKeyV1(XBlockAside.entry_point, aside_type))
+                for descriptor in self.descriptors:
+                    prefetch.usage_ids.add(AsideUsageKeyV1(descriptor.scope_ids.usage_id, aside_type))
 
-        return block_types
+        return plan
 
-    def _retrieve_fields(self, scope, fields):
+    def _retrieve_fields(self, scope, prefetch):
         """
-        Queries the database for all of the fields in the specified scope
+        Queries the database for all of the fields in the specified scope,
+        as described by the ScopePrefetch `prefetch`
         """
         if scope == Scope.user_state:
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
-                self._all_usage_ids,
+                prefetch.usage_ids,
                 course_id=self.course_id,
                 student=self.user.pk,
             )
@@ -192,35 +228,41 @@ class FieldDataCache(object):
             return self._chunked_query(
                 XModuleUserStateSummaryField,
                 'usage_id__in',
-                self._all_usage_ids,
-                field_name__in=set(field.name for field in fields),
+                prefetch.usage_ids,
+                field_name__in=prefetch.field_names,
             )
         elif scope == Scope.preferences:
             return self._chunked_query(
                 XModuleStudentPrefsField,
                 'module_type__in',
-                self._all_block_types,
+                prefetch.block_types,
                 student=self.user.pk,
-                field_name__in=set(field.name for field in fields),
+                field_name__in=prefetch.field_names,
             )
         elif scope == Scope.user_info:
             return self._query(
                 XModuleStudentInfoField,
                 student=self.user.pk,
-                field_name__in=set(field.name for field in fields),
+                field_name__in=prefetch.field_names,
             )
         else:
             return []
 
-    def _fields_to_cache(self):
+    def _record_query_stats(self):
         """
-        Returns a map of scopes to fields in that scope that should be cached
+        Reports the number of queries, rows loaded and time spent by this
+        FieldDataCache, so that regressions in prefetching show up in metrics.
         """
-        scope_map = defaultdict(set)
-        for descriptor in self.descriptors:
-            for field in descriptor.fields.values():
-                scope_map[field.scope].add(field)
-        return scope_map
+        total_queries = sum(stats['queries'] for stats in self.query_stats.itervalues())
+        total_rows = sum(stats['rows'] for stats in self.query_stats.itervalues())
+        total_seconds = sum(stats['seconds'] for stats in self.query_stats.itervalues())
+        dog_stats_api.histogram('lms.field_data_cache.queries', total_queries)
+        dog_stats_api.histogram('lms.field_data_cache.rows', total_rows)
+        dog_stats_api.histogram('lms.field_data_cache.seconds', total_seconds)
+        log.debug(
+            u"FieldDataCache for %d descriptors in %s: %d queries, %d rows in %.3fs",
+            len(self.descriptors), self.course_id, total_queries, total_rows, total_seconds
+        )
 
     def _cache_key_from_kvs_key(self, key):
         """
@@ -14,11 +14,17 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+
+# The prefix of the UserCourseTag keys holding a student's user partition groups
+PARTITION_TAG_PREFIX = 'xblock.partition_service.partition_'
 
 
 class StudentModule(models.Model):
@@ -210,6 +216,281 @@ class OfflineComputedGrade(models.Model):
         return "[OfflineComputedGrade] %s: %s (%s) = %s" % (self.user, self.course_id, self.created, self.gradeset)
 
 
+class PersistentCourseGrade(models.Model):
+    """
+    The grade summary of a student in a course, as computed by
+    `courseware.grades.grade`, stored so that it can be read back instead of
+    being recomputed.
+
+    A row is valid only for the version of the course content it was computed
+    against (`course_version`), and only until the next release date of the
+    course's graded content (`valid_until`). Rows are invalidated whenever one
+    of the student's StudentModule scores in the course, their cohort, or
+    their partition groups change.
+
+    Invalidating a row empties it and bumps its `generation`. A computed grade
+    is only written back if the generation it was computed from is still
+    current, so that an invalidation made while the grade was being computed
+    isn't overwritten by the stale grade.
+    """
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    course_version = models.CharField(max_length=255)
+    generation = models.IntegerField(default=0)
+    valid_until = models.DateTimeField(null=True, blank=True)
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    gradeset = models.TextField()  # grade summary, stored as JSON; empty when invalid
+
+    class Meta:
+        unique_together = (('user', 'course_id'), )
+
+    @classmethod
+    def invalidate(cls, user_id, course_id):
+        """
+        Forget the stored grade of the given user in the given course.
+        """
+        cls.invalidate_users([user_id], course_id)
+
+    @classmethod
+    def invalidate_users(cls, user_ids, course_id):
+        """
+        Forget the stored grades of the given users (a list of ids, or a
+        queryset of them) in the given course.
+        """
+        cls.objects.filter(user_id__in=user_ids, course_id=course_id).update(
+            gradeset='',
+            generation=F('generation') + 1,
+        )
+
+    def __unicode__(self):
+        return u"[PersistentCourseGrade] {}: {} ({})".format(self.user_id, self.course_id, self.course_version)
+
+
+class GradeDistribution(models.Model):
+    """
+    The number of students with each score on a module, kept up to date as
+    StudentModule scores change, so that grade distributions can be read
+    without counting StudentModule rows.
+
+    StudentModules without a grade are counted under a null grade. The counts
+    are only kept up to date while the ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS
+    feature is on, so `rebuild` (see the rebuild_grade_distributions command)
+    has to recount a course from scratch before the feature is turned on.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = LocationKeyField(max_length=255, db_index=True, db_column='module_id')
+    module_type = models.CharField(max_length=32, db_index=True)
+
+    grade = models.FloatField(null=True, blank=True)
+    max_grade = models.FloatField(null=True, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('module_state_key', 'course_id', 'grade', 'max_grade'), )
+
+    @classmethod
+    def record_score_change(cls, student_module, old_score, new_score):
+        """
+        Move `student_module` from the count of its old (grade, max_grade) score
+        to that of its new one. Either score may be None, for a module that
+        wasn't, or is no longer, counted.
+        """
+        if old_score == new_score:
+            return
+        if old_score is not None:
+            cls._add(student_module, old_score, -1)
+        if new_score is not None:
+            cls._add(student_module, new_score, 1)
+
+    @classmethod
+    def _add(cls, student_module, score, delta):
+        """
+        Add `delta` to the count of `score` for the module of `student_module`.
+        """
+        grade, max_grade = score
+        distribution = cls.objects.filter(
+            course_id=student_module.course_id,
+            module_state_key=student_module.module_state_key,
+            grade=grade,
+            max_grade=max_grade,
+        )
+        if distribution.update(count=F('count') + delta) or delta < 0:
+            return
+        try:
+            cls.objects.create(
+                course_id=student_module.course_id,
+                module_state_key=student_module.module_state_key,
+                module_type=student_module.module_type,
+                grade=grade,
+                max_grade=max_grade,
+                count=delta,
+            )
+        except IntegrityError:
+            # Another process created the row first.
+            distribution.update(count=F('count') + delta)
+
+    @classmethod
+    @transaction.commit_on_success
+    def rebuild(cls, course_id):
+        """
+        Recount the grade distributions of the given course from its
+        StudentModules. Returns the number of distribution rows.
+        """
+        cls.objects.filter(course_id=course_id).delete()
+        rows = StudentModule.objects.filter(
+            course_id=course_id
+        ).values(
+            'module_state_key', 'module_type', 'grade', 'max_grade'
+        ).annotate(
+            num_students=Count('id')
+        ).order_by()
+        distributions = [
+            cls(
+                course_id=course_id,
+                module_state_key=row['module_state_key'],
+                module_type=row['module_type'],
+                grade=row['grade'],
+                max_grade=row['max_grade'],
+                count=row['num_students'],
+            )
+            for row in rows
+        ]
+        cls.objects.bulk_create(distributions)
+        return len(distributions)
+
+    def __unicode__(self):
+        return u"[GradeDistribution] {} {}/{}: {}".format(
+            self.module_state_key, self.grade, self.max_grade, self.count
+        )
+
+
+@receiver(post_init, sender=StudentModule)
+def remember_student_module_score(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the score a StudentModule was loaded with, so that saves that
+    don't change the score don't invalidate the student's stored grade or
+    touch the grade distributions.
+    """
+    # Read the loaded values directly so deferred fields aren't fetched here.
+    instance._loaded_score = (  # pylint: disable=protected-access
+        instance.__dict__.get('grade'), instance.__dict__.get('max_grade')
+    )
+
+
+def _maintain_grade_distributions():
+    """
+    Whether GradeDistribution counts are kept up to date as scores change.
+    """
+    return settings.FEATURES.get('ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS', False)
+
+
+@receiver(pre_save, sender=StudentModule)
+@receiver(pre_delete, sender=StudentModule)
+def lock_stored_score(sender, instance, signal, **kwargs):  # pylint: disable=unused-argument
+    """
+    Read the score currently stored for a StudentModule whose score is about
+    to change, or which is about to be deleted, locking its row until the
+    transaction ends, so that the grade distribution count it's moved out of
+    is the one it's really in, even if `instance` was loaded before another
+    process changed the score.
+
+    Saves that don't change the loaded score don't touch the distributions,
+    so they don't read or lock anything.
+    """
+    if not _maintain_grade_distributions() or instance.pk is None:
+        return
+    loaded_score = getattr(instance, '_loaded_score', None)
+    if signal is pre_save and (instance.grade, instance.max_grade) == loaded_score:
+        instance._stored_score = loaded_score  # pylint: disable=protected-access
+        return
+    stored_scores = StudentModule.objects.select_for_update().filter(
+        pk=instance.pk
+    ).values_list('grade', 'max_grade')
+    instance._stored_score = stored_scores[0] if stored_scores else None  # pylint: disable=protected-access
+
+
+@receiver(post_save, sender=StudentModule)
+def invalidate_grade_on_score_change(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the stored grade of a student whenever one of their scores changes,
+    and move the score to its new grade distribution count.
+    """
+    loaded_score = getattr(instance, '_loaded_score', (None, None))
+    current_score = (instance.grade, instance.max_grade)
+    if created or current_score != loaded_score:
+        PersistentCourseGrade.invalidate(instance.student_id, instance.course_id)
+        instance._loaded_score = current_score  # pylint: disable=protected-access
+    if _maintain_grade_distributions():
+        stored_score = None if created else getattr(instance, '_stored_score', None)
+        GradeDistribution.record_score_change(instance, stored_score, current_score)
+        instance._stored_score = None  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_grade_on_score_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the stored grade of a student whenever one of their StudentModules is
+    deleted, and take its score out of the grade distributions.
+    """
+    PersistentCourseGrade.invalidate(instance.student_id, instance.course_id)
+    if _maintain_grade_distributions():
+        GradeDistribution.record_score_change(instance, getattr(instance, '_stored_score', None), None)
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def invalidate_grades_on_cohort_change(sender, instance, action, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the stored grades of students added to or removed from a cohort,
+    since content (and so, scores) may be restricted to some cohorts' groups.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    pk_set = kwargs['pk_set']
+    if kwargs['reverse']:
+        # `instance` is a user, and `pk_set` the groups (None when clearing them all).
+        groups = instance.course_groups.all()
+        if pk_set is not None:
+            groups = groups.filter(pk__in=pk_set)
+        for course_id in set(groups.values_list('course_id', flat=True)):
+            PersistentCourseGrade.invalidate(instance.id, course_id)
+    else:
+        user_ids = instance.users.values_list('id', flat=True) if pk_set is None else list(pk_set)
+        PersistentCourseGrade.invalidate_users(user_ids, instance.course_id)
+
+
+@receiver(pre_delete, sender=CourseUserGroup)
+def invalidate_grades_on_group_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the stored grades of the members of a deleted cohort.
+    """
+    PersistentCourseGrade.invalidate_users(instance.users.values_list('id', flat=True), instance.course_id)
+
+
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(pre_delete, sender=CourseUserGroupPartitionGroup)
+def invalidate_grades_on_partition_group_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the stored grades of the members of a cohort whose partition group
+    changes.
+    """
+    group = instance.course_user_group
+    PersistentCourseGrade.invalidate_users(group.users.values_list('id', flat=True), group.course_id)
+
+
+@receiver(post_save, sender=UserCourseTag)
+@receiver(post_delete, sender=UserCourseTag)
+def invalidate_grade_on_partition_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the stored grade of a student whose group in a (random) user
+    partition changes, e.g. the group of a split_test they're assigned to.
+    """
+    if instance.key.startswith(PARTITION_TAG_PREFIX):
+        PersistentCourseGrade.invalidate(instance.user_id, instance.course_id)
+
+
 class OfflineComputedGradeLog(models.Model):
     """
     Log of when offline grades are computed.
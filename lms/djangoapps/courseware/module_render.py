@@ -12,13 +12,13 @@ from opaque_keys import InvalidKeyError
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.http import Http404, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access, get_user_role
+from courseware.course_outline import toc_from_course_outline
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
@@ -52,7 +52,7 @@ from xmodule.lti_module import LTIModule
 from xmodule.x_module import XModuleDescriptor
 
 from util.json_request import JsonResponse
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 
 
 log = logging.getLogger(__name__)
@@ -114,8 +114,17 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
     NOTE: assumes that if we got this far, user has access to course.  Returns
     None if this is not the case.
 
-    field_data_cache must include data from the course module and 2 levels of its descendents
+    field_data_cache must include data from the course module and 2 levels of its descendents,
+    unless FEATURES['ENABLE_COURSE_OUTLINE_INDEX'] is set, in which case the table of contents
+    is built from the cached course outline index instead (see courseware.course_outline)
     '''
+    if settings.FEATURES.get('ENABLE_COURSE_OUTLINE_INDEX'):
+        # allow course staff to masquerade as student, as get_module_for_descriptor does
+        if has_access(request.user, 'staff', course, course.id):
+            setup_masquerade(request, True)
+        if not has_access(request.user, 'load', course, course.id):
+            return None
+        return toc_from_course_outline(request.user, course, active_chapter, active_section)
 
     with modulestore().bulk_operations(course.id):
         course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
@@ -535,7 +544,7 @@ def get_module_system_for_user(user, field_data_cache,
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -7,6 +7,7 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 import courseware.access as access
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
+from student.roles import CourseStaffRole
 from student.tests.factories import AnonymousUserFactory, CourseEnrollmentAllowedFactory
 from xmodule.course_module import (
     CATALOG_VISIBILITY_CATALOG_AND_ABOUT, CATALOG_VISIBILITY_ABOUT,
@@ -287,3 +288,33 @@ class UserRoleTestCase(TestCase):
             'student',
             access.get_user_role(self.anonymous_user, self.course_key)
         )
+
+
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_ACCESS_DECISION_CACHE': True})
+class AccessDecisionCacheTestCase(TestCase):
+    """
+    Tests for caching has_access decisions on the user.
+    """
+    def setUp(self):
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.user = UserFactory()
+
+    def test_decisions_are_cached(self):
+        with patch('courseware.access._has_access', wraps=access._has_access) as mock_has_access:
+            self.assertFalse(access.has_access(self.user, 'staff', self.course_key))
+            self.assertEqual(mock_has_access.call_count, 1)
+            self.assertFalse(access.has_access(self.user, 'staff', self.course_key))
+            self.assertEqual(mock_has_access.call_count, 1)
+
+    def test_role_change_forgets_decisions(self):
+        self.assertFalse(access.has_access(self.user, 'staff', self.course_key))
+        CourseStaffRole(self.course_key).add_users(self.user)
+        self.assertTrue(access.has_access(self.user, 'staff', self.course_key))
+        CourseStaffRole(self.course_key).remove_users(self.user)
+        self.assertFalse(access.has_access(self.user, 'staff', self.course_key))
+
+    def test_masquerade(self):
+        staff = StaffFactory(course_key=self.course_key)
+        self.assertTrue(access.has_access(staff, 'staff', self.course_key))
+        staff.masquerade_as_student = True
+        self.assertFalse(access.has_access(staff, 'staff', self.course_key))
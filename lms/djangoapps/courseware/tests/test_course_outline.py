@@ -0,0 +1,66 @@
+"""
+Tests for the course outline index, and the tables of contents built from it.
+"""
+import datetime
+import json
+
+from django.test.utils import override_settings
+from django.utils.timezone import utc
+from mock import patch
+
+from courseware.course_outline import toc_from_course_outline
+from courseware.models import StudentModule
+from courseware.tests.factories import GlobalStaffFactory
+from student.tests.factories import UserFactory
+from xmodule.fields import Date
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DATA_MOCK_MODULESTORE
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+@override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
+@patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+class TestTocFromCourseOutline(ModuleStoreTestCase):
+    """
+    Test applying each user's access and due date extensions to the outline.
+    """
+    def setUp(self):
+        super(TestTocFromCourseOutline, self).setUp()
+        self.due = datetime.datetime(2010, 5, 12, 2, 42, tzinfo=utc)
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=course, category='chapter', display_name='Week 1')
+        self.homework = ItemFactory.create(
+            parent=chapter, category='sequential', display_name='Homework', due=self.due
+        )
+        ItemFactory.create(
+            parent=chapter, category='sequential', display_name='Next Year',
+            start=datetime.datetime(2100, 1, 1, tzinfo=utc),
+        )
+        ItemFactory.create(parent=chapter, category='sequential', display_name='Hidden', hide_from_toc=True)
+        self.course = modulestore().get_course(course.id, depth=2)
+
+    def _sections(self, user):
+        """The (display name, due date) of each section of the first chapter in the user's toc"""
+        toc = toc_from_course_outline(user, self.course, 'Week_1', None)
+        return [(section['display_name'], section['due']) for section in toc[0]['sections']]
+
+    def test_student(self):
+        self.assertEqual(self._sections(UserFactory.create()), [('Homework', self.due)])
+
+    def test_staff(self):
+        self.assertEqual(
+            [name for name, __ in self._sections(GlobalStaffFactory.create())],
+            ['Homework', 'Next Year']
+        )
+
+    def test_extended_due_date(self):
+        user = UserFactory.create()
+        extended = datetime.datetime(2013, 12, 25, 0, 0, tzinfo=utc)
+        StudentModule.objects.create(
+            student=user,
+            course_id=self.course.id,
+            module_state_key=self.homework.location,
+            module_type='sequential',
+            state=json.dumps({'extended_due': Date().to_json(extended)}),
+        )
+        self.assertEqual(self._sections(user), [('Homework', extended)])
@@ -1,19 +1,31 @@
 """
 Test grade calculation.
 """
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
 from django.http import Http404
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
-from mock import patch
+from django.utils import timezone
+from mock import Mock, patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from pytz import UTC
 
-from courseware.grades import grade, iterate_grades_for
+from courseware import grades
+from courseware.grades import grade, iterate_grades_for, GradingContext, StudentModuleScoreCache
+from courseware.models import PersistentCourseGrade, StudentModule
+from courseware.tests.factories import StudentModuleFactory
+from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
+from openedx.core.djangoapps.user_api.models import UserCourseTag
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, **kwargs):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -24,7 +36,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, **kwargs)
 
 
 @override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
@@ -105,6 +117,15 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_grading_in_chunks(self):
+        """Students are graded correctly whatever the chunk size"""
+        for chunk_size in (1, 2, 100):
+            gradeset_results = list(iterate_grades_for(self.course.id, self.students, chunk_size=chunk_size))
+            self.assertEqual([student for student, __, __ in gradeset_results], self.students)
+            for __, gradeset, err_msg in gradeset_results:
+                self.assertEqual(err_msg, "")
+                self.assertEqual(gradeset['percent'], 0.0)
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
@@ -120,3 +141,229 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+@override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
+class TestStudentModuleScoreCache(ModuleStoreTestCase):
+    """
+    Test bulk loading of StudentModules for grading.
+    """
+    def setUp(self):
+        super(TestStudentModuleScoreCache, self).setUp()
+        self.course = CourseFactory.create()
+        self.usage_keys = [self.course.id.make_usage_key('problem', 'p{}'.format(i)) for i in range(3)]
+        self.students = [UserFactory.create(), UserFactory.create()]
+
+    def test_no_students(self):
+        with self.assertNumQueries(0):
+            score_cache = StudentModuleScoreCache(self.course.id, [], self.usage_keys)
+        self.assertEqual(score_cache.modules_for(self.students[0]), {})
+
+    def test_modules_for(self):
+        first_module = StudentModuleFactory.create(
+            student=self.students[0], course_id=self.course.id, module_state_key=self.usage_keys[0],
+            grade=1, max_grade=2,
+        )
+        # Modules for other courses and other blocks must not be loaded
+        StudentModuleFactory.create(student=self.students[0], module_state_key=self.usage_keys[1])
+        StudentModuleFactory.create(
+            student=self.students[0], course_id=self.course.id,
+            module_state_key=self.course.id.make_usage_key('problem', 'ungraded'),
+        )
+
+        with self.assertNumQueries(2):
+            score_cache = StudentModuleScoreCache(self.course.id, self.students, self.usage_keys, chunk_size=2)
+
+        modules = score_cache.modules_for(self.students[0])
+        self.assertEqual(modules.keys(), [self.usage_keys[0]])
+        self.assertEqual(modules[self.usage_keys[0]].id, first_module.id)
+        self.assertEqual(modules[self.usage_keys[0]].grade, 1)
+        self.assertEqual(score_cache.modules_for(self.students[1]), {})
+
+
+@override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+@patch('courseware.courses.get_course_version', Mock(return_value='version1'))
+class TestPersistentGrades(ModuleStoreTestCase):
+    """
+    Test storing and reusing grade summaries.
+    """
+    def setUp(self):
+        super(TestPersistentGrades, self).setUp()
+        self.course = CourseFactory.create()
+        self.student = UserFactory.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _grade(self):
+        """Grade the student, returning the grade and whether it was computed from scratch"""
+        with patch('courseware.grades._grade', wraps=grades._grade) as mock_grade:
+            gradeset = grade(self.student, self.request, self.course)
+        return gradeset, mock_grade.called
+
+    def test_grade_is_persisted(self):
+        first_gradeset, computed = self._grade()
+        self.assertTrue(computed)
+        self.assertTrue(PersistentCourseGrade.objects.filter(user=self.student, course_id=self.course.id).exists())
+
+        second_gradeset, computed = self._grade()
+        self.assertFalse(computed)
+        self.assertEqual(first_gradeset, second_gradeset)
+
+    def test_score_change_invalidates(self):
+        self._grade()
+        student_module = StudentModuleFactory.create(
+            student=self.student, course_id=self.course.id,
+            module_state_key=self.course.id.make_usage_key('problem', 'p1'),
+        )
+        __, computed = self._grade()
+        self.assertTrue(computed)
+
+        # Saving state without changing the score keeps the stored grade
+        student_module = StudentModule.objects.get(id=student_module.id)
+        student_module.state = '{"position": 2}'
+        student_module.save()
+        __, computed = self._grade()
+        self.assertFalse(computed)
+
+        student_module.grade = 1
+        student_module.max_grade = 1
+        student_module.save()
+        __, computed = self._grade()
+        self.assertTrue(computed)
+
+    def test_course_version_change_invalidates(self):
+        self._grade()
+        with patch('courseware.courses.get_course_version', Mock(return_value='version2')):
+            __, computed = self._grade()
+        self.assertTrue(computed)
+
+    def test_invalidation_while_grading(self):
+        compute_grade = grades._grade
+
+        def grade_and_invalidate(*args):
+            """Compute the grade while a score changes"""
+            gradeset = compute_grade(*args)
+            PersistentCourseGrade.invalidate(self.student.id, self.course.id)
+            return gradeset
+
+        with patch('courseware.grades._grade', side_effect=grade_and_invalidate):
+            grade(self.student, self.request, self.course)
+        # The grade computed before the invalidation isn't stored
+        __, computed = self._grade()
+        self.assertTrue(computed)
+        __, computed = self._grade()
+        self.assertFalse(computed)
+
+    def test_cohort_change_invalidates(self):
+        self._grade()
+        cohort = CohortFactory.create(course_id=self.course.id, users=[self.student])
+        __, computed = self._grade()
+        self.assertTrue(computed)
+
+        CourseUserGroupPartitionGroup.objects.create(course_user_group=cohort, partition_id=0, group_id=1)
+        __, computed = self._grade()
+        self.assertTrue(computed)
+
+        self.student.course_groups.remove(cohort)
+        __, computed = self._grade()
+        self.assertTrue(computed)
+
+    def test_partition_change_invalidates(self):
+        self._grade()
+        UserCourseTag.objects.create(
+            user=self.student, course_id=self.course.id, key='xblock.partition_service.partition_0', value='1'
+        )
+        __, computed = self._grade()
+        self.assertTrue(computed)
+
+    def test_release_invalidates(self):
+        self._grade()
+        self.assertIsNone(PersistentCourseGrade.objects.get(user=self.student).valid_until)
+
+        # A grade is stored until the next release date of graded content
+        release_date = timezone.now() + timedelta(days=1)
+        with patch.object(GradingContext, 'next_release_date', Mock(return_value=release_date)):
+            PersistentCourseGrade.invalidate(self.student.id, self.course.id)
+            self._grade()
+        self.assertEqual(PersistentCourseGrade.objects.get(user=self.student).valid_until, release_date)
+        __, computed = self._grade()
+        self.assertFalse(computed)
+
+        PersistentCourseGrade.objects.filter(user=self.student).update(valid_until=timezone.now())
+        __, computed = self._grade()
+        self.assertTrue(computed)
+
+    def test_raw_scores_not_persisted(self):
+        grade(self.student, self.request, self.course, keep_raw_scores=True)
+        self.assertFalse(PersistentCourseGrade.objects.filter(user=self.student).exists())
+
+
+@override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
+class TestGradingContext(ModuleStoreTestCase):
+    """
+    Test the compact, cacheable grading context.
+    """
+    def setUp(self):
+        super(TestGradingContext, self).setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent_location=self.course.location, category='chapter')
+        self.section = ItemFactory.create(
+            parent_location=chapter.location, category='sequential', display_name='Graded Section',
+            metadata={'graded': True, 'format': 'Homework'},
+        )
+        vertical = ItemFactory.create(parent_location=self.section.location, category='vertical')
+        self.problem = ItemFactory.create(parent_location=vertical.location, category='problem')
+        ItemFactory.create(parent_location=chapter.location, category='sequential')
+        self.course = self.store.get_course(self.course.id)
+        cache.clear()
+
+    def test_compact_context(self):
+        grading_context = GradingContext(self.course)
+        self.assertEqual(grading_context.graded_sections.keys(), ['Homework'])
+        section = grading_context.graded_sections['Homework'][0]
+        self.assertEqual(section['section_key'], self.section.location)
+        self.assertEqual(section['display_name'], 'Graded Section')
+        self.assertEqual(section['scorable_keys'], [self.problem.location])
+        self.assertFalse(section['always_recalculate'])
+        self.assertEqual(grading_context.scorable_usage_keys, [self.problem.location])
+        self.assertEqual(grading_context.section_descriptor(self.section.location).location, self.section.location)
+
+    def test_release_dates(self):
+        self.section.start = datetime(2015, 1, 1, tzinfo=UTC)
+        self.section.days_early_for_beta = 2
+        self.problem.start = datetime(2016, 1, 1, tzinfo=UTC)
+        section = {'section_descriptor': self.section, 'xmoduledescriptors': [self.problem]}
+        course = Mock(grading_context={'graded_sections': {'Homework': [section]}})
+        context = GradingContext._compact_grading_context(course)  # pylint: disable=protected-access
+        self.assertEqual(context['release_dates'], [
+            datetime(2014, 12, 30, tzinfo=UTC), datetime(2016, 1, 1, tzinfo=UTC),
+        ])
+
+        grading_context = GradingContext(self.course)
+        grading_context.release_dates = context['release_dates']
+        self.assertEqual(
+            grading_context.next_release_date(datetime(2015, 6, 1, tzinfo=UTC)), datetime(2016, 1, 1, tzinfo=UTC)
+        )
+        self.assertIsNone(grading_context.next_release_date(datetime(2016, 1, 1, tzinfo=UTC)))
+
+    @patch('courseware.courses.get_course_version', Mock(return_value='version1'))
+    def test_cached_by_version(self):
+        GradingContext(self.course)
+        with patch.object(GradingContext, '_compact_grading_context') as mock_compact:
+            grading_context = GradingContext(self.course)
+            self.assertFalse(mock_compact.called)
+        self.assertEqual(grading_context.scorable_usage_keys, [self.problem.location])
+
+        with patch('courseware.courses.get_course_version', Mock(return_value='version2')):
+            with patch.object(GradingContext, '_compact_grading_context', wraps=GradingContext._compact_grading_context) as mock_compact:
+                GradingContext(self.course)
+                self.assertTrue(mock_compact.called)
+
+    @patch('courseware.courses.get_course_version', Mock(return_value=None))
+    def test_unversioned_course_not_cached(self):
+        GradingContext(self.course)
+        with patch.object(GradingContext, '_compact_grading_context', wraps=GradingContext._compact_grading_context) as mock_compact:
+            GradingContext(self.course)
+            self.assertTrue(mock_compact.called)
@@ -339,3 +339,34 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestFieldDataCachePrefetch(TestCase):
+    """Tests for how FieldDataCache plans and counts its prefetch queries"""
+    def setUp(self):
+        self.user = UserFactory.create(username='user')
+        self.state_descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        self.summary_descriptor = mock_descriptor([mock_field(Scope.user_state_summary, 'b_field')])
+        self.summary_descriptor.scope_ids = ScopeIds(
+            'user1', 'mock_problem', location('other_def_id'), location('other_usage_id')
+        )
+
+    def test_query_plan_only_includes_blocks_with_fields_in_scope(self):
+        field_data_cache = FieldDataCache([self.state_descriptor, self.summary_descriptor], course_id, self.user)
+        plan = field_data_cache._query_plan()  # pylint: disable=protected-access
+
+        self.assertItemsEqual([Scope.user_state, Scope.user_state_summary], plan.keys())
+        self.assertEquals(set([location('usage_id')]), plan[Scope.user_state].usage_ids)
+        self.assertEquals(set(['a_field']), plan[Scope.user_state].field_names)
+        self.assertEquals(set([location('other_usage_id')]), plan[Scope.user_state_summary].usage_ids)
+        self.assertEquals(set(['b_field']), plan[Scope.user_state_summary].field_names)
+
+    def test_query_stats(self):
+        StudentModuleFactory.create(student=self.user)
+        with self.assertNumQueries(2):
+            field_data_cache = FieldDataCache([self.state_descriptor, self.summary_descriptor], course_id, self.user)
+
+        self.assertEquals(1, field_data_cache.query_stats[Scope.user_state]['queries'])
+        self.assertEquals(1, field_data_cache.query_stats[Scope.user_state]['rows'])
+        self.assertEquals(1, field_data_cache.query_stats[Scope.user_state_summary]['queries'])
+        self.assertEquals(0, field_data_cache.query_stats[Scope.user_state_summary]['rows'])
@@ -0,0 +1,106 @@
+"""
+Test the courseware models.
+"""
+from django.conf import settings
+from django.test import TestCase
+from mock import patch
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from courseware.models import GradeDistribution, StudentModule
+from courseware.tests.factories import StudentModuleFactory
+from xmodule_modifiers import grade_histogram
+
+
+@patch.dict(settings.FEATURES, {'ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS': True})
+class TestGradeDistribution(TestCase):
+    """
+    Test keeping the grade distributions up to date as scores change.
+    """
+    def setUp(self):
+        super(TestGradeDistribution, self).setUp()
+        self.course_id = SlashSeparatedCourseKey('edX', 'test', 'distribution')
+        self.location = self.course_id.make_usage_key('problem', 'p1')
+
+    def _distribution(self):
+        """The (grade, max_grade, count) of each non-empty count of the problem"""
+        return sorted(
+            GradeDistribution.objects.filter(
+                course_id=self.course_id, module_state_key=self.location, count__gt=0
+            ).values_list('grade', 'max_grade', 'count')
+        )
+
+    def _create(self, grade, max_grade=2):
+        """Create a StudentModule for the problem with the given score"""
+        return StudentModuleFactory.create(
+            course_id=self.course_id, module_state_key=self.location, grade=grade, max_grade=max_grade,
+        )
+
+    def test_score_changes(self):
+        first = self._create(1)
+        self._create(1)
+        ungraded = self._create(None, None)
+        self.assertEqual(self._distribution(), [(None, None, 1), (1, 2, 2)])
+
+        first = StudentModule.objects.get(id=first.id)
+        first.grade = 2
+        first.save()
+        self.assertEqual(self._distribution(), [(None, None, 1), (1, 2, 1), (2, 2, 1)])
+
+        # Saving without changing the score doesn't count it again, or lock it
+        first.state = '{"attempts": 2}'
+        with patch.object(StudentModule.objects, 'select_for_update') as mock_select_for_update:
+            first.save()
+        self.assertFalse(mock_select_for_update.called)
+        self.assertEqual(self._distribution(), [(None, None, 1), (1, 2, 1), (2, 2, 1)])
+
+        StudentModule.objects.get(id=first.id).delete()
+        self.assertEqual(self._distribution(), [(None, None, 1), (1, 2, 1)])
+
+        ungraded = StudentModule.objects.get(id=ungraded.id)
+        ungraded.grade = 0
+        ungraded.max_grade = 2
+        ungraded.save()
+        self.assertEqual(self._distribution(), [(0, 2, 1), (1, 2, 1)])
+
+    def test_stale_instance(self):
+        stale = self._create(1)
+        current = StudentModule.objects.get(id=stale.id)
+        current.grade = 2
+        current.save()
+
+        # The score is moved out of the count it's stored in, not the one
+        # the stale instance was loaded with.
+        stale.grade = 0
+        stale.save()
+        self.assertEqual(self._distribution(), [(0, 2, 1)])
+
+    def test_not_maintained_when_disabled(self):
+        with patch.dict(settings.FEATURES, {'ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS': False}):
+            self._create(1)
+        self.assertEqual(self._distribution(), [])
+
+    def test_rebuild(self):
+        self._create(0)
+        self._create(2)
+        self._create(2)
+        self._create(None, None)
+        expected = self._distribution()
+        GradeDistribution.objects.all().update(count=0)
+
+        self.assertEqual(GradeDistribution.rebuild(self.course_id), 3)
+        self.assertEqual(self._distribution(), expected)
+
+    def test_grade_histogram(self):
+        graded = self._create(1)
+        self._create(2)
+        self.assertEqual(grade_histogram(self.location), [(1, 1), (2, 1)])
+
+        # Ungraded modules mean there's no histogram, as when counting StudentModules
+        ungraded = self._create(None, None)
+        self.assertEqual(grade_histogram(self.location), [])
+        with patch.dict(settings.FEATURES, {'ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS': False}):
+            self.assertEqual(grade_histogram(self.location), [])
+
+        ungraded.delete()
+        graded.delete()
+        self.assertEqual(grade_histogram(self.location), [(2, 1)])
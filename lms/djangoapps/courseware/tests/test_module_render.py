@@ -492,6 +492,20 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_from_course_outline(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_modulestore(default_ms, setup_finds, setup_sends)
+            expected = render.toc_for_course(
+                self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+            )
+            with patch.dict('django.conf.settings.FEATURES', {'ENABLE_COURSE_OUTLINE_INDEX': True}):
+                actual = render.toc_for_course(
+                    self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+                )
+            self.assertEqual(expected, actual)
+
 
 @override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
 class TestHtmlModifiers(ModuleStoreTestCase):
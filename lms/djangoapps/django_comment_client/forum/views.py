@@ -173,10 +173,12 @@ def forum_form_discussion(request, course_id):
     nr_transaction = newrelic.agent.current_transaction()
 
     course = get_course_with_access(request.user, 'load_forum', course_key, check_if_enrolled=True)
-    course_settings = make_course_settings(course)
 
     user = cc.User.from_django_user(request.user)
-    user_info = user.to_dict()
+    calls = cc.ConcurrentCalls(metric_tags=[u'course_id:{}'.format(course_id)])
+    calls.submit('user_info', user.to_dict)
+    course_settings = make_course_settings(course)
+    user_info = calls.results()['user_info']
 
     try:
         unsafethreads, query_params = get_threads(request, course_key)   # This might process a search query
@@ -237,25 +239,32 @@ def single_thread(request, course_id, discussion_id, thread_id):
     nr_transaction = newrelic.agent.current_transaction()
 
     course = get_course_with_access(request.user, 'load_forum', course_key)
-    course_settings = make_course_settings(course)
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
-    is_moderator = cached_has_permission(request.user, "see_all_cohorts", course_key)
 
     # Currently, the front end always loads responses via AJAX, even for this
     # page; it would be a nice optimization to avoid that extra round trip to
     # the comments service.
+    calls = cc.ConcurrentCalls(metric_tags=[u'course_id:{}'.format(course_id)])
+    calls.submit('user_info', cc_user.to_dict)
+    calls.submit(
+        'thread',
+        cc.Thread.find(thread_id).retrieve,
+        recursive=request.is_ajax(),
+        user_id=request.user.id,
+        response_skip=request.GET.get("resp_skip"),
+        response_limit=request.GET.get("resp_limit")
+    )
+    course_settings = make_course_settings(course)
+    is_moderator = cached_has_permission(request.user, "see_all_cohorts", course_key)
+
     try:
-        thread = cc.Thread.find(thread_id).retrieve(
-            recursive=request.is_ajax(),
-            user_id=request.user.id,
-            response_skip=request.GET.get("resp_skip"),
-            response_limit=request.GET.get("resp_limit")
-        )
+        results = calls.results()
     except cc.utils.CommentClientRequestError as e:
         if e.status_code == 404:
             raise Http404
         raise
+    user_info = results['user_info']
+    thread = results['thread']
 
     # verify that the thread belongs to the requesting student's cohort
     if is_commentable_cohorted(course_key, discussion_id) and not is_moderator:
@@ -347,10 +356,14 @@ def user_profile(request, course_id, user_id):
         else:
             profiled_user = cc.User(id=user_id, course_id=course_key)
 
-        threads, page, num_pages = profiled_user.active_threads(query_params)
+        calls = cc.ConcurrentCalls(metric_tags=[u'course_id:{}'.format(course_id)])
+        calls.submit('active_threads', profiled_user.active_threads, query_params)
+        calls.submit('user_info', cc.User.from_django_user(request.user).to_dict)
+        results = calls.results()
+        threads, page, num_pages = results['active_threads']
         query_params['page'] = page
         query_params['num_pages'] = num_pages
-        user_info = cc.User.from_django_user(request.user).to_dict()
+        user_info = results['user_info']
 
         with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
             annotated_content_info = utils.get_metadata_for_threads(course_key, threads, request.user, user_info)
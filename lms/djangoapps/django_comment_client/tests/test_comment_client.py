@@ -0,0 +1,147 @@
+"""
+Tests of the connection pooling, response caching and concurrent calls of the
+comments service client.
+"""
+import json
+import threading
+
+import ddt
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import translation
+from mock import Mock, patch
+
+from lms.lib.comment_client import utils, ConcurrentCalls, CommentClientRequestError, CommentClientTimeoutError
+from request_cache.middleware import RequestCache
+
+
+def make_response(data):
+    """
+    Return a mock comments service response with `data`.
+    """
+    return Mock(status_code=200, text=json.dumps(data), json=Mock(return_value=data))
+
+
+@patch('lms.lib.comment_client.utils.requests.request')
+class PerformRequestTestCase(TestCase):
+    """
+    Tests of `perform_request`.
+    """
+    def setUp(self):
+        super(PerformRequestTestCase, self).setUp()
+        RequestCache().clear_request_cache()
+        cache.clear()
+        self.addCleanup(RequestCache().clear_request_cache)
+
+    @patch.dict(settings.FEATURES, {'ENABLE_COMMENTS_SERVICE_REQUEST_MEMO': True})
+    def test_memoized_get(self, mock_request):
+        mock_request.return_value = make_response({'id': '1', 'username': 'alice'})
+        first = utils.perform_request('get', 'http://cs/users/1', {'complete': True}, memoize=True)
+        first['username'] = 'changed'
+        second = utils.perform_request('get', 'http://cs/users/1', {'complete': True}, memoize=True)
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(second, {'id': '1', 'username': 'alice'})
+
+        # Different parameters are a different request
+        utils.perform_request('get', 'http://cs/users/1', {'complete': False}, memoize=True)
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch.dict(settings.FEATURES, {'ENABLE_COMMENTS_SERVICE_REQUEST_MEMO': True})
+    def test_memo_cleared_by_changes(self, mock_request):
+        mock_request.return_value = make_response({'id': '1'})
+        utils.perform_request('get', 'http://cs/threads/1', memoize=True)
+        utils.perform_request('put', 'http://cs/threads/1', {'title': 'new'})
+        utils.perform_request('get', 'http://cs/threads/1', memoize=True)
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_not_memoized_by_default(self, mock_request):
+        mock_request.return_value = make_response({'id': '1'})
+        utils.perform_request('get', 'http://cs/threads/1', memoize=True)
+        utils.perform_request('get', 'http://cs/threads/1', memoize=True)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_shared_cache(self, mock_request):
+        mock_request.return_value = make_response({'collection': [], 'page': 1, 'num_pages': 1})
+        for __ in range(2):
+            response = utils.perform_request('get', 'http://cs/threads', {'page': 1}, cache_timeout=5)
+            self.assertEqual(response, {'collection': [], 'page': 1, 'num_pages': 1})
+        self.assertEqual(mock_request.call_count, 1)
+
+        utils.perform_request('get', 'http://cs/threads', {'page': 2}, cache_timeout=5)
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch.dict(settings.FEATURES, {'ENABLE_COMMENTS_SERVICE_CONNECTION_POOL': True})
+    @patch('lms.lib.comment_client.utils.get_session')
+    def test_connection_pool(self, mock_get_session, mock_request):
+        mock_get_session.return_value.request.return_value = make_response({'id': '1'})
+        self.assertEqual(utils.perform_request('get', 'http://cs/threads/1'), {'id': '1'})
+        self.assertFalse(mock_request.called)
+        self.assertEqual(mock_get_session.return_value.request.call_args[0], ('get', 'http://cs/threads/1'))
+
+
+class GetSessionTestCase(TestCase):
+    """
+    Tests of `get_session`.
+    """
+    def test_session_shared(self):
+        self.assertIs(utils.get_session(), utils.get_session())
+
+    def test_new_session_after_fork(self):
+        session = utils.get_session()
+        with patch('lms.lib.comment_client.utils.os.getpid', return_value=-1):
+            self.assertIsNot(utils.get_session(), session)
+
+
+@ddt.ddt
+class ConcurrentCallsTestCase(TestCase):
+    """
+    Tests of `ConcurrentCalls`, both with the calls made at the same time and not.
+    """
+    def results_of(self, concurrent, *calls, **kwargs):
+        """
+        Submit `calls`, (name, func) pairs, to a ConcurrentCalls, and return
+        its results.
+        """
+        with patch.dict(settings.FEATURES, {'ENABLE_CONCURRENT_COMMENTS_SERVICE_REQUESTS': concurrent}):
+            group = ConcurrentCalls(**kwargs)
+            for name, func in calls:
+                group.submit(name, func)
+            return group.results()
+
+    @ddt.data(True, False)
+    def test_results(self, concurrent):
+        results = self.results_of(concurrent, ('one', lambda: 1), ('two', lambda: 2))
+        self.assertEqual(results, {'one': 1, 'two': 2})
+
+    @ddt.data(True, False)
+    def test_first_exception_raised(self, concurrent):
+        def fail(message):
+            """
+            Return a call that fails with `message`.
+            """
+            def call():  # pylint: disable=missing-docstring
+                raise CommentClientRequestError(message, 404)
+            return call
+
+        with self.assertRaises(CommentClientRequestError) as context:
+            self.results_of(concurrent, ('one', lambda: 1), ('two', fail('two')), ('three', fail('three')))
+        self.assertEqual(context.exception.message, 'two')
+
+    def test_deadline(self):
+        finish = threading.Event()
+        self.addCleanup(finish.set)
+        with self.assertRaises(CommentClientTimeoutError):
+            self.results_of(True, ('slow', lambda: finish.wait(5)), timeout=0.1)
+
+    def test_request_context(self):
+        RequestCache.get_request_cache().data['key'] = 'value'
+        self.addCleanup(RequestCache().clear_request_cache)
+        with translation.override('eo'):
+            results = self.results_of(
+                True,
+                ('cached', lambda: RequestCache.get_request_cache().data.get('key')),
+                ('language', translation.get_language),
+            )
+        self.assertEqual(results, {'cached': 'value', 'language': 'eo'})
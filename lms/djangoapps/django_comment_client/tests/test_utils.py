@@ -3,6 +3,7 @@ from datetime import datetime
 import json
 from pytz import UTC
 
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -16,6 +17,7 @@ import django_comment_client.utils as utils
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.django import modulestore
 
 
 class DictionaryTestCase(TestCase):
@@ -576,6 +578,34 @@ class CategoryMapTestCase(ModuleStoreTestCase):
             }
         )
 
+    @mock.patch.dict('django.conf.settings.FEATURES', {'ENABLE_DISCUSSION_MAPS_CACHE': True})
+    def test_cached_maps(self):
+        cache.clear()
+        self.create_discussion("Chapter", "Discussion")
+        course = modulestore().get_course(self.course.id)
+        with mock.patch(
+            'django_comment_client.utils._get_discussion_modules', wraps=utils._get_discussion_modules
+        ) as mock_get_modules:
+            category_map = utils.get_discussion_category_map(course)
+            self.assertEqual(utils.get_discussion_category_map(course), category_map)
+            self.assertEqual(utils.get_discussion_id_map(course).keys(), ["discussion1"])
+            self.assertEqual(mock_get_modules.call_count, 1)
+
+            # Cohorting is applied to the cached map as it is now
+            course.cohort_config = {"cohorted": True}
+            category_map = utils.get_discussion_category_map(course)
+            self.assertTrue(category_map["subcategories"]["Chapter"]["entries"]["Discussion"]["is_cohorted"])
+            self.assertEqual(mock_get_modules.call_count, 1)
+
+            # A new version of the course gets a new map
+            self.create_discussion("Chapter", "Another Discussion")
+            course = modulestore().get_course(self.course.id)
+            category_map = utils.get_discussion_category_map(course)
+            self.assertItemsEqual(
+                category_map["subcategories"]["Chapter"]["children"], ["Another Discussion", "Discussion"]
+            )
+            self.assertEqual(mock_get_modules.call_count, 2)
+
     def test_ids_empty(self):
         self.assertEqual(utils.get_discussion_categories_ids(self.course), [])
 
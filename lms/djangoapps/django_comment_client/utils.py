@@ -4,7 +4,9 @@ from collections import defaultdict
 import logging
 from datetime import datetime
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
@@ -72,14 +74,51 @@ def _get_discussion_modules(course):
     return filter(has_required_keys, all_modules)
 
 
-def get_discussion_id_map(course):
+def _build_discussion_id_map(modules):
     def get_entry(module):
         discussion_id = module.discussion_id
         title = module.discussion_target
         last_category = module.discussion_category.split("/")[-1].strip()
         return (discussion_id, {"location": module.location, "title": last_category + " / " + title})
 
-    return dict(map(get_entry, _get_discussion_modules(course)))
+    return dict(map(get_entry, modules))
+
+
+def _get_cached_discussion_maps(course):
+    """
+    Return a dict with the `category_map` of `course` (sorted, but neither
+    filtered by start date nor annotated with cohorting) and its `id_map`,
+    cached under the version of the course content; or None if
+    FEATURES['ENABLE_DISCUSSION_MAPS_CACHE'] isn't set, or the course has no
+    version.
+    """
+    if not settings.FEATURES.get('ENABLE_DISCUSSION_MAPS_CACHE'):
+        return None
+
+    # Imported here, as courseware.courses imports module_render, which uses the discussion module.
+    from courseware.courses import get_course_version
+
+    version = get_course_version(course)
+    if version is None:
+        return None
+
+    key = u'discussion_maps.{}.{}'.format(course.id, version)
+    maps = cache.get(key)
+    if maps is None:
+        modules = _get_discussion_modules(course)
+        maps = {
+            'category_map': _build_discussion_category_map(course, modules),
+            'id_map': _build_discussion_id_map(modules),
+        }
+        cache.set(key, maps, settings.DISCUSSION_MAPS_CACHE_TIMEOUT)
+    return maps
+
+
+def get_discussion_id_map(course):
+    maps = _get_cached_discussion_maps(course)
+    if maps is not None:
+        return maps['id_map']
+    return _build_discussion_id_map(_get_discussion_modules(course))
 
 
 def _filter_unstarted_categories(category_map):
@@ -132,16 +171,14 @@ def _sort_map_entries(category_map, sort_alpha):
     category_map["children"] = [x[0] for x in sorted(things, key=lambda x: x[1]["sort_key"])]
 
 
-def get_discussion_category_map(course):
-    course_id = course.id
-
+def _build_discussion_category_map(course, modules):
+    """
+    Return the category map of the discussion `modules` and the configured
+    discussion topics of `course`, sorted, but neither filtered by start date
+    nor annotated with cohorting.
+    """
     unexpanded_category_map = defaultdict(list)
 
-    modules = _get_discussion_modules(course)
-
-    is_course_cohorted = course.is_cohorted
-    cohorted_discussion_ids = course.cohorted_discussions
-
     for module in modules:
         id = module.discussion_id
         title = module.discussion_target
@@ -186,8 +223,7 @@ def get_discussion_category_map(course):
         for entry in entries:
             node[level]["entries"][entry["title"]] = {"id": entry["id"],
                                                       "sort_key": entry["sort_key"],
-                                                      "start_date": entry["start_date"],
-                                                      "is_cohorted": is_course_cohorted}
+                                                      "start_date": entry["start_date"]}
 
     # TODO.  BUG! : course location is not unique across multiple course runs!
     # (I think Kevin already noticed this)  Need to send course_id with requests, store it
@@ -195,12 +231,44 @@ def get_discussion_category_map(course):
     for topic, entry in course.discussion_topics.items():
         category_map['entries'][topic] = {"id": entry["id"],
                                           "sort_key": entry.get("sort_key", topic),
-                                          "start_date": datetime.now(UTC()),
-                                          "is_cohorted": is_course_cohorted and entry["id"] in cohorted_discussion_ids}
+                                          "start_date": datetime.now(UTC())}
 
     _sort_map_entries(category_map, course.discussion_sort_alpha)
 
-    return _filter_unstarted_categories(category_map)
+    return category_map
+
+
+def _annotate_cohorted_categories(category_map, course):
+    """
+    Mark each of the entries in `category_map` with whether its discussion is
+    cohorted in `course`.
+    """
+    is_course_cohorted = course.is_cohorted
+    cohorted_discussion_ids = course.cohorted_discussions
+
+    # The top level entries are the configured discussion topics, which are
+    # each cohorted or not; inline discussions are cohorted with the course.
+    for entry in category_map["entries"].values():
+        entry["is_cohorted"] = is_course_cohorted and entry["id"] in cohorted_discussion_ids
+
+    queue = category_map["subcategories"].values()
+    while queue:
+        subcategory = queue.pop()
+        for entry in subcategory["entries"].values():
+            entry["is_cohorted"] = is_course_cohorted
+        queue.extend(subcategory["subcategories"].values())
+
+
+def get_discussion_category_map(course):
+    maps = _get_cached_discussion_maps(course)
+    if maps is not None:
+        category_map = maps['category_map']
+    else:
+        category_map = _build_discussion_category_map(course, _get_discussion_modules(course))
+
+    category_map = _filter_unstarted_categories(category_map)
+    _annotate_cohorted_categories(category_map, course)
+    return category_map
 
 
 def get_discussion_categories_ids(course):
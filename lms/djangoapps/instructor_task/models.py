@@ -19,7 +19,9 @@ import csv
 import json
 import hashlib
 import os.path
+import shutil
 import urllib
+from tempfile import TemporaryFile
 
 from boto.s3.connection import S3Connection
 from boto.s3.key import Key
@@ -196,7 +198,12 @@ class ReportStore(object):
     download. Should probably refactor later to create a ReportFile object that
     can simply be appended to for the sake of memory efficiency, rather than
     passing in the whole dataset. Doing that for now just because it's simpler.
+
+    Reports generated by several subtasks are first stored as "shards" (see
+    `store_shard`), which are later merged into the final report.
     """
+    # Name of the directory holding report shards, next to the course directories
+    SHARD_DIRECTORY = 'shards'
     @classmethod
     def from_config(cls):
         """
@@ -218,6 +225,14 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, csv_file):
+        """
+        Yields the rows of the CSV file `csv_file`, with every value decoded
+        from utf-8. This is the inverse of `_get_utf8_encoded_rows`.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -313,14 +328,73 @@ class S3ReportStore(ReportStore):
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
+
+        The gzip'd data is spooled to a temporary file rather than held in
+        memory, so `rows` can be a generator over a very large report.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        with TemporaryFile() as output_file:
+            gzip_file = GzipFile(fileobj=output_file, mode="wb")
+            csvwriter = csv.writer(gzip_file)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            gzip_file.close()
+
+            key = self.key_for(course_id, filename)
+            key.content_encoding = "gzip"
+            key.content_type = "text/csv"
+            key.set_contents_from_file(
+                output_file,
+                headers={
+                    "Content-Encoding": "gzip",
+                    "Content-Type": "text/csv",
+                },
+                rewind=True,
+            )
+
+    def shard_key_for(self, task_id, shard_name):
+        """Return the S3 key we would use to store and retrieve the given
+        shard of the report generated by the task `task_id`. Shards are kept
+        outside of any course directory, so `links_for` never lists them."""
+        key = Key(self.bucket)
+        key.key = "{}/{}/{}/{}".format(self.root_path, self.SHARD_DIRECTORY, task_id, shard_name)
+        return key
 
-        self.store(course_id, filename, output_buffer)
+    def store_shard(self, task_id, shard_name, rows):
+        """
+        Store `rows` as the shard `shard_name` of the report generated by the
+        task `task_id`, as a gzip'd csv file.
+        """
+        with TemporaryFile() as shard_file:
+            gzip_file = GzipFile(fileobj=shard_file, mode="wb")
+            csvwriter = csv.writer(gzip_file)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            gzip_file.close()
+            self.shard_key_for(task_id, shard_name).set_contents_from_file(shard_file, rewind=True)
+
+    def shard_rows(self, task_id, shard_name):
+        """
+        Yields the rows of a shard stored by `store_shard`. Only one shard at a
+        time is held, in a temporary file, so shards can be merged in constant
+        memory.
+        """
+        with TemporaryFile() as shard_file:
+            self.shard_key_for(task_id, shard_name).get_contents_to_file(shard_file)
+            shard_file.seek(0)
+            for row in self._get_utf8_decoded_rows(GzipFile(fileobj=shard_file, mode="rb")):
+                yield row
+
+    def shard_names(self, task_id):
+        """
+        Return the sorted names of all shards stored for the task `task_id`.
+        """
+        shard_dir = self.shard_key_for(task_id, '')
+        return sorted(key.key.split("/")[-1] for key in self.bucket.list(prefix=shard_dir.key))
+
+    def delete_shards(self, task_id):
+        """
+        Delete all shards stored for the task `task_id`.
+        """
+        for shard_name in self.shard_names(task_id):
+            self.bucket.delete_key(self.shard_key_for(task_id, shard_name).key)
 
     def links_for(self, course_id):
         """
@@ -397,6 +471,49 @@ class LocalFSReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def shard_path_to(self, task_id, shard_name):
+        """Return the full path to a given shard of the report generated by
+        the task `task_id`."""
+        return os.path.join(self.root_path, self.SHARD_DIRECTORY, task_id, shard_name)
+
+    def store_shard(self, task_id, shard_name, rows):
+        """
+        Store `rows` as the shard `shard_name` of the report generated by the
+        task `task_id`.
+        """
+        full_path = self.shard_path_to(task_id, shard_name)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with open(full_path, "wb") as f:
+            csv.writer(f).writerows(self._get_utf8_encoded_rows(rows))
+
+    def shard_rows(self, task_id, shard_name):
+        """
+        Yields the rows of a shard stored by `store_shard`.
+        """
+        with open(self.shard_path_to(task_id, shard_name), "rb") as f:
+            for row in self._get_utf8_decoded_rows(f):
+                yield row
+
+    def shard_names(self, task_id):
+        """
+        Return the sorted names of all shards stored for the task `task_id`.
+        """
+        shard_dir = self.shard_path_to(task_id, '')
+        if not os.path.exists(shard_dir):
+            return []
+        return sorted(os.listdir(shard_dir))
+
+    def delete_shards(self, task_id):
+        """
+        Delete all shards stored for the task `task_id`.
+        """
+        shard_dir = self.shard_path_to(task_id, '')
+        if os.path.exists(shard_dir):
+            shutil.rmtree(shard_dir)
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -70,6 +70,27 @@ def track_memory_usage(metric, course_id):
         )
 
 
+def _iterate_items_by_pk(item_queryset, item_fields, page_size):
+    """
+    Yields the items of `item_queryset` in 'pk' order, as dicts of `item_fields` (which must
+    include 'pk').
+
+    The items are read in pages of `page_size`, each with its own query for the items after
+    the last 'pk' of the page before (keyset pagination).  Streaming them all from one query
+    instead would, on MySQL, hold the whole result set open until it had been read.
+    """
+    queryset = item_queryset.order_by('pk').values(*item_fields)
+    last_pk = None
+    while True:
+        page_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        page = list(page_queryset[:page_size])
+        for item in page:
+            yield item
+        if len(page) < page_size:
+            return
+        last_pk = page[-1]['pk']
+
+
 def _generate_items_for_subtask(
     item_queryset,
     item_fields,
@@ -102,7 +123,7 @@ def _generate_items_for_subtask(
     items_for_task = []
 
     with track_memory_usage('course_email.subtask_generation.memory', course_id):
-        for item in item_queryset.values(*all_item_fields).iterator():
+        for item in _iterate_items_by_pk(item_queryset, all_item_fields, items_per_task):
             if len(items_for_task) == items_per_task and num_subtasks < total_num_subtasks - 1:
                 yield items_for_task
                 num_items_queued += items_per_task
@@ -125,6 +146,44 @@ def _generate_items_for_subtask(
         TASK_LOG.info("Number of items generated by chunking %s not equal to original total %s", num_items_queued, total_num_items)
 
 
+def _generate_ranges_for_subtask(item_queryset, items_per_task, total_num_subtasks):
+    """
+    Generates the range of "items" that should be processed by each subtask.
+
+    Like _generate_items_for_subtask, but yields dicts with the bounds of each chunk of items:
+    'after_pk', the 'pk' of the last item of the chunk before (or None for the first chunk),
+    and 'last_pk', the 'pk' of the chunk's last item (or None for the last chunk).  The last
+    chunk is left open, so that it includes any items added after the query was counted.
+    """
+    if total_num_subtasks == 0:
+        return
+
+    after_pk = None
+    num_subtasks = 0
+    if total_num_subtasks > 1:
+        for num_items, item in enumerate(_iterate_items_by_pk(item_queryset, ['pk'], items_per_task), 1):
+            if num_items % items_per_task == 0:
+                yield {'after_pk': after_pk, 'last_pk': item['pk']}
+                after_pk = item['pk']
+                num_subtasks += 1
+                if num_subtasks == total_num_subtasks - 1:
+                    break
+
+    yield {'after_pk': after_pk, 'last_pk': None}
+
+
+def filter_queryset_for_range(item_queryset, item_range):
+    """
+    Returns the items of `item_queryset` in `item_range`, a range of items passed to a subtask
+    by queue_subtasks_for_query.
+    """
+    if item_range['after_pk'] is not None:
+        item_queryset = item_queryset.filter(pk__gt=item_range['after_pk'])
+    if item_range['last_pk'] is not None:
+        item_queryset = item_queryset.filter(pk__lte=item_range['last_pk'])
+    return item_queryset
+
+
 class SubtaskStatus(object):
     """
     Create and return a dict for tracking the status of a subtask.
@@ -275,7 +334,8 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
     return task_progress
 
 
-def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_queryset, item_fields, items_per_task):
+def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_queryset, item_fields, items_per_task,
+                             item_ranges=False):
     """
     Generates and queues subtasks to each execute a chunk of "items" generated by a queryset.
 
@@ -289,6 +349,9 @@ def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querys
         `item_fields` : the fields that should be included in the dict that is returned.
             These are in addition to the 'pk' field.
         `items_per_task` : maximum size of chunks to break each query chunk into for use by a subtask.
+        `item_ranges` : if True, `create_subtask_fcn` is passed the range of items to be processed
+            by the subtask instead of the list of items, which keeps the subtask's arguments small.
+            The subtask looks up its items with filter_queryset_for_range.  `item_fields` is unused.
 
     Returns:  the task progress as stored in the InstructorTask object.
 
@@ -312,14 +375,17 @@ def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querys
 
     # Construct a generator that will return the recipients to use for each subtask.
     # Pass in the desired fields to fetch for each recipient.
-    item_list_generator = _generate_items_for_subtask(
-        item_queryset,
-        item_fields,
-        total_num_items,
-        items_per_task,
-        total_num_subtasks,
-        entry.course_id,
-    )
+    if item_ranges:
+        item_list_generator = _generate_ranges_for_subtask(item_queryset, items_per_task, total_num_subtasks)
+    else:
+        item_list_generator = _generate_items_for_subtask(
+            item_queryset,
+            item_fields,
+            total_num_items,
+            items_per_task,
+            total_num_subtasks,
+            entry.course_id,
+        )
 
     # Now create the subtasks, and start them running.
     TASK_LOG.info(
@@ -23,20 +23,31 @@ from django.conf import settings
 from django.utils.translation import ugettext_noop
 from celery import task
 from functools import partial
+from opaque_keys.edx.keys import CourseKey
 from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
+    perform_module_state_update_subtask,
     rescore_problem_module_state,
+    rescore_student_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    generate_grades_csv_shard,
+    claim_grades_csv_merge,
+    merge_grades_csv_shards,
     upload_students_csv,
     cohort_students_and_upload
 )
 from bulk_email.tasks import perform_delegate_email_batches
 
 
+def _filter_done_problems(modules_to_update):
+    """Filter that matches problems which are marked as being done"""
+    return modules_to_update.filter(state__contains='"done": true')
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def rescore_problem(entry_id, xmodule_instance_args):
     """Rescores a problem in a course, for all students or one specific student.
@@ -55,19 +66,49 @@ def rescore_problem(entry_id, xmodule_instance_args):
 
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
+
+    If there are more than settings.RESCORE_STUDENT_MODULES_PER_TASK submissions to rescore,
+    they are split across `rescore_problem_subtask` subtasks.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
     update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
 
-    def filter_fcn(modules_to_update):
-        """Filter that matches problems which are marked as being done"""
-        return modules_to_update.filter(state__contains='"done": true')
-
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    def create_subtask_fcn(module_range, initial_subtask_status):
+        """Creates a subtask to rescore a range of StudentModules."""
+        return rescore_problem_subtask.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                module_range,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    visit_fcn = partial(
+        perform_module_state_update,
+        update_fcn,
+        _filter_done_problems,
+        create_subtask_fcn=create_subtask_fcn,
+        modules_per_task=settings.RESCORE_STUDENT_MODULES_PER_TASK,
+    )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task()  # pylint: disable=not-callable
+def rescore_problem_subtask(entry_id, xmodule_instance_args, module_range, subtask_status_dict):
+    """
+    Rescores one range of the submissions to a problem, for a `rescore_problem` task
+    that has been split into subtasks.
+    """
+    update_fcn = partial(rescore_student_module_state, xmodule_instance_args)
+    subtask_status = perform_module_state_update_subtask(
+        update_fcn, _filter_done_problems, entry_id, module_range, subtask_status_dict
+    )
+    return subtask_status.to_dict()
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def reset_problem_attempts(entry_id, xmodule_instance_args):
     """Resets problem attempts to zero for a particular problem for all students in a course.
@@ -140,10 +181,42 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, shard_task=calculate_grades_csv_shard)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, course_id, shard_index, student_ids, report_time, subtask_status_dict):
+    """
+    Grade one chunk of the students of a course for a grade report that has
+    been split across subtasks, and queue the merge of the report once every
+    chunk has been graded.
+    """
+    course_key = CourseKey.from_string(course_id)
+    try:
+        subtask_status = generate_grades_csv_shard(
+            entry_id, course_key, shard_index, student_ids, subtask_status_dict
+        )
+    finally:
+        # Even if this chunk failed, the last subtask to finish has to merge
+        # the report, or the task would end without one.
+        if claim_grades_csv_merge(entry_id):
+            merge_grades_csv.apply_async(
+                (entry_id, course_id, report_time),
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+    return subtask_status.to_dict()
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def merge_grades_csv(entry_id, course_id, report_time):
+    """
+    Merge the shards of a grade report generated by `calculate_grades_csv_shard`
+    subtasks into the final report.
+    """
+    merge_grades_csv_shards(entry_id, CourseKey.from_string(course_id), report_time)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
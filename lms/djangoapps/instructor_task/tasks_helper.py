@@ -6,13 +6,16 @@ running state of a course.
 import json
 import urllib
 from datetime import datetime
+from itertools import chain, count
 from time import time
 import unicodecsv
 
 from celery import Task, current_task
 from celery.utils.log import get_task_logger
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -31,6 +34,14 @@ from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    SUBTASK_LOCK_EXPIRE,
+    check_subtask_is_valid,
+    filter_queryset_for_range,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from student.models import CourseEnrollment
 
 # define different loggers for use within tasks and on client side
@@ -257,7 +268,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, entry_id, course_id, task_input, action_name,
+                                create_subtask_fcn=None, modules_per_task=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -275,6 +287,11 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `create_subtask_fcn` is not None and there are more than `modules_per_task` StudentModules to
+    update, the update is instead split across subtasks of `modules_per_task` modules each, which call
+    perform_module_state_update_subtask.  `create_subtask_fcn` takes the range of modules the subtask
+    is to update and its initial SubtaskStatus, as for queue_subtasks_for_query.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -319,6 +336,12 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
         modules_to_update = filter_fcn(modules_to_update)
 
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+
+    if create_subtask_fcn is not None and modules_per_task and task_progress.total > modules_per_task:
+        return _queue_module_state_subtasks(
+            entry_id, action_name, modules_to_update, create_subtask_fcn, modules_per_task
+        )
+
     task_progress.update_task_state()
 
     for module_to_update in modules_to_update:
@@ -341,6 +364,85 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     return task_progress.update_task_state()
 
 
+def _queue_module_state_subtasks(entry_id, action_name, modules_to_update, create_subtask_fcn, modules_per_task):
+    """
+    Queue one subtask per range of `modules_per_task` of the StudentModules in `modules_to_update`,
+    using the same subtask machinery as bulk email.
+
+    Returns the task progress as stored in the InstructorTask object.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the parent task was requeued after its subtasks were already queued
+    # (e.g. after a loss of connection to the broker), don't queue them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its subtasks", entry.task_id)
+        return json.loads(entry.task_output)
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        create_subtask_fcn,
+        modules_to_update,
+        [],
+        modules_per_task,
+        item_ranges=True,
+    )
+
+
+def perform_module_state_update_subtask(update_fcn, filter_fcn, entry_id, module_range, subtask_status_dict):
+    """
+    Performs the update of perform_module_state_update on the StudentModules in `module_range`,
+    as one of the subtasks that the InstructorTask `entry_id` was split into.
+
+    The StudentModules are loaded, along with their students, in a single query, and are all
+    updated with the same module descriptor.  Each update is committed in its own transaction,
+    so that rescoring one module doesn't hold the row locks of others, and `update_fcn` must not
+    manage transactions itself.  If an update raises an exception, it is rolled back, and it and
+    the rest of the subtask's updates are counted as failed.
+
+    Returns the final SubtaskStatus of this subtask.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Raises a DuplicateTaskException if this subtask was already run.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    modules_to_update = []
+    num_committed = 0
+    try:
+        entry = InstructorTask.objects.get(pk=entry_id)
+        course_id = entry.course_id
+        task_input = json.loads(entry.task_input)
+        usage_key = course_id.make_usage_key_from_deprecated_string(task_input.get('problem_url'))
+        module_descriptor = modulestore().get_item(usage_key)
+
+        modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key=usage_key)
+        if filter_fcn is not None:
+            modules_to_update = filter_fcn(modules_to_update)
+        modules_to_update = list(
+            filter_queryset_for_range(modules_to_update, module_range).select_related('student')
+        )
+
+        for module_to_update in modules_to_update:
+            with transaction.commit_on_success():
+                update_status = update_fcn(module_descriptor, module_to_update)
+                if update_status not in (UPDATE_STATUS_SUCCEEDED, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED):
+                    raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+            num_committed += 1
+            subtask_status.increment(**{update_status: 1})
+    except Exception:
+        TASK_LOG.exception(u"Subtask %s of task %s failed", current_task_id, entry_id)
+        subtask_status.increment(failed=len(modules_to_update) - num_committed, state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status
+
+
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
     """Gets task_id from `xmodule_instance_args` dict, or returns default value if missing."""
     return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID) if xmodule_instance_args is not None else UNKNOWN_TASK_ID
@@ -368,16 +470,24 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None):
+                                  grade_bucket_type=None, student_module=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    If the student's StudentModule for a `module_descriptor` without children has already been loaded,
+    it can be passed as `student_module`, to save looking it up again.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    student_modules = None
+    if student_module is not None and not module_descriptor.has_children:
+        student_modules = [student_module]
+    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+        course_id, student, module_descriptor, student_modules=student_modules
+    )
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
     # information:
@@ -423,11 +533,21 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     Returns True if problem was successfully rescored for the given student, and False
     if problem encountered some kind of error in rescoring.
     '''
+    return rescore_student_module_state(xmodule_instance_args, module_descriptor, student_module)
+
+
+def rescore_student_module_state(xmodule_instance_args, module_descriptor, student_module):
+    """
+    Rescores like rescore_problem_module_state, in the caller's transaction.
+    """
     # unpack the StudentModule:
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
-    instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
+    instance = _get_module_instance_for_task(
+        course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore',
+        student_module=student_module,
+    )
 
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -528,34 +648,23 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     )
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def _grades_csv_rows(course_id, students, task_progress, extra_meta=None, status_interval=100):
     """
-    For a given `course_id`, generate a grades CSV file for all students that
-    are enrolled, and store using a `ReportStore`. Once created, the files can
-    be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
+    Grade `students` in the course `course_id` and build rows for a grades CSV.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    Returns a tuple `(header, rows, err_rows)`. `header` is the header row, or
+    None if no student could be graded. `rows` holds one row per graded
+    student, and `err_rows` one row per student who could not be graded;
+    neither includes a header row. `task_progress` is updated as students are
+    graded, and the task state is saved every `status_interval` students.
     """
-    start_time = time()
-    start_date = datetime.now(UTC)
-    status_interval = 100
-    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
-
-    # Loop over all our students and build our CSV lists in memory
     header = None
     rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    err_rows = []
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+            task_progress.update_task_state(extra_meta=extra_meta)
         task_progress.attempted += 1
 
         if gradeset:
@@ -564,7 +673,6 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             if not header:
                 # Encode the header row in utf-8 encoding in case there are unicode characters
                 header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
-                rows.append(["id", "email", "username", "grade"] + header)
 
             percents = {
                 section['label']: section.get('percent', 0.0)
@@ -585,6 +693,47 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.failed += 1
             err_rows.append([student.id, student.username, err_msg])
 
+    if header is not None:
+        header = ["id", "email", "username", "grade"] + header
+    return header, rows, err_rows
+
+
+def upload_grades_csv(_xmodule_instance_args, entry_id, course_id, _task_input, action_name, shard_task=None):
+    """
+    For a given `course_id`, generate a grades CSV file for all students that
+    are enrolled, and store using a `ReportStore`. Once created, the files can
+    be accessed by instantiating another `ReportStore` (via
+    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
+    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
+    that are visible in ReportStore will be complete ones.
+
+    If `shard_task` is given and more than
+    `settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK` students are enrolled, the
+    students are instead split across `shard_task` subtasks, which each store
+    a shard of the report (see `generate_grades_csv_shard`).
+
+    As we start to add more CSV downloads, it will probably be worthwhile to
+    make a more general CSVDoc class instead of building out the rows like we
+    do here.
+    """
+    start_time = time()
+    start_date = datetime.now(UTC)
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    if shard_task is not None and students_per_task and task_progress.total > students_per_task:
+        return _queue_grades_csv_shards(
+            entry_id, course_id, enrolled_students, action_name, start_time, shard_task, students_per_task
+        )
+
+    # Loop over all our students and build our CSV lists in memory
+    current_step = {'step': 'Calculating Grades'}
+    header, rows, err_rows = _grades_csv_rows(course_id, enrolled_students, task_progress, extra_meta=current_step)
+    if header is not None:
+        rows.insert(0, header)
+    err_rows.insert(0, ["id", "username", "error_msg"])
+
     # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
@@ -600,6 +749,185 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _queue_grades_csv_shards(entry_id, course_id, students, action_name, report_time, shard_task, students_per_task):
+    """
+    Queue one `shard_task` subtask per chunk of `students_per_task` students,
+    using the same subtask machinery as bulk email.
+
+    Returns the task progress as stored in the InstructorTask object.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the parent task was requeued after its subtasks were already queued
+    # (e.g. after a loss of connection to the broker), don't queue them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its grade report shards", entry.task_id)
+        return json.loads(entry.task_output)
+
+    shard_indices = count()
+
+    def _create_grades_csv_shard_subtask(to_list, initial_subtask_status):
+        """Creates a subtask to grade the students in `to_list`."""
+        return shard_task.subtask(
+            (
+                entry_id,
+                unicode(course_id),
+                next(shard_indices),
+                [item['pk'] for item in to_list],
+                report_time,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grades_csv_shard_subtask,
+        students,
+        [],
+        students_per_task,
+    )
+
+
+def _grades_csv_shard_name(kind, shard_index):
+    """
+    Returns the name of a grade report shard. Names sort in shard order.
+    """
+    return u"{}_{:06d}.csv".format(kind, shard_index)
+
+
+def generate_grades_csv_shard(entry_id, course_id, shard_index, student_ids, subtask_status_dict):
+    """
+    Grade the students with ids `student_ids` and store the resulting rows as
+    shards of the grade report being generated by the InstructorTask
+    `entry_id`. If that fails, all of the students are listed in the error
+    shard instead, so they aren't missing from the merged report.
+
+    Returns the final SubtaskStatus of this subtask. Whether or not it
+    succeeds, the caller should then check `claim_grades_csv_merge` to see
+    whether it should merge the shards into the final report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Raises a DuplicateTaskException if this subtask was already run.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        entry = InstructorTask.objects.get(pk=entry_id)
+        task_progress = TaskProgress(u'graded', len(student_ids), time())
+        students = User.objects.filter(pk__in=student_ids).order_by('pk')
+        header, rows, err_rows = _grades_csv_rows(course_id, students, task_progress)
+
+        report_store = ReportStore.from_config()
+        # The grades shard is stored last, so that if storing fails, the error
+        # shard stored on failure replaces any error shard stored here.
+        if err_rows:
+            report_store.store_shard(entry.task_id, _grades_csv_shard_name('errors', shard_index), err_rows)
+        report_store.store_shard(
+            entry.task_id, _grades_csv_shard_name('grades', shard_index), [header or []] + rows
+        )
+    except Exception as exc:
+        TASK_LOG.exception(u"Grade report shard %s of task %s failed", current_task_id, entry_id)
+        _store_failed_grades_csv_shard(entry_id, shard_index, student_ids, exc)
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status
+
+
+def _store_failed_grades_csv_shard(entry_id, shard_index, student_ids, exc):
+    """
+    Store an error shard listing every one of `student_ids`, for a grade
+    report shard that failed with the exception `exc`.
+    """
+    err_msg = u"Grade report shard failed: {}".format(exc)
+    try:
+        entry = InstructorTask.objects.get(pk=entry_id)
+        usernames = dict(User.objects.filter(pk__in=student_ids).values_list('id', 'username'))
+        ReportStore.from_config().store_shard(
+            entry.task_id,
+            _grades_csv_shard_name('errors', shard_index),
+            [[student_id, usernames.get(student_id, ''), err_msg] for student_id in student_ids],
+        )
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Could not store the error shard %s of task %s", shard_index, entry_id)
+
+
+def claim_grades_csv_merge(entry_id):
+    """
+    Returns True if all the subtasks of the InstructorTask `entry_id` are done
+    and the caller is the first to notice, and so should merge the shards.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return False
+    # cache.add fails if the key already exists
+    return cache.add("grade-report-merge-{}".format(entry.task_id), 'true', SUBTASK_LOCK_EXPIRE)
+
+
+def _merged_shard_rows(report_store, task_id, shard_names, has_header=False):
+    """
+    Yields the rows of all the given shards in order, reading one shard at a
+    time. If `has_header` is set, the first row of each shard is a header row
+    (possibly empty); only the first non-empty one is kept.
+    """
+    header_written = not has_header
+    for shard_name in shard_names:
+        rows = report_store.shard_rows(task_id, shard_name)
+        if has_header:
+            header = next(rows, [])
+            if header and not header_written:
+                header_written = True
+                yield header
+        for row in rows:
+            yield row
+
+
+def merge_grades_csv_shards(entry_id, course_id, report_time):
+    """
+    Merge the shards stored by `generate_grades_csv_shard` for the
+    InstructorTask `entry_id` into the final grade report (and error report,
+    if any student could not be graded), then delete the shards.
+
+    `report_time` is the time the report was requested, in seconds since the
+    epoch; it is used to name the reports.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    report_store = ReportStore.from_config()
+    report_date = datetime.fromtimestamp(report_time, UTC)
+    shard_names = report_store.shard_names(entry.task_id)
+
+    grade_shards = [name for name in shard_names if name.startswith('grades')]
+    upload_csv_to_report_store(
+        _merged_shard_rows(report_store, entry.task_id, grade_shards, has_header=True),
+        'grade_report',
+        course_id,
+        report_date,
+    )
+
+    err_shards = [name for name in shard_names if name.startswith('errors')]
+    if err_shards:
+        upload_csv_to_report_store(
+            chain(
+                [["id", "username", "error_msg"]],
+                _merged_shard_rows(report_store, entry.task_id, err_shards),
+            ),
+            'grade_report_err',
+            course_id,
+            report_date,
+        )
+
+    report_store.delete_shards(entry.task_id)
+    TASK_LOG.info(u"Merged %d grade report shards for task %s", len(shard_names), entry.task_id)
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
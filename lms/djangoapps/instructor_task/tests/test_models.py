@@ -93,6 +93,22 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_shards(self):
+        """
+        Test storing, reading back and deleting report shards.
+        """
+        report_store = self.create_report_store()
+        report_store.store_shard('task', 'shard_000001.csv', [[u'b', 2]])
+        report_store.store_shard('task', 'shard_000000.csv', [[u'ni\xf1o', 1], []])
+
+        self.assertEqual(report_store.shard_names('task'), ['shard_000000.csv', 'shard_000001.csv'])
+        self.assertEqual(list(report_store.shard_rows('task', 'shard_000000.csv')), [[u'ni\xf1o', u'1'], []])
+        # Shards are never listed as downloadable reports
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.delete_shards('task')
+        self.assertEqual(report_store.shard_names('task'), [])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -7,7 +7,7 @@ from mock import Mock, patch
 
 from student.models import CourseEnrollment
 
-from instructor_task.subtasks import queue_subtasks_for_query
+from instructor_task.subtasks import queue_subtasks_for_query, filter_queryset_for_range
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase
 
@@ -26,8 +26,12 @@ class TestSubtasks(InstructorTaskCourseTestCase):
             random_id = uuid4().hex[:8]
             self.create_student(username='student{0}'.format(random_id))
 
-    def _queue_subtasks(self, create_subtask_fcn, items_per_task, initial_count, extra_count):
-        """Queue subtasks while enrolling more students into course in the middle of the process."""
+    def _queue_subtasks(self, create_subtask_fcn, items_per_task, initial_count, extra_count, item_ranges=False):
+        """
+        Queue subtasks while enrolling more students into course in the middle of the process.
+
+        Returns the queryset the subtasks were queued for.
+        """
 
         task_id = str(uuid4())
         instructor_task = InstructorTaskFactory.create(
@@ -54,7 +58,9 @@ class TestSubtasks(InstructorTaskCourseTestCase):
                 item_queryset=task_queryset,
                 item_fields=[],
                 items_per_task=items_per_task,
+                item_ranges=item_ranges,
             )
+        return task_queryset
 
     def test_queue_subtasks_for_query1(self):
         """Test queue_subtasks_for_query() if the last subtask only needs to accommodate < items_per_tasks items."""
@@ -79,3 +85,25 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    def _assert_range_sizes(self, task_queryset, mock_create_subtask_fcn, sizes):
+        """Check the number of items in the range passed to each subtask."""
+        item_ranges = [args[0][0] for args in mock_create_subtask_fcn.call_args_list]
+        self.assertEqual(
+            [filter_queryset_for_range(task_queryset, item_range).count() for item_range in item_ranges],
+            sizes
+        )
+
+    def test_queue_subtask_ranges_for_query1(self):
+        """Test queue_subtasks_for_query() with item ranges, if the last subtask only needs < items_per_tasks items."""
+
+        mock_create_subtask_fcn = Mock()
+        task_queryset = self._queue_subtasks(mock_create_subtask_fcn, 3, 7, 1, item_ranges=True)
+        self._assert_range_sizes(task_queryset, mock_create_subtask_fcn, [3, 3, 2])
+
+    def test_queue_subtask_ranges_for_query2(self):
+        """Test queue_subtasks_for_query() with item ranges, if the last subtask needs > items_per_task items."""
+
+        mock_create_subtask_fcn = Mock()
+        task_queryset = self._queue_subtasks(mock_create_subtask_fcn, 3, 8, 3, item_ranges=True)
+        self._assert_range_sizes(task_queryset, mock_create_subtask_fcn, [3, 3, 5])
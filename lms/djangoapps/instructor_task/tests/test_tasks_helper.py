@@ -5,15 +5,79 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
-from mock import Mock, patch
+import json
+from celery.states import FAILURE
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from mock import ANY, Mock, patch
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
 import tempfile
+import unicodecsv
+from uuid import uuid4
 
+from xmodule.modulestore.django import clear_existing_modulestores
+from xmodule.modulestore.tests.django_utils import TEST_DATA_MIXED_TOY_MODULESTORE
 from xmodule.modulestore.tests.factories import CourseFactory
 
+from courseware.models import StudentModule
+from courseware.tests.factories import StudentModuleFactory
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
-from instructor_task.models import ReportStore
-from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.subtasks import SubtaskStatus, initialize_subtask_info
+from instructor_task.tasks import calculate_grades_csv_shard
+from instructor_task.tasks_helper import (
+    claim_grades_csv_merge,
+    cohort_students_and_upload,
+    generate_grades_csv_shard,
+    merge_grades_csv_shards,
+    perform_module_state_update_subtask,
+    UPDATE_STATUS_SUCCEEDED,
+    upload_grades_csv,
+    upload_students_csv,
+)
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin
+from student.models import CourseEnrollment
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_TOY_MODULESTORE)
+class TestModuleStateUpdateSubtask(TransactionTestCase):
+    """
+    Tests that a subtask commits each module state update in its own transaction.
+    """
+    def setUp(self):
+        clear_existing_modulestores()
+        course_id = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        usage_key = course_id.make_usage_key('html', 'toyhtml')
+        self.modules = [
+            StudentModuleFactory.create(course_id=course_id, module_state_key=usage_key, grade=0, max_grade=1)
+            for __ in range(3)
+        ]
+        task_input = json.dumps({'problem_url': usage_key.to_deprecated_string()})
+        self.entry = InstructorTaskFactory.create(course_id=course_id, task_id=str(uuid4()), task_input=task_input)
+        self.subtask_id = str(uuid4())
+        initialize_subtask_info(self.entry, 'rescored', len(self.modules), [self.subtask_id])
+
+    def test_failed_update_rolled_back(self):
+        def update_fcn(_module_descriptor, student_module):
+            """Scores each module, failing on the second one after it's saved"""
+            student_module.grade = 1
+            student_module.save()
+            if student_module.id == self.modules[1].id:
+                raise Exception('rescoring failed')
+            return UPDATE_STATUS_SUCCEEDED
+
+        module_range = {'after_pk': None, 'last_pk': self.modules[-1].id}
+        subtask_status = SubtaskStatus.create(self.subtask_id).to_dict()
+        with self.assertRaises(Exception):
+            perform_module_state_update_subtask(update_fcn, None, self.entry.id, module_range, subtask_status)
+
+        # The first update was committed, the failed one rolled back, and the last one never made
+        grades = [StudentModule.objects.get(id=module.id).grade for module in self.modules]
+        self.assertEqual(grades, [1, 0, 0])
+        entry = InstructorTask.objects.get(id=self.entry.id)
+        self.assertEqual(json.loads(entry.subtasks)['status'][self.subtask_id]['state'], FAILURE)
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 1, 'failed': 2}, json.loads(entry.task_output))
 
 
 @ddt.ddt
@@ -58,6 +122,87 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
 
+class TestInstructorGradeReportShards(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that grade reports split across subtasks are merged correctly.
+    """
+    def setUp(self):
+        self.course = CourseFactory.create()
+        self.students = [self.create_student('student{}'.format(i)) for i in range(3)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_type='grade_course', task_id=str(uuid4())
+        )
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_sharded_report(self, _mock_current_task):
+        shard_task = Mock()
+        upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded', shard_task=shard_task)
+
+        # Two subtasks are queued, one per chunk of two students
+        self.assertEqual(shard_task.subtask.call_count, 2)
+        merge_claims = []
+        for call in shard_task.subtask.call_args_list:
+            entry_id, course_id, shard_index, student_ids, report_time, subtask_status = call[0][0]
+            self.assertEqual(course_id, unicode(self.course.id))
+            subtask_status = generate_grades_csv_shard(
+                entry_id, self.course.id, shard_index, student_ids, subtask_status
+            )
+            self.assertEqual(subtask_status.succeeded, len(student_ids))
+            merge_claims.append(claim_grades_csv_merge(entry_id))
+
+        # Only the last subtask to finish merges the report
+        self.assertEqual(merge_claims, [False, True])
+        merge_grades_csv_shards(self.entry.id, self.course.id, report_time)
+
+        report_store = ReportStore.from_config()
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        with open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            csv_rows = list(unicodecsv.DictReader(csv_file))
+        self.assertItemsEqual([row['username'] for row in csv_rows], [student.username for student in self.students])
+        self.assertEqual(ReportStore.from_config().shard_names(self.entry.task_id), [])
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks.merge_grades_csv')
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_last_shard_fails(self, _mock_current_task, mock_merge_task):
+        shard_task = Mock()
+        upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded', shard_task=shard_task)
+        (first_args,), (last_args,) = [call[0] for call in shard_task.subtask.call_args_list]
+
+        calculate_grades_csv_shard(*first_args)
+        self.assertFalse(mock_merge_task.apply_async.called)
+        with patch('instructor_task.tasks_helper._grades_csv_rows', side_effect=Exception('grading failed')):
+            with self.assertRaises(Exception):
+                calculate_grades_csv_shard(*last_args)
+
+        # The failed subtask still queues the merge, which reports its students as errors
+        mock_merge_task.apply_async.assert_called_once_with(
+            (self.entry.id, unicode(self.course.id), last_args[4]), routing_key=ANY
+        )
+        merge_grades_csv_shards(self.entry.id, self.course.id, last_args[4])
+        report_store = ReportStore.from_config()
+        err_links = [name for name, __ in report_store.links_for(self.course.id) if 'grade_report_err' in name]
+        self.assertEqual(len(err_links), 1)
+        with open(report_store.path_to(self.course.id, err_links[0])) as csv_file:
+            err_rows = list(unicodecsv.DictReader(csv_file))
+        self.assertItemsEqual(
+            [row['username'] for row in err_rows],
+            [student.username for student in self.students if student.id in last_args[3]]
+        )
+        self.assertEqual(report_store.shard_names(self.entry.task_id), [])
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_small_course_not_sharded(self, _mock_current_task):
+        shard_task = Mock()
+        CourseEnrollment.unenroll(self.students[0], self.course.id)
+        result = upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded', shard_task=shard_task)
+        self.assertFalse(shard_task.subtask.called)
+        self.assertDictContainsSubset({'attempted': 2, 'succeeded': 2, 'failed': 0}, result)
+
+
 @ddt.ddt
 class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
     """
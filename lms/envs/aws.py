@@ -199,6 +199,9 @@ BULK_EMAIL_MAX_RETRIES = ENV_TOKENS.get('BULK_EMAIL_MAX_RETRIES', BULK_EMAIL_MAX
 BULK_EMAIL_INFINITE_RETRY_CAP = ENV_TOKENS.get('BULK_EMAIL_INFINITE_RETRY_CAP', BULK_EMAIL_INFINITE_RETRY_CAP)
 BULK_EMAIL_LOG_SENT_EMAILS = ENV_TOKENS.get('BULK_EMAIL_LOG_SENT_EMAILS', BULK_EMAIL_LOG_SENT_EMAILS)
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS', BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS', BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_MAX_THROTTLE_BACKOFFS = ENV_TOKENS.get('BULK_EMAIL_MAX_THROTTLE_BACKOFFS', BULK_EMAIL_MAX_THROTTLE_BACKOFFS)
+BULK_EMAIL_SEND_BATCH_SIZE = ENV_TOKENS.get('BULK_EMAIL_SEND_BATCH_SIZE', BULK_EMAIL_SEND_BATCH_SIZE)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it.  At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -228,6 +231,9 @@ for feature, value in ENV_FEATURES.items():
     FEATURES[feature] = value
 
 WIKI_ENABLED = ENV_TOKENS.get('WIKI_ENABLED', WIKI_ENABLED)
+COURSE_OUTLINE_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_OUTLINE_CACHE_TIMEOUT', COURSE_OUTLINE_CACHE_TIMEOUT)
+DISCUSSION_MAPS_CACHE_TIMEOUT = ENV_TOKENS.get('DISCUSSION_MAPS_CACHE_TIMEOUT', DISCUSSION_MAPS_CACHE_TIMEOUT)
+COHORT_MEMBERSHIP_CACHE_TIMEOUT = ENV_TOKENS.get('COHORT_MEMBERSHIP_CACHE_TIMEOUT', COHORT_MEMBERSHIP_CACHE_TIMEOUT)
 local_loglevel = ENV_TOKENS.get('LOCAL_LOGLEVEL', 'INFO')
 
 LOGGING = get_logger_config(LOG_DIR,
@@ -242,6 +248,17 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_TIMEOUT = ENV_TOKENS.get("COMMENTS_SERVICE_TIMEOUT", COMMENTS_SERVICE_TIMEOUT)
+COMMENTS_SERVICE_POOL_MAXSIZE = ENV_TOKENS.get("COMMENTS_SERVICE_POOL_MAXSIZE", COMMENTS_SERVICE_POOL_MAXSIZE)
+COMMENTS_SERVICE_THREAD_LIST_CACHE_TIMEOUT = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_THREAD_LIST_CACHE_TIMEOUT", COMMENTS_SERVICE_THREAD_LIST_CACHE_TIMEOUT
+)
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS", COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS
+)
+COMMENTS_SERVICE_CONCURRENT_TIMEOUT = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_CONCURRENT_TIMEOUT", COMMENTS_SERVICE_CONCURRENT_TIMEOUT
+)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -260,6 +277,9 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
         CODE_JAIL[name] = value
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+CODE_JAIL_WORKER_POOL = ENV_TOKENS.get('CODE_JAIL_WORKER_POOL', CODE_JAIL_WORKER_POOL)
+SAFE_EXEC_CACHE_MAX_LOCAL_ENTRIES = ENV_TOKENS.get('SAFE_EXEC_CACHE_MAX_LOCAL_ENTRIES', SAFE_EXEC_CACHE_MAX_LOCAL_ENTRIES)
+SAFE_EXEC_CACHE_MAX_RESULT_SIZE = ENV_TOKENS.get('SAFE_EXEC_CACHE_MAX_RESULT_SIZE', SAFE_EXEC_CACHE_MAX_RESULT_SIZE)
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -342,6 +362,10 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+STATIC_CONTENT_DISK_CACHE_ROOT = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_ROOT', STATIC_CONTENT_DISK_CACHE_ROOT)
+STATIC_CONTENT_DISK_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_SIZE', STATIC_CONTENT_DISK_CACHE_MAX_SIZE
+)
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -415,6 +439,14 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = ENV_TOKENS.get(
+    "GRADES_DOWNLOAD_STUDENTS_PER_TASK", GRADES_DOWNLOAD_STUDENTS_PER_TASK
+)
+
+# Rescoring
+RESCORE_STUDENT_MODULES_PER_TASK = ENV_TOKENS.get(
+    "RESCORE_STUDENT_MODULES_PER_TASK", RESCORE_STUDENT_MODULES_PER_TASK
+)
 
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
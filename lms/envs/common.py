@@ -305,6 +305,43 @@ FEATURES = {
 
     # Separate the verification flow from the payment flow
     'SEPARATE_VERIFICATION_FROM_PAYMENT': False,
+
+    # Store computed grade summaries in the database and read them back until
+    # the student's scores or the course content change
+    'ENABLE_PERSISTENT_GRADES': False,
+
+    # Read grade distributions for staff histograms and the instructor
+    # dashboard from the precomputed counts in courseware.GradeDistribution.
+    # The counts are only kept up to date while this is on, so run the
+    # rebuild_grade_distributions command for existing courses whenever
+    # turning it on.
+    'ENABLE_PRECOMPUTED_GRADE_DISTRIBUTIONS': False,
+
+    # Build the courseware table of contents from a cached index of the course
+    # outline, rather than from the course's chapter and section modules
+    'ENABLE_COURSE_OUTLINE_INDEX': False,
+
+    # Cache the decisions of courseware.access.has_access on the user object,
+    # for the rest of the request
+    'ENABLE_ACCESS_DECISION_CACHE': False,
+
+    # Send requests to the comments service over a pool of keep-alive connections
+    'ENABLE_COMMENTS_SERVICE_CONNECTION_POOL': False,
+
+    # Make each GET of a comments service user, thread or comment only once per
+    # request, until a change is sent to the comments service
+    'ENABLE_COMMENTS_SERVICE_REQUEST_MEMO': False,
+
+    # Make the independent comments service requests of forum pages at the
+    # same time, in a pool of threads
+    'ENABLE_CONCURRENT_COMMENTS_SERVICE_REQUESTS': False,
+
+    # Cache the discussion category and id maps of each version of a course
+    'ENABLE_DISCUSSION_MAPS_CACHE': False,
+
+    # Cache each user's cohort in each course, for the rest of the request and
+    # in the shared cache until their membership changes
+    'ENABLE_COHORT_MEMBERSHIP_CACHE': False,
 }
 
 # Ignore static asset files on import which match this pattern
@@ -442,6 +479,33 @@ LIB_URL = '/static/js/'
 BOOK_URL = 'https://mitxstatic.s3.amazonaws.com/book_images/'  # For AWS deploys
 RSS_TIMEOUT = 600
 
+# How long (in seconds) to cache the outline index of each version of a course,
+# when FEATURES['ENABLE_COURSE_OUTLINE_INDEX'] is set
+COURSE_OUTLINE_CACHE_TIMEOUT = 24 * 60 * 60
+
+# How long (in seconds) to cache the discussion maps of each version of a
+# course, when FEATURES['ENABLE_DISCUSSION_MAPS_CACHE'] is set
+DISCUSSION_MAPS_CACHE_TIMEOUT = 24 * 60 * 60
+
+# How long (in seconds) to cache each user's cohort in a course, when
+# FEATURES['ENABLE_COHORT_MEMBERSHIP_CACHE'] is set
+COHORT_MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+# Timeout (in seconds) of requests to the comments service, and how many
+# connections to it to keep alive in each process, when
+# FEATURES['ENABLE_COMMENTS_SERVICE_CONNECTION_POOL'] is set
+COMMENTS_SERVICE_TIMEOUT = 5
+COMMENTS_SERVICE_POOL_MAXSIZE = 10
+
+# How long (in seconds) to cache pages of forum thread listings (0 to not cache them)
+COMMENTS_SERVICE_THREAD_LIST_CACHE_TIMEOUT = 0
+
+# How many comments service requests each process makes at the same time, and
+# how long (in seconds) a page waits for all of its requests, when
+# FEATURES['ENABLE_CONCURRENT_COMMENTS_SERVICE_REQUESTS'] is set
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = 8
+COMMENTS_SERVICE_CONCURRENT_TIMEOUT = 10
+
 # Configuration option for when we want to grab server error pages
 STATIC_GRAB = False
 DEV_CONTENT = True
@@ -582,6 +646,12 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Directory to cache assets which are too large for memcached in, so they don't have to be
+# streamed from the contentstore on every request. None disables the cache.
+STATIC_CONTENT_DISK_CACHE_ROOT = None
+# Size in bytes past which the least recently used assets are evicted from that directory
+STATIC_CONTENT_DISK_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -654,6 +724,30 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# To run sandboxed code in a pool of long-lived sandbox processes, rather than
+# starting a new sandbox for each execution, set this to a dict of options
+# for capa.safe_exec.configure_worker_pool, e.g.
+#
+#   CODE_JAIL_WORKER_POOL = {
+#       'size': 4,                      # workers per server process
+#       'max_executions': 100,          # executions before a worker is replaced
+#       'max_memory': 200 * 1024 ** 2,  # bytes used before a worker is replaced
+#       # the modules the workers import, and the AppArmor profile they run code in
+#       'preimports': ['numpy', 'math'],
+#       'child_profile': 'codejail_worker_child',
+#   }
+#
+# The memory of the workers' imports (by default, including numpy) counts
+# against the CODE_JAIL VMEM limit of every execution, so VMEM has to allow
+# for it; see common/lib/capa/capa/safe_exec/README.rst.
+CODE_JAIL_WORKER_POOL = None
+
+# Results of sandboxed code are cached in memory in each process, in front of
+# the default cache.  How many results to keep in memory, and the largest
+# result (in bytes, serialized) to cache at all.
+SAFE_EXEC_CACHE_MAX_LOCAL_ENTRIES = 1000
+SAFE_EXEC_CACHE_MAX_RESULT_SIZE = 512 * 1024
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1400,11 +1494,21 @@ BULK_EMAIL_ROUTING_KEY = HIGH_PRIORITY_QUEUE
 # a bulk email message.
 BULK_EMAIL_LOG_SENT_EMAILS = False
 
-# Delay in seconds to sleep between individual mail messages being sent,
-# when a bulk email task is retried for rate-related reasons.  Choose this
-# value depending on the number of workers that might be sending email in
+# Number of messages a bulk email task hands to the mail connection at once.
+BULK_EMAIL_SEND_BATCH_SIZE = 1
+
+# Delay in seconds to sleep between batches of mail messages being sent,
+# when a bulk email task is throttled or retried for rate-related reasons.
+# The delay doubles each time the task is throttled again, up to the
+# maximum, and halves each time a batch is sent.  Choose these values
+# depending on the number of workers that might be sending email in
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
+BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS = 1
+
+# Number of times in a row a bulk email task slows down after being throttled,
+# before retrying the task instead.
+BULK_EMAIL_MAX_THROTTLE_BACKOFFS = 3
 
 ############################# Email Opt In ####################################
 
@@ -1631,9 +1735,21 @@ REGISTRATION_EXTRA_FIELDS = {
 CERT_NAME_SHORT = "Certificate"
 CERT_NAME_LONG = "Certificate of Achievement"
 
+###################### Rescoring ######################
+
+# If set, rescoring a problem with more submissions than this is split into
+# subtasks rescoring this many submissions each.
+RESCORE_STUDENT_MODULES_PER_TASK = None
+
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# If set, grade reports for courses with more enrolled students than this are
+# split into subtasks grading this many students each.  The subtasks store
+# shards of the report which are merged at the end, so the report store must
+# be shared by all workers (i.e. S3).
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = None
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
@@ -0,0 +1,133 @@
+"""
+Make independent calls to the comments service at the same time.
+
+Forum pages need several things from the comments service which don't depend
+on each other, like the user's info and the thread being shown. Submitting each
+of them to a ConcurrentCalls runs them in a shared pool of threads, so a page
+waits for the slowest of them rather than for all of them in turn:
+
+    calls = ConcurrentCalls(metric_tags=[...])
+    calls.submit('user_info', cc_user.to_dict)
+    calls.submit('thread', thread.retrieve, recursive=False)
+    ...  # other work, in the meantime
+    results = calls.results()
+
+The calls are run in the calling thread, one after another as they're
+submitted, unless FEATURES['ENABLE_CONCURRENT_COMMENTS_SERVICE_REQUESTS'] is
+set. Only submit calls that just make requests to the comments service: the
+pool's threads have their own database connections.
+"""
+import os
+import sys
+import threading
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+from time import time
+
+import dogstats_wrapper as dog_stats_api
+from django.conf import settings
+from django.utils import translation
+
+from request_cache.middleware import RequestCache
+
+from .utils import CommentClientTimeoutError
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the pool of COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS threads that
+    this process runs concurrent calls in.
+    """
+    global _pool, _pool_pid  # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # The threads of a pool started before a fork are in the parent process.
+            _pool = ThreadPool(getattr(settings, 'COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS', 8))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run_call(func, args, kwargs, language, request_cache_data, metric_tags):
+    """
+    Run `func` in a pool thread, with the language and request cache of the
+    thread that submitted it.
+    """
+    request_cache = RequestCache.get_request_cache()
+    request_cache.data = request_cache_data
+    if language:
+        translation.activate(language)
+    try:
+        with dog_stats_api.timer('comment_client.concurrent.call.time', tags=metric_tags):
+            return func(*args, **kwargs)
+    finally:
+        translation.deactivate()
+        request_cache.data = {}
+
+
+class ConcurrentCalls(object):
+    """
+    A group of independent calls to the comments service, which all have to
+    finish within `timeout` seconds of the group being created (by default,
+    COMMENTS_SERVICE_CONCURRENT_TIMEOUT).
+    """
+    def __init__(self, timeout=None, metric_tags=None):
+        if timeout is None:
+            timeout = getattr(settings, 'COMMENTS_SERVICE_CONCURRENT_TIMEOUT', 10)
+        self.deadline = time() + timeout
+        self.metric_tags = metric_tags or []
+        self.concurrent = settings.FEATURES.get('ENABLE_CONCURRENT_COMMENTS_SERVICE_REQUESTS', False)
+        self._calls = []
+        self._start = time()
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        Start calling `func` with `args` and `kwargs`, and return its result
+        under `name` from `results`.
+        """
+        metric_tags = self.metric_tags + [u'call:{}'.format(name)]
+        if self.concurrent:
+            result = get_pool().apply_async(_run_call, (
+                func, args, kwargs,
+                translation.get_language(), RequestCache.get_request_cache().data, metric_tags,
+            ))
+            self._calls.append((name, result, None))
+            return
+
+        try:
+            with dog_stats_api.timer('comment_client.concurrent.call.time', tags=metric_tags):
+                self._calls.append((name, func(*args, **kwargs), None))
+        except Exception:  # pylint: disable=broad-except
+            # Raised from `results`, as it would have been from a pool thread.
+            self._calls.append((name, None, sys.exc_info()))
+
+    def results(self):
+        """
+        Wait for the calls to finish, and return a dict of their results by name.
+
+        Raises the exception of the first call (in the order they were
+        submitted) that raised one, or CommentClientTimeoutError if the calls
+        haven't finished by the deadline.
+        """
+        results = {}
+        try:
+            for name, result, exc_info in self._calls:
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                if self.concurrent:
+                    try:
+                        result = result.get(max(self.deadline - time(), 0))
+                    except TimeoutError:
+                        dog_stats_api.increment('comment_client.concurrent.timeout', tags=self.metric_tags)
+                        raise CommentClientTimeoutError(
+                            u"The comments service call {} didn't finish in time".format(name)
+                        )
+                results[name] = result
+        finally:
+            dog_stats_api.histogram(
+                'comment_client.concurrent.time', value=time() - self._start, tags=self.metric_tags
+            )
+        return results
@@ -73,7 +73,8 @@ class Model(object):
             url,
             self.default_retrieve_params,
             metric_tags=self._metric_tags,
-            metric_action='model.retrieve'
+            metric_action='model.retrieve',
+            memoize=True
         )
         self._update_from_response(response)
 
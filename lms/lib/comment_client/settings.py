@@ -6,3 +6,6 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# How long to keep pages of thread listings in the shared cache (0 to not cache them)
+THREAD_LIST_CACHE_TIMEOUT = getattr(settings, 'COMMENTS_SERVICE_THREAD_LIST_CACHE_TIMEOUT', 0)
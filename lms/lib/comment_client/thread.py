@@ -58,7 +58,8 @@ class Thread(models.Model):
             params,
             metric_tags=[u'course_id:{}'.format(query_params['course_id'])],
             metric_action='thread.search',
-            paged_results=True
+            paged_results=True,
+            cache_timeout=settings.THREAD_LIST_CACHE_TIMEOUT
         )
         if query_params.get('text'):
             search_query = query_params['text']
@@ -131,7 +132,8 @@ class Thread(models.Model):
             url,
             request_params,
             metric_action='model.retrieve',
-            metric_tags=self._metric_tags
+            metric_tags=self._metric_tags,
+            memoize=True
         )
         self._update_from_response(response)
 
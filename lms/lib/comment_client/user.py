@@ -130,6 +130,7 @@ class User(models.Model):
                 retrieve_params,
                 metric_action='model.retrieve',
                 metric_tags=self._metric_tags,
+                memoize=True,
             )
         except CommentClientRequestError as e:
             if e.status_code == 404:
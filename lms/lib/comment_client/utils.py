@@ -1,14 +1,29 @@
 from contextlib import contextmanager
+import copy
 import dogstats_wrapper as dog_stats_api
+import hashlib
 import logging
+import os
 import requests
+import threading
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 from time import time
 from uuid import uuid4
 from django.utils.translation import get_language
 
+from request_cache.middleware import RequestCache
+
 log = logging.getLogger(__name__)
 
+# The GET responses memoized for the rest of the request, in the request cache
+REQUEST_MEMO_KEY = 'comment_client.memo'
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,9 +65,69 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def get_session():
+    """
+    Return the requests session shared by this process's threads, which keeps
+    up to COMMENTS_SERVICE_POOL_MAXSIZE connections to each host alive.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            # Connections opened before a fork belong to the parent process.
+            maxsize = getattr(settings, 'COMMENTS_SERVICE_POOL_MAXSIZE', 10)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+def _send_request(method, url, **kwargs):
+    """
+    Send a request to the comments service, over a pooled connection if
+    FEATURES['ENABLE_COMMENTS_SERVICE_CONNECTION_POOL'] is set.
+    """
+    if settings.FEATURES.get('ENABLE_COMMENTS_SERVICE_CONNECTION_POOL'):
+        return get_session().request(method, url, **kwargs)
+    return requests.request(method, url, **kwargs)
+
+
+def _request_memo():
+    """
+    Return the memo of GET responses for the current request, or None if
+    FEATURES['ENABLE_COMMENTS_SERVICE_REQUEST_MEMO'] isn't set.
+    """
+    if not settings.FEATURES.get('ENABLE_COMMENTS_SERVICE_REQUEST_MEMO'):
+        return None
+    return RequestCache.get_request_cache().data.setdefault(REQUEST_MEMO_KEY, {})
+
+
+def _response_key(url, params):
+    """
+    Return a key for the response to a GET of `url` with `params`.
+    """
+    return (url, tuple(sorted((k, unicode(v)) for k, v in params.iteritems())), get_language())
+
+
+def _shared_cache_key(response_key):
+    """
+    Return the key of the shared cache to keep the response under `response_key` in.
+    """
+    return 'comment_client.response.{}'.format(hashlib.md5(repr(response_key)).hexdigest())
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False,
+                    memoize=False, cache_timeout=None):
+    """
+    Make a request to the comments service, and return its response.
 
+    GETs made with `memoize` are only made once per request, if
+    FEATURES['ENABLE_COMMENTS_SERVICE_REQUEST_MEMO'] is set; and GETs made with
+    a `cache_timeout` are kept in the shared cache for that many seconds. Any
+    other kind of request clears the memo, as it may change the answers.
+    """
     if metric_tags is None:
         metric_tags = []
 
@@ -62,6 +137,27 @@ def perform_request(method, url, data_or_params=None, raw=False,
 
     if data_or_params is None:
         data_or_params = {}
+
+    memo = _request_memo()
+    response_key = shared_cache_key = None
+    if method != 'get':
+        if memo:
+            memo.clear()
+    elif not raw:
+        if memoize or cache_timeout:
+            response_key = _response_key(url, data_or_params)
+        if memoize and memo is not None and response_key in memo:
+            dog_stats_api.increment('comment_client.request.memoized', tags=metric_tags)
+            return copy.deepcopy(memo[response_key])
+        if cache_timeout:
+            shared_cache_key = _shared_cache_key(response_key)
+            data = cache.get(shared_cache_key)
+            if data is not None:
+                dog_stats_api.increment('comment_client.request.cached', tags=metric_tags)
+                if memoize and memo is not None:
+                    memo[response_key] = copy.deepcopy(data)
+                return data
+
     headers = {
         'X-Edx-Api-Key': getattr(settings, "COMMENTS_SERVICE_KEY", None),
         'Accept-Language': get_language(),
@@ -76,13 +172,13 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = _send_request(
             method,
             url,
             data=data,
             params=params,
             headers=headers,
-            timeout=5
+            timeout=getattr(settings, 'COMMENTS_SERVICE_TIMEOUT', 5)
         )
 
     metric_tags.append(u'status_code:{}'.format(response.status_code))
@@ -129,6 +225,10 @@ def perform_request(method, url, data_or_params=None, raw=False,
                     value=data.get('num_pages', 1),
                     tags=metric_tags
                 )
+            if memoize and memo is not None:
+                memo[response_key] = copy.deepcopy(data)
+            if shared_cache_key:
+                cache.set(shared_cache_key, data, cache_timeout)
             return data
 
 
@@ -152,3 +252,7 @@ class CommentClient500Error(CommentClientError):
 
 class CommentClientMaintenanceError(CommentClientError):
     pass
+
+
+class CommentClientTimeoutError(CommentClientError):
+    pass
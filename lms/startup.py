@@ -44,6 +44,9 @@ def run():
     if settings.FEATURES.get('SEGMENT_IO_LMS') and hasattr(settings, 'SEGMENT_IO_LMS_KEY'):
         analytics.init(settings.SEGMENT_IO_LMS_KEY, flush_at=50)
 
+    if settings.CODE_JAIL_WORKER_POOL:
+        enable_code_jail_worker_pool()
+
     # Monkey patch the keyword function map
     if keyword_substitution.keyword_function_map_is_empty():
         keyword_substitution.add_keyword_function_map(get_keyword_function_map())
@@ -65,6 +68,15 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def enable_code_jail_worker_pool():
+    """
+    Run sandboxed problem code in a pool of long-lived sandbox processes.
+    """
+    from capa.safe_exec import configure_worker_pool
+
+    configure_worker_pool(**settings.CODE_JAIL_WORKER_POOL)
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
@@ -6,18 +6,24 @@ forums, and to the cohort admin views.
 import logging
 import random
 
-from django.db.models.signals import post_save, m2m_changed
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.http import Http404
 from django.utils.translation import ugettext as _
 
 from courseware import courses
 from eventtracking import tracker
+from request_cache.middleware import RequestCache
 from student.models import get_user_by_username_or_email
 from .models import CourseUserGroup, CourseUserGroupPartitionGroup
 
 log = logging.getLogger(__name__)
 
+# How many users' cohorts get_cohorts_for_users looks up in each query
+COHORTS_FOR_USERS_BATCH_SIZE = 500
+
 
 @receiver(post_save, sender=CourseUserGroup)
 def _cohort_added(sender, **kwargs):
@@ -55,20 +61,86 @@ def _cohort_membership_changed(sender, **kwargs):
     if reverse:
         user_id_iter = [instance.id]
         if action == "pre_clear":
-            cohort_iter = instance.course_groups.filter(group_type=CourseUserGroup.COHORT)
+            cohort_iter = list(instance.course_groups.filter(group_type=CourseUserGroup.COHORT))
         else:
-            cohort_iter = CourseUserGroup.objects.filter(pk__in=pk_set, group_type=CourseUserGroup.COHORT)
+            cohort_iter = list(CourseUserGroup.objects.filter(pk__in=pk_set, group_type=CourseUserGroup.COHORT))
     else:
         cohort_iter = [instance] if instance.group_type == CourseUserGroup.COHORT else []
         if action == "pre_clear":
-            user_id_iter = (user.id for user in instance.users.all())
+            user_id_iter = [user.id for user in instance.users.all()]
         else:
             user_id_iter = pk_set
 
+    _forget_cohort_memberships(user_id_iter, set(cohort.course_id for cohort in cohort_iter))
+
     for event in get_event_iter(user_id_iter, cohort_iter):
         tracker.emit(event_name, event)
 
 
+@receiver(pre_delete, sender=CourseUserGroup)
+def _cohort_deleting(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Remembers the members of a cohort being deleted, which doesn't send m2m_changed"""
+    if instance.group_type == CourseUserGroup.COHORT:
+        instance._deleted_member_ids = list(instance.users.values_list('id', flat=True))  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=CourseUserGroup)
+def _cohort_deleted(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Forgets the cached cohorts of the members of a deleted cohort"""
+    _forget_cohort_memberships(getattr(instance, '_deleted_member_ids', []), [instance.course_id])
+
+
+def _membership_cache_key(user_id, course_key):
+    """
+    Return the key of the shared cache to keep the cohort of a user in a course under.
+    """
+    return u'cohorts.membership.{}.{}'.format(user_id, course_key)
+
+
+def _request_cache(name):
+    """
+    Return the dict called `name` in the request cache, or None if
+    FEATURES['ENABLE_COHORT_MEMBERSHIP_CACHE'] isn't set or this thread isn't
+    handling a request (the request cache is only cleared between requests, so
+    outside of one, e.g. in celery tasks, it would never be cleared).
+    """
+    if not settings.FEATURES.get('ENABLE_COHORT_MEMBERSHIP_CACHE', False):
+        return None
+    if RequestCache.get_current_request() is None:
+        return None
+    return RequestCache.get_request_cache().data.setdefault(name, {})
+
+
+def _forget_cohort_memberships(user_ids, course_keys):
+    """
+    Remove the cached cohorts of the users with `user_ids` in the courses with
+    `course_keys`.
+    """
+    keys = [(user_id, course_key) for user_id in user_ids for course_key in course_keys]
+    if not keys:
+        return
+    memberships = RequestCache.get_request_cache().data.get('cohorts.memberships', {})
+    for key in keys:
+        memberships.pop(key, None)
+    cache.delete_many([_membership_cache_key(user_id, course_key) for user_id, course_key in keys])
+
+
+def _get_course(course_key):
+    """
+    Return the course with `course_key`, remembering it for the rest of the
+    request, if there is one, if FEATURES['ENABLE_COHORT_MEMBERSHIP_CACHE'] is set.
+
+    Raises:
+       Http404 if the course doesn't exist.
+    """
+    courses_by_key = _request_cache('cohorts.courses')
+    if courses_by_key is None:
+        return courses.get_course_by_id(course_key)
+    if course_key not in courses_by_key:
+        courses_by_key[course_key] = courses.get_course_by_id(course_key)
+    return courses_by_key[course_key]
+
+
 # A 'default cohort' is an auto-cohort that is automatically created for a course if no auto_cohort_groups have been
 # specified. It is intended to be used in a cohorted-course for users who have yet to be assigned to a cohort.
 # Note 1: If an administrator chooses to configure a cohort with the same name, the said cohort will be used as
@@ -133,7 +205,7 @@ def is_course_cohorted(course_key):
     Raises:
        Http404 if the course doesn't exist.
     """
-    return courses.get_course_by_id(course_key).is_cohorted
+    return _get_course(course_key).is_cohorted
 
 
 def get_cohort_id(user, course_key):
@@ -157,7 +229,7 @@ def is_commentable_cohorted(course_key, commentable_id):
     Raises:
         Http404 if the course doesn't exist.
     """
-    course = courses.get_course_by_id(course_key)
+    course = _get_course(course_key)
 
     if not course.is_cohorted:
         # this is the easy case :)
@@ -181,7 +253,7 @@ def get_cohorted_commentables(course_key):
     Given a course_key return a set of strings representing cohorted commentables.
     """
 
-    course = courses.get_course_by_id(course_key)
+    course = _get_course(course_key)
 
     if not course.is_cohorted:
         # this is the easy case :)
@@ -211,13 +283,37 @@ def get_cohort(user, course_key):
     # First check whether the course is cohorted (users shouldn't be in a cohort
     # in non-cohorted courses, but settings can change after course starts)
     try:
-        course = courses.get_course_by_id(course_key)
+        course = _get_course(course_key)
     except Http404:
         raise ValueError("Invalid course_key")
 
     if not course.is_cohorted:
         return None
 
+    # The user's cohort is cached in the shared cache until their membership changes,
+    # and for the rest of the request, if there is one, if
+    # FEATURES['ENABLE_COHORT_MEMBERSHIP_CACHE'] is set.
+    if not settings.FEATURES.get('ENABLE_COHORT_MEMBERSHIP_CACHE', False):
+        return _get_or_assign_cohort(user, course_key, course)
+
+    memberships = _request_cache('cohorts.memberships')
+    key = (user.id, course_key)
+    if memberships is not None and key in memberships:
+        return memberships[key]
+    cohort = cache.get(_membership_cache_key(user.id, course_key))
+    if cohort is None:
+        cohort = _get_or_assign_cohort(user, course_key, course)
+        cache.set(_membership_cache_key(user.id, course_key), cohort, settings.COHORT_MEMBERSHIP_CACHE_TIMEOUT)
+    if memberships is not None:
+        memberships[key] = cohort
+    return cohort
+
+
+def _get_or_assign_cohort(user, course_key, course):
+    """
+    Return the user's cohort in the cohorted `course` with `course_key`,
+    assigning them to one if they aren't in one yet.
+    """
     try:
         return CourseUserGroup.objects.get(
             course_id=course_key,
@@ -245,6 +341,43 @@ def get_cohort(user, course_key):
     return group
 
 
+def get_cohorts_for_users(users, course_key):
+    """
+    Look up the cohorts of many users in a course at once, for reports.
+
+    Arguments:
+        users: a list of Django User objects.
+        course_key: CourseKey
+
+    Returns:
+        A dict of the CourseUserGroup of each of the users by user id; None for
+        users who aren't in a cohort, and for all of them if the course isn't
+        cohorted. Unlike get_cohort, users aren't assigned to cohorts.
+
+    Raises:
+       ValueError if the CourseKey doesn't exist.
+    """
+    try:
+        course = _get_course(course_key)
+    except Http404:
+        raise ValueError("Invalid course_key")
+
+    user_ids = [user.id for user in users]
+    cohorts = dict.fromkeys(user_ids)
+    if not course.is_cohorted:
+        return cohorts
+
+    for start in xrange(0, len(user_ids), COHORTS_FOR_USERS_BATCH_SIZE):
+        memberships = CourseUserGroup.users.through.objects.filter(
+            user__in=user_ids[start:start + COHORTS_FOR_USERS_BATCH_SIZE],
+            courseusergroup__course_id=course_key,
+            courseusergroup__group_type=CourseUserGroup.COHORT,
+        ).select_related('courseusergroup')
+        for membership in memberships:
+            cohorts[membership.user_id] = membership.courseusergroup
+    return cohorts
+
+
 def get_course_cohorts(course):
     """
     Get a list of all the cohorts in the given course. This will include auto cohorts,
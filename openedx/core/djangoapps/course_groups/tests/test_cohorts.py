@@ -1,12 +1,14 @@
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import IntegrityError
 from django.http import Http404
 from django.test import TestCase
 from django.test.utils import override_settings
-from mock import call, patch
+from mock import call, Mock, patch
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from request_cache.middleware import RequestCache
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory
 from xmodule.modulestore.django import modulestore, clear_existing_modulestores
@@ -207,6 +209,88 @@ class TestCohorts(TestCase):
             "other_user should be assigned to the default cohort"
         )
 
+    @patch.dict("django.conf.settings.FEATURES", {"ENABLE_COHORT_MEMBERSHIP_CACHE": True})
+    def test_get_cohort_cached(self):
+        """
+        Make sure cohorts.get_cohort() caches cohorts until the user's membership changes.
+        """
+        cache.clear()
+        RequestCache().process_request(Mock())
+        self.addCleanup(RequestCache().clear_request_cache)
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, discussions=[], cohorted=True)
+        user = UserFactory(username="test", email="a@b.com")
+        first_cohort = CohortFactory(course_id=course.id, name="FirstCohort")
+        second_cohort = CohortFactory(course_id=course.id, name="SecondCohort")
+        first_cohort.users.add(user)
+
+        self.assertEqual(cohorts.get_cohort(user, course.id), first_cohort)
+        with self.assertNumQueries(0):
+            self.assertEqual(cohorts.get_cohort(user, course.id), first_cohort)
+
+        # The next request gets it from the shared cache
+        RequestCache().process_request(Mock())
+        with self.assertNumQueries(0):
+            self.assertEqual(cohorts.get_cohort_id(user, course.id), first_cohort.id)
+
+        cohorts.add_user_to_cohort(second_cohort, "test")
+        self.assertEqual(cohorts.get_cohort(user, course.id), second_cohort)
+        RequestCache().process_request(Mock())
+        self.assertEqual(cohorts.get_cohort(user, course.id), second_cohort)
+
+        # Deleting a cohort forgets its members' cached cohorts
+        second_cohort.delete()
+        RequestCache().process_request(Mock())
+        self.assertEqual(cohorts.get_cohort(user, course.id).name, cohorts.DEFAULT_COHORT_NAME)
+
+    @patch.dict("django.conf.settings.FEATURES", {"ENABLE_COHORT_MEMBERSHIP_CACHE": True})
+    def test_get_cohort_cached_outside_request(self):
+        """
+        Make sure cohorts.get_cohort() only uses the shared cache outside of a request, e.g. in celery tasks.
+        """
+        cache.clear()
+        RequestCache().clear_request_cache()
+        self.addCleanup(RequestCache().clear_request_cache)
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, discussions=[], cohorted=True)
+        user = UserFactory(username="test", email="a@b.com")
+        cohort = CohortFactory(course_id=course.id, name="TestCohort")
+        cohort.users.add(user)
+
+        self.assertEqual(cohorts.get_cohort(user, course.id), cohort)
+        with self.assertNumQueries(0):
+            self.assertEqual(cohorts.get_cohort(user, course.id), cohort)
+        self.assertEqual(RequestCache.get_request_cache().data, {})
+
+    def test_get_cohorts_for_users(self):
+        """
+        Make sure cohorts.get_cohorts_for_users() finds the cohorts of all the users, without assigning any.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        users = [UserFactory() for __ in range(3)]
+        cohort = CohortFactory(course_id=course.id, name="TestCohort")
+        cohort.users.add(users[0], users[1])
+        CohortFactory(name="OtherCourseCohort").users.add(users[2])
+
+        self.assertEqual(
+            cohorts.get_cohorts_for_users(users, course.id),
+            {users[0].id: None, users[1].id: None, users[2].id: None},
+            "Course isn't cohorted, so no one should have a cohort"
+        )
+
+        config_course_cohorts(course, discussions=[], cohorted=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                cohorts.get_cohorts_for_users(users, course.id),
+                {users[0].id: cohort, users[1].id: cohort, users[2].id: None}
+            )
+        self.assertFalse(users[2].course_groups.exists())
+
+        self.assertRaises(
+            ValueError,
+            lambda: cohorts.get_cohorts_for_users(users, SlashSeparatedCourseKey("course", "does_not", "exist"))
+        )
+
     def test_auto_cohorting(self):
         """
         Make sure cohorts.get_cohort() does the right thing with auto_cohort_groups